@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+"""
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布时间标准化和范围查询基准测试
+
+1. 解析：各种常见格式的发布时间文字，parse_pub_time 每条耗时和解析成功率
+2. 查询：按不同数据量（默认1万/10万/50万篇，发布时间分布在过去一年）建汇总表，
+   查询某一天发布的新闻（最新20篇和篇数），对比：
+   - scan    NOT INDEXED，扫描全表（没有pub_ts索引时的做法）
+   - index   pub_ts索引范围查询（/api/news?since=&until= 的查询方式）
+   并输出两种方式的查询计划
+
+用法：
+    python -m benchmarks.bench_dates --rows 10000 100000 500000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from crawler_dates import init_pub_ts, parse_pub_time
+
+FORMATS = [
+    lambda t: t.strftime('%Y-%m-%d %H:%M'),
+    lambda t: t.strftime('%Y-%m-%d %H:%M:%S'),
+    lambda t: t.strftime('%Y年%m月%d日 %H:%M'),
+    lambda t: t.strftime('%Y/%m/%d'),
+    lambda t: t.isoformat() + '+08:00',
+    lambda t: '发布时间：' + t.strftime('%Y-%m-%d %H:%M') + ' 来源：新华社',
+    lambda t: t.strftime('%m-%d %H:%M'),
+    lambda t: f'{t.month}月{t.day}日 {t.hour:02d}:{t.minute:02d}',
+    lambda t: f'{random.randint(1, 23)}小时前',
+    lambda t: f'{random.randint(1, 59)}分钟前',
+    lambda t: '昨天 ' + t.strftime('%H:%M'),
+    lambda t: t.strftime('%a, %d %b %Y %H:%M:%S +0800'),
+    lambda t: str(int(t.timestamp())),
+    lambda t: '未知'
+]
+
+
+def bench_parse(rng, count):
+    now = datetime.now()
+    samples = []
+    for _ in range(count):
+        moment = now - timedelta(seconds=rng.randint(0, 300 * 86400))
+        samples.append((rng.choice(FORMATS)(moment), now))
+    start = time.perf_counter()
+    parsed = sum(parse_pub_time(text, reference) is not None for text, reference in samples)
+    elapsed = time.perf_counter() - start
+    return {
+        'us_per_value': round(elapsed / count * 1e6, 2),
+        # “未知”无法解析，其他格式都应成功
+        'parsed_rate': round(parsed / count, 4),
+        'expected_rate': round(1 - 1 / len(FORMATS), 4)
+    }
+
+
+def build_database(path, rows, seed):
+    rng = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE news_summary (
+            id INTEGER PRIMARY KEY, title TEXT, url TEXT, summary TEXT, source TEXT,
+            pub_time TEXT, crawl_time TEXT
+        )
+    ''')
+    init_pub_ts(conn)
+    batch = []
+    for index in range(rows):
+        timestamp = int(now - rng.uniform(0, 365 * 86400))
+        text = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        batch.append((f'新闻标题{index}', f'http://example.com/{index}', '摘要' * 50, f'来源{index % 8}',
+                      text, text, timestamp))
+        if len(batch) == 10000:
+            conn.executemany('INSERT INTO news_summary (title, url, summary, source, pub_time, crawl_time, pub_ts) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.executemany('INSERT INTO news_summary (title, url, summary, source, pub_time, crawl_time, pub_ts) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+    conn.commit()
+    return conn, int(now - 30 * 86400)
+
+
+def range_queries(conn, since, until, hint):
+    page = conn.execute(f'SELECT * FROM news_summary {hint} WHERE pub_ts >= ? AND pub_ts < ? '
+                        'ORDER BY pub_ts DESC LIMIT 20', (since, until)).fetchall()
+    count = conn.execute(f'SELECT COUNT(*) FROM news_summary {hint} WHERE pub_ts >= ? AND pub_ts < ?',
+                         (since, until)).fetchone()[0]
+    return len(page), count
+
+
+def query_plan(conn, hint):
+    rows = conn.execute(f'EXPLAIN QUERY PLAN SELECT * FROM news_summary {hint} WHERE pub_ts >= 0 AND pub_ts < 1 '
+                        'ORDER BY pub_ts DESC LIMIT 20').fetchall()
+    return '; '.join(row[-1] for row in rows)
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='发布时间标准化和范围查询基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--parse-samples', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    results = {'options': vars(args), 'parse': bench_parse(rng, args.parse_samples), 'queries': {}}
+    parse = results['parse']
+    print(f'解析 {args.parse_samples} 条：每条 {parse["us_per_value"]}us，'
+          f'成功率 {parse["parsed_rate"]:.1%}（可解析格式占 {parse["expected_rate"]:.1%}）')
+
+    with tempfile.TemporaryDirectory(prefix='bench_dates_') as workdir:
+        for rows in args.rows:
+            conn, since = build_database(os.path.join(workdir, f'{rows}.db'), rows, args.seed)
+            until = since + 86400
+            result = {}
+            for method, hint in (('scan', 'NOT INDEXED'), ('index', '')):
+                matched = range_queries(conn, since, until, hint)
+                result[method] = {
+                    'query_ms': best_of(lambda: range_queries(conn, since, until, hint), args.repeat),
+                    'plan': query_plan(conn, hint),
+                    'matched': matched[1]
+                }
+            conn.close()
+            results['queries'][rows] = result
+            print(f'{rows:>7} 篇  一天内 {result["index"]["matched"]} 篇  '
+                  f'全表扫描 {result["scan"]["query_ms"]}ms  索引 {result["index"]["query_ms"]}ms  '
+                  f'（{result["index"]["plan"]}）')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章发现基准测试
+
+在本地模拟新闻网站（带robots.txt、RSS和站点地图）上多轮调用高级爬虫的 extract_news_links，
+每轮之前网站新发布 --publish 篇文章，返回的链接视为已爬取。对比：
+- homepage   下载并解析整个首页（未开启discovery时的做法）
+- discovery  crawler_discovery：订阅源和站点地图，按上一轮的发布时间水位过滤
+第0轮为冷启动（discovery需要获取robots.txt并自动发现订阅源），之后每轮输出：
+- 请求数、下载字节数、耗时
+- 返回的链接数，其中本轮新发布的文章数（新文章覆盖率）
+
+用法：
+    python -m benchmarks.bench_discovery --articles 2000 --publish 20 --rounds 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.mock_news_site import MockNewsSite
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_crawler(site_url, discovery, initial_hours):
+    from news_crawler_advanced import AdvancedNewsCrawler
+    crawler = AdvancedNewsCrawler({
+        'request_delay': (0, 0),
+        'discovery': {'enabled': discovery, 'initial_hours': initial_hours},
+        'target_sites': [{'name': '模拟新闻网', 'base_url': site_url + '/', 'content_selector': '.post_content_main'}]
+    })
+    stats = {'requests': 0, 'bytes': 0}
+    make_request = crawler.make_request
+
+    def counted(url, *args, **kwargs):
+        response = make_request(url, *args, **kwargs)
+        stats['requests'] += 1
+        if response is not None:
+            stats['bytes'] += len(response.content)
+        return response
+
+    crawler.make_request = counted
+    if crawler.discovery:
+        crawler.discovery.fetch = counted
+    return crawler, stats
+
+
+def run(method, args):
+    site = MockNewsSite(articles=args.articles + args.publish * (args.rounds + 1), visible=args.articles,
+                        feeds=True, page_size_kb=1)
+    site.start()
+    rounds = []
+    try:
+        crawler, stats = make_crawler(site.base_url, method == 'discovery', args.initial_hours)
+        site_config = crawler.config['target_sites'][0]
+        for round_index in range(args.rounds + 1):
+            if round_index:
+                site.publish(args.publish)
+            fresh = {f'{site.base_url}/news/article/{i}.html'
+                     for i in range(site.visible - (args.publish if round_index else 0), site.visible)}
+            stats.update(requests=0, bytes=0)
+            start = time.perf_counter()
+            links = crawler.extract_news_links(site_config, args.max_links)
+            elapsed = time.perf_counter() - start
+            urls = {link['url'] for link in links}
+            # 返回的链接视为已爬取，下一轮不再返回
+            crawler.crawled_urls.update(urls)
+            rounds.append({
+                'round': round_index,
+                'requests': stats['requests'],
+                'kb': round(stats['bytes'] / 1024, 1),
+                'ms': round(elapsed * 1000, 1),
+                'links': len(links),
+                'new_found': len(urls & fresh),
+                'new_published': len(fresh)
+            })
+    finally:
+        site.stop()
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章发现基准测试')
+    parser.add_argument('--articles', type=int, default=2000, help='网站初始的文章数（首页全部列出）')
+    parser.add_argument('--publish', type=int, default=20, help='每轮之前新发布的文章数')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--max-links', type=int, default=50)
+    parser.add_argument('--initial-hours', type=float, default=2,
+                        help='discovery第一次发现时只取最近几小时的文章（模拟文章每10分钟一篇）')
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    results = {'options': vars(args), 'methods': {}}
+    work_dir = tempfile.mkdtemp(prefix='bench_discovery_')
+    os.chdir(work_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from crawler_logging import setup_logging
+            setup_logging({'monitoring': {'log_level': 'WARNING'}})
+        for method in ('homepage', 'discovery'):
+            results['methods'][method] = run(method, args)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for method, rounds in results['methods'].items():
+        for item in rounds:
+            new = f'新文章 {item["new_found"]}/{item["new_published"]}' if item['round'] else '冷启动'
+            print(f'{method:<10}第{item["round"]}轮  请求 {item["requests"]} 次  {item["kb"]}KB  {item["ms"]}ms  '
+                  f'返回 {item["links"]} 条（{new}）')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式爬取扩展性基准测试
+
+使用本地SQLite队列和模拟抓取函数（固定网络延迟 + CPU解析开销），
+分别以 1、2、4... 个工作者进程处理同一批URL，输出吞吐量和扩展效率。
+
+用法：
+    python -m benchmarks.bench_distributed --urls 400 --domains 40 --workers 1 2 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from crawler_distributed import SQLiteFrontier, start_local_workers
+
+# 模拟抓取参数（通过环境变量传递给工作者进程）
+LATENCY_ENV = 'BENCH_FETCH_LATENCY_MS'
+CPU_ENV = 'BENCH_PARSE_CPU_MS'
+
+
+def simulated_fetch(task):
+    """
+    模拟一次抓取：等待网络延迟，再消耗一段CPU时间模拟HTML解析
+    """
+    time.sleep(float(os.environ.get(LATENCY_ENV, '20')) / 1000)
+
+    deadline = time.perf_counter() + float(os.environ.get(CPU_ENV, '5')) / 1000
+    checksum = 0
+    while time.perf_counter() < deadline:
+        checksum = (checksum * 31 + 7) % 1000003
+
+    return {
+        'title': task['title'],
+        'url': task['url'],
+        'content': f'模拟正文 {checksum}',
+        'source': task['source']
+    }
+
+
+def run_once(num_urls, num_domains, num_workers, batch_size):
+    """以指定工作者数量处理一批URL，返回耗时和处理数量"""
+    work_dir = tempfile.mkdtemp(prefix='bench_frontier_')
+    try:
+        db_path = os.path.join(work_dir, 'frontier.db')
+        frontier = SQLiteFrontier(db_path, lease_seconds=30, domain_delay=0)
+
+        links = [
+            {
+                'url': f'http://site{i % num_domains}.local/news/{i}.html',
+                'title': f'新闻 {i}',
+                'source': f'站点{i % num_domains}'
+            }
+            for i in range(num_urls)
+        ]
+        frontier.enqueue(links, {'name': 'bench'})
+
+        worker_options = {
+            'batch_size': batch_size,
+            'request_delay': (0, 0),
+            'idle_timeout': 0.5,
+            'frontier_options': {'lease_seconds': 30, 'domain_delay': 0}
+        }
+
+        start = time.perf_counter()
+        processes = start_local_workers(db_path, num_workers, worker_options, simulated_fetch)
+
+        while not frontier.is_finished():
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+
+        for process in processes:
+            process.join()
+
+        done = frontier.stats()['done']
+        return {'workers': num_workers, 'processed': done, 'seconds': round(elapsed, 3),
+                'pages_per_second': round(done / elapsed, 2)}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分布式爬取扩展性基准测试')
+    parser.add_argument('--urls', type=int, default=400)
+    parser.add_argument('--domains', type=int, default=40)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--batch-size', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--cpu-ms', type=float, default=5)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    os.environ[LATENCY_ENV] = str(args.latency_ms)
+    os.environ[CPU_ENV] = str(args.cpu_ms)
+
+    results = []
+    baseline = None
+    for num_workers in args.workers:
+        result = run_once(args.urls, args.domains, num_workers, args.batch_size)
+        baseline = baseline or result['pages_per_second'] / num_workers
+        result['efficiency'] = round(result['pages_per_second'] / (baseline * num_workers), 3)
+        results.append(result)
+        print(f'{num_workers:>3} 个工作者: {result["pages_per_second"]:>8.2f} 页/秒, '
+              f'扩展效率 {result["efficiency"]:.0%}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
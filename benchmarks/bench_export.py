@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出基准测试
+
+在临时目录中生成带 --rows 条新闻（每条正文约 --content-kb KB）的汇总数据库，对比：
+- fetchall   一次读出全部行再序列化（get_news_data(limit=行数) + json.dumps，分页API的做法）
+- csv/jsonl/parquet   crawler_export：只读连接 fetchmany 按批读取、逐批编码（/api/export）
+输出每种方法在不同行数下的耗时、行/秒、输出大小和Python堆内存峰值（tracemalloc）；
+流式导出的峰值应与行数无关。parquet需要安装pyarrow（pyarrow自身的缓冲区不计入tracemalloc，
+第一组的耗时和峰值包含导入pyarrow），未安装时跳过
+
+用法：
+    python -m benchmarks.bench_export --rows 1000 100000 --content-kb 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORDS = ['经济', '科技', '发布会', '市场', '增长', '政策', '数据', '城市', '交通', '教育', '新能源', '报道']
+
+
+def fill_database(manager, rows, content_kb):
+    """写入rows条新闻（逐批executemany，生成数据本身不占用大量内存）"""
+    random.seed(1)
+    now = int(time.time())
+    conn = sqlite3.connect(manager.db_path)
+    batch = []
+    for i in range(rows):
+        content = ''.join(random.choices(WORDS, k=content_kb * 1024 // 6))
+        pub_ts = now - i * 60
+        batch.append((f'新闻标题{i}', f'https://example.com/news/{i}.html', content, content[:100],
+                      time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(pub_ts)),
+                      time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(pub_ts + 30)),
+                      f'来源{i % 5}', '综合', '经济,科技', random.random(), len(content), 'advanced', pub_ts))
+        if len(batch) == 5000 or i == rows - 1:
+            conn.executemany('''
+                INSERT INTO news_summary (title, url, content, summary, pub_time, crawl_time, source, category,
+                                          keywords, sentiment_score, word_count, crawler_type, pub_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            batch = []
+    conn.commit()
+    conn.close()
+
+
+def measure(method, manager, rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    if method == 'fetchall':
+        size = len(json.dumps(manager.get_news_data(limit=rows), ensure_ascii=False).encode('utf-8'))
+    else:
+        for chunk in manager.export_news(method):
+            size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(rows / elapsed),
+        'output_mb': round(size / 1024 / 1024, 1),
+        'peak_mb': round(peak / 1024 / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式导出基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--content-kb', type=int, default=1, help='每条新闻的正文大小')
+    parser.add_argument('--methods', nargs='+', default=['fetchall', 'csv', 'jsonl', 'parquet'])
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    from crawler_export import parquet_available
+    methods = [m for m in args.methods if m != 'parquet' or parquet_available()]
+    if methods != args.methods:
+        print('未安装pyarrow，跳过parquet')
+
+    results = {'options': vars(args), 'rows': {}}
+    for rows in args.rows:
+        work_dir = tempfile.mkdtemp(prefix='bench_export_')
+        shutil.copy(os.path.join(REPO_ROOT, 'crawler_config.json'), work_dir)
+        os.chdir(work_dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                from crawler_logging import setup_logging
+                setup_logging({'monitoring': {'log_level': 'WARNING'}})
+                from crawler_manager import CrawlerManager
+                manager = CrawlerManager(execution_mode='web')
+            fill_database(manager, rows, args.content_kb)
+            results['rows'][rows] = {method: measure(method, manager, rows) for method in methods}
+        finally:
+            os.chdir(REPO_ROOT)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for rows, by_method in results['rows'].items():
+        for method, result in by_method.items():
+            print(f'{rows:>9} 行  {method:<9}{result["seconds"]:>7}s  {result["rows_per_second"]:>8} 行/秒  '
+                  f'输出 {result["output_mb"]}MB  内存峰值 {result["peak_mb"]}MB')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文提取基准测试
+
+按几种常见的页面模板生成合成文章页（正文已知），对比：
+- selectors  依次尝试选择器列表，取第一个匹配元素的全部文字（ContentExtractor之前的做法）
+- density    ContentExtractor，不缓存模板路径（每页都打分）
+- cached     ContentExtractor，按模板缓存正文路径
+
+模板：
+- selector  正文在 .post_content_main 中，选择器可直接匹配
+- unknown   正文容器的class不在选择器列表中
+- wrapper   .content 匹配到包含导航、侧栏和相关阅读的外层容器
+- br        正文直接写在div中，用<br>分段
+
+“可用”指提取结果包含至少90%的正文段落，且多余文字不超过正文的10%。
+输出每种方式在各模板上的可用率和每页耗时。
+
+用法：
+    python -m benchmarks.bench_extract --pages 200
+"""
+
+import argparse
+import json
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.mock_news_site import NAV, PAGE_TEMPLATE, make_sentence
+from crawler_extract import ContentExtractor
+
+# 基础爬虫使用的选择器列表
+SELECTORS = ['.post_content_main', '.post_text', '.content', 'article', '.article-content']
+TEMPLATES = ['selector', 'unknown', 'wrapper', 'br']
+METHODS = ['selectors', 'density', 'cached']
+
+
+def make_page(rng, template, article_id, paragraphs):
+    related = ''.join(f'<li><a href="/news/article/{article_id + i}.html">{make_sentence(rng, 6)}</a></li>'
+                      for i in range(1, 8))
+    sidebar = (f'<div class="sidebar"><h3>热门排行</h3><ul>{related}</ul>'
+               f'<p>关注我们的公众号获取更多资讯，扫码下载客户端。</p></div>')
+    ad = '<div class="ad">广告位招租，联系电话010-12345678</div>'
+    info = '<div class="info"><span class="time">2025-01-01 10:00</span><span>来源：模拟新闻网</span></div>'
+
+    if template == 'selector':
+        body = f'<h1>标题</h1>{info}{ad}<div class="post_content_main">{"".join(f"<p>{p}</p>" for p in paragraphs)}</div>{sidebar}'
+    elif template == 'unknown':
+        body = (f'<div class="layout-{article_id % 3}"><h1>标题</h1>{info}'
+                f'<div class="art-main"><div class="art-txt">{"".join(f"<p>{p}</p>" for p in paragraphs)}</div></div>'
+                f'{sidebar}</div>')
+    elif template == 'wrapper':
+        body = (f'<div class="content"><div class="subnav">{NAV}</div>{sidebar}<h1>标题</h1>{info}{ad}'
+                f'<div class="article-body">{"".join(f"<p>{p}</p>" for p in paragraphs)}</div>'
+                f'<div class="related"><h3>相关阅读</h3><ul>{related}</ul></div>'
+                f'<p class="copyright">本文为模拟新闻网原创，未经授权不得转载。责任编辑：张三</p></div>')
+    else:
+        body = f'<h1>标题</h1>{info}<div class="txt" id="text-{article_id}">{"<br><br>".join(paragraphs)}</div>{sidebar}'
+
+    return PAGE_TEMPLATE.format(title='标题', path=f'/{template}/{article_id}.html', nav=NAV, body=body)
+
+
+def extract_selectors(soup):
+    for selector in SELECTORS:
+        elem = soup.select_one(selector)
+        if elem:
+            return elem.get_text(strip=True)
+    return ''
+
+
+def is_usable(content, paragraphs):
+    if not content:
+        return False
+    found = [p for p in paragraphs if p in content]
+    truth = sum(len(p) for p in paragraphs)
+    matched = sum(len(p) for p in found)
+    return matched >= 0.9 * truth and len(content) - matched <= 0.1 * truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description='正文提取基准测试')
+    parser.add_argument('--pages', type=int, default=200, help='每种模板的页面数')
+    parser.add_argument('--paragraphs', type=int, default=8, help='每篇正文的段落数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = []
+    for template in TEMPLATES:
+        for article_id in range(args.pages):
+            paragraphs = [''.join(make_sentence(rng) for _ in range(rng.randint(2, 5))) for _ in range(args.paragraphs)]
+            html = make_page(rng, template, article_id, paragraphs)
+            pages.append((template, f'http://{template}.example.com/news/{article_id}.html', html, paragraphs))
+
+    results = {'options': vars(args), 'methods': {}}
+    for method in METHODS:
+        extractor = ContentExtractor(cache_size=0 if method == 'density' else 512)
+        usable = dict.fromkeys(TEMPLATES, 0)
+        elapsed = 0.0
+        for template, url, html, paragraphs in pages:
+            soup = BeautifulSoup(html, 'html.parser')
+            start = time.perf_counter()
+            if method == 'selectors':
+                content = extract_selectors(soup)
+            else:
+                content, _ = extractor.extract(soup, url, SELECTORS)
+            elapsed += time.perf_counter() - start
+            usable[template] += is_usable(content, paragraphs)
+
+        result = {
+            'usable_rate': round(sum(usable.values()) / len(pages), 3),
+            'by_template': {template: round(count / args.pages, 3) for template, count in usable.items()},
+            'ms_per_page': round(elapsed / len(pages) * 1000, 3)
+        }
+        if method != 'selectors':
+            result['cache'] = extractor.stats()
+        results['methods'][method] = result
+        by_template = '  '.join(f'{template} {rate:.0%}' for template, rate in result['by_template'].items())
+        print(f'{method:<10}可用率 {result["usable_rate"]:.1%}  ({by_template})  每页 {result["ms_per_page"]}ms')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
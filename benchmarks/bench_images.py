@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章图片管道基准测试
+
+在本地模拟新闻网站（每篇文章正文带若干图片，图片池中的图片被多篇文章引用，
+/images/ 和 /cdn/ 下同序号的图片内容相同）上用高级爬虫爬取一个网站，对比：
+- off   不下载图片
+- on    crawler_images：后台线程按带宽预算下载，URL和内容哈希去重，进程池生成缩略图
+输出：
+- 正文爬取耗时（crawl_site返回的时间，开启图片后不应明显变长）
+- 图片队列处理完的额外等待时间、下载字节数和实际速率（应不超过 --bandwidth-kbps）
+- 保存的图片数、缩略图数、URL去重（known）和内容去重（duplicate）次数
+
+用法：
+    python -m benchmarks.bench_images --articles 100 --images-per-article 3 --bandwidth-kbps 2048
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.mock_news_site import MockNewsSite
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def counter_values(counter):
+    return {tuple(labels): value for labels, value in counter.snapshot()['samples']}
+
+
+def run(method, site_url, args):
+    from crawler_images import IMAGE_BYTES, IMAGES_TOTAL
+    from news_crawler_advanced import AdvancedNewsCrawler
+
+    crawler = AdvancedNewsCrawler({
+        'max_workers': args.workers,
+        'request_delay': (0, 0),
+        'image_settings': {
+            'enabled': method == 'on',
+            'bandwidth_kbps': args.bandwidth_kbps,
+            'workers': args.image_workers,
+            'thumbnail_processes': args.thumbnail_processes,
+            'min_image_bytes': 0
+        },
+        'target_sites': [{'name': '模拟新闻网', 'base_url': site_url + '/', 'content_selector': '.post_content_main'}]
+    })
+    site_config = crawler.config['target_sites'][0]
+    bytes_before = sum(counter_values(IMAGE_BYTES).values())
+    results_before = counter_values(IMAGES_TOTAL)
+
+    start = time.perf_counter()
+    crawler.crawl_site(site_config, args.articles)
+    crawl_seconds = time.perf_counter() - start
+    result = {'news': len(crawler.news_data), 'crawl_seconds': round(crawl_seconds, 2)}
+    if not crawler.images:
+        return result
+
+    crawler.images.close()
+    total_seconds = time.perf_counter() - start
+    stats = crawler.images.stats()
+    conn = sqlite3.connect(crawler.images.db_path)
+    links = conn.execute('SELECT COUNT(*) FROM article_images').fetchone()[0]
+    conn.close()
+    downloaded = sum(counter_values(IMAGE_BYTES).values()) - bytes_before
+    outcomes = {labels[0]: value - results_before.get(labels, 0)
+                for labels, value in counter_values(IMAGES_TOTAL).items() if value > results_before.get(labels, 0)}
+    result.update(
+        drain_seconds=round(total_seconds - crawl_seconds, 2),
+        images=stats['images'],
+        thumbnails=stats['thumbnails'],
+        article_links=links,
+        outcomes=outcomes,
+        downloaded_kb=round(downloaded / 1024, 1),
+        rate_kbps=round(downloaded / 1024 / total_seconds, 1)
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章图片管道基准测试')
+    parser.add_argument('--articles', type=int, default=100)
+    parser.add_argument('--images-per-article', type=int, default=3)
+    parser.add_argument('--image-pool', type=int, default=40, help='图片池大小（越小重复引用越多）')
+    parser.add_argument('--workers', type=int, default=5, help='正文爬取线程数')
+    parser.add_argument('--image-workers', type=int, default=2)
+    parser.add_argument('--thumbnail-processes', type=int, default=1)
+    parser.add_argument('--bandwidth-kbps', type=float, default=2048)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    results = {'options': vars(args), 'methods': {}}
+    with MockNewsSite(articles=args.articles, page_size_kb=4, latency_ms=args.latency_ms,
+                      images_per_article=args.images_per_article, image_pool=args.image_pool) as site:
+        # 预热：分词词典等只在第一次爬取时加载，不计入对比
+        for method in ('warmup', 'off', 'on'):
+            work_dir = tempfile.mkdtemp(prefix=f'bench_images_{method}_')
+            os.chdir(work_dir)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    from crawler_logging import setup_logging
+                    setup_logging({'monitoring': {'log_level': 'WARNING'}})
+                result = run(method, site.base_url, args)
+                if method != 'warmup':
+                    results['methods'][method] = result
+            finally:
+                os.chdir(REPO_ROOT)
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    for method, result in results['methods'].items():
+        line = f'{method:<4}正文 {result["news"]} 篇  爬取 {result["crawl_seconds"]}s'
+        if 'images' in result:
+            line += (f'  图片队列额外等待 {result["drain_seconds"]}s  下载 {result["downloaded_kb"]}KB'
+                     f'（{result["rate_kbps"]}KB/s）  保存 {result["images"]} 张  缩略图 {result["thumbnails"]} 张  '
+                     f'文章引用 {result["article_links"]} 条  {result["outcomes"]}')
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
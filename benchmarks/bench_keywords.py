@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词提取基准测试
+
+生成N篇合成新闻（每篇有一个主题，正文由主题词、通用新闻用语和来源模板文字组成），对比：
+- extract_tags    逐篇调用 jieba.analyse.extract_tags（KeywordEngine之前的做法）
+- engine_single   KeywordEngine.extract 逐篇提取（爬虫保存新闻时的调用方式）
+- engine_batch    KeywordEngine.extract_batch 整批提取（crawler_keywords rebuild 的方式）
+- engine_procs    同上，分词使用多进程（CPU核数大于1时）
+
+对每种方式输出：
+- 每篇耗时，以及其中分词和打分各占多少（engine_batch）
+- 关键词质量：top-k中主题词的比例、来源模板文字（每篇都有的“责任编辑”“未经授权”等）的比例
+
+用法：
+    python -m benchmarks.bench_keywords --articles 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from benchmarks.mock_news_site import WORDS
+from crawler_keywords import KeywordEngine
+
+TOPICS = {
+    '财经': ['央行', '降准', '利率', '债券', '通胀', '汇率', '基金', '上市公司', '财报', '营收', '投资者', '资本市场'],
+    '科技': ['芯片', '半导体', '大模型', '算法', '算力', '数据中心', '操作系统', '智能手机', '开源', '研发投入', '专利', '云计算'],
+    '体育': ['足球', '联赛', '冠军', '进球', '教练', '球员', '奥运会', '金牌', '马拉松', '篮球', '世界杯', '主场'],
+    '社会': ['社区', '养老', '医保', '住房', '就业', '志愿者', '交通', '垃圾分类', '物业', '学校', '食品安全', '消费者'],
+    '国际': ['外交部', '联合国', '峰会', '关税', '制裁', '大使', '谈判', '停火', '选举', '议会', '贸易协定', '难民']
+}
+# 每个来源页面都带的模板文字
+BOILERPLATE = ['责任编辑', '未经授权', '不得转载', '客户端', '原创', '新闻资讯']
+METHODS = ['extract_tags', 'engine_single', 'engine_batch', 'engine_procs']
+
+
+def make_article(rng, topic, sentences):
+    topic_words = TOPICS[topic]
+    parts = []
+    for _ in range(sentences):
+        words = rng.choices(topic_words, k=rng.randint(2, 4)) + rng.choices(WORDS, k=rng.randint(6, 10))
+        rng.shuffle(words)
+        parts.append(''.join(words) + '。')
+    source = rng.randint(0, 4)
+    return (f'来源{source}讯 记者报道：' + ''.join(parts)
+            + f'（责任编辑：王{source}）本文为来源{source}原创，未经授权不得转载。关注来源{source}客户端，获取更多新闻资讯。')
+
+
+def quality(keywords, topics):
+    total = topic_hits = boilerplate_hits = 0
+    for words, topic in zip(keywords, topics):
+        topic_words = set(TOPICS[topic])
+        total += len(words)
+        topic_hits += sum(word in topic_words for word in words)
+        boilerplate_hits += sum(word in BOILERPLATE for word in words)
+    return round(topic_hits / total, 3), round(boilerplate_hits / total, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='关键词提取基准测试')
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--sentences', type=int, default=20, help='每篇正文的句子数')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--processes', type=int, default=0, help='engine_procs的进程数（默认CPU核数）')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topics = [rng.choice(list(TOPICS)) for _ in range(args.articles)]
+    texts = [make_article(rng, topic, args.sentences) for topic in topics]
+    processes = args.processes or os.cpu_count() or 1
+
+    # 预先加载jieba词典和IDF表，不计入耗时
+    import jieba
+    import jieba.analyse
+    jieba.initialize()
+    jieba.analyse.extract_tags(texts[0])
+
+    results = {'options': vars(args), 'cpu_count': os.cpu_count(), 'methods': {}}
+    for method in METHODS:
+        if method == 'engine_procs' and processes <= 1:
+            print('engine_procs 跳过：只有1个CPU核，多进程分词没有加速空间')
+            continue
+
+        engine = KeywordEngine(top_k=args.top_k, processes=processes if method == 'engine_procs' else 1)
+        result = {}
+        start = time.perf_counter()
+        if method == 'extract_tags':
+            keywords = [jieba.analyse.extract_tags(text, topK=args.top_k) for text in texts]
+        elif method == 'engine_single':
+            keywords = [engine.extract(text) for text in texts]
+        else:
+            tokenize_start = time.perf_counter()
+            counts = engine.count_matrix(engine.tokenize_batch(texts))
+            score_start = time.perf_counter()
+            keywords = engine.top_terms(counts)
+            result['tokenize_ms'] = round((score_start - tokenize_start) * 1000, 1)
+            result['score_ms'] = round((time.perf_counter() - score_start) * 1000, 1)
+        elapsed = time.perf_counter() - start
+
+        result['ms_per_article'] = round(elapsed / len(texts) * 1000, 3)
+        result['topic_rate'], result['boilerplate_rate'] = quality(keywords, topics)
+        results['methods'][method] = result
+        split = (f'  (分词 {result["tokenize_ms"]}ms，打分 {result["score_ms"]}ms)'
+                 if 'score_ms' in result else '')
+        print(f'{method:<14}每篇 {result["ms_per_article"]:>7}ms  主题词 {result["topic_rate"]:.1%}  '
+              f'模板文字 {result["boilerplate_rate"]:.1%}{split}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
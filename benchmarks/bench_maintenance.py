@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在线备份基准测试
+
+生成一个指定大小的新闻库，备份的同时另一个线程按固定间隔写入（模拟爬虫保存新闻），对比：
+- single    一次复制完（sqlite3备份API的默认用法）
+- stepped   DatabaseMaintenance.backup_database：每步复制少量页面，两步之间暂停
+分别在回滚日志模式（高级爬虫的news.db）和WAL模式（汇总库）下测试。
+
+对每种组合输出：
+- 备份耗时、实际采用的方式（写入过于频繁时stepped会退回一次复制）、重新开始次数
+- 备份期间写入的次数、写入耗时的p99和最大值（写入被备份阻塞的时间）
+
+用法：
+    python -m benchmarks.bench_maintenance --size-mb 50 --write-interval 0.2
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from crawler_maintenance import DatabaseMaintenance
+
+
+def build_database(path, size_mb, journal_mode):
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.execute('CREATE TABLE news (id INTEGER PRIMARY KEY, title TEXT, content TEXT, crawl_time TEXT)')
+    content = '新闻正文' * 500
+    rows = size_mb * 1024 * 1024 // (len(content.encode('utf-8')) + 64)
+    conn.executemany('INSERT INTO news (title, content, crawl_time) VALUES (?, ?, ?)',
+                     ((f'标题{i}', content, '2025-01-01 00:00:00') for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(path, backup_dir, method, write_interval, pages, step_sleep):
+    os.makedirs(backup_dir, exist_ok=True)
+    latencies = []
+    stop = threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(path, timeout=60)
+        while not stop.is_set():
+            start = time.perf_counter()
+            conn.execute("INSERT INTO news (title, content, crawl_time) VALUES ('新新闻', '正文', '2025-01-01')")
+            conn.commit()
+            latencies.append(time.perf_counter() - start)
+            stop.wait(write_interval)
+        conn.close()
+
+    maintenance = DatabaseMaintenance([path], os.path.join(backup_dir, 'state.db'), backup_dir=backup_dir,
+                                      backup_pages_per_step=pages, backup_step_sleep=step_sleep,
+                                      backup_keep=1, backup_verify=False)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(write_interval)
+    start = time.perf_counter()
+    if method == 'single':
+        source = sqlite3.connect(path, timeout=60)
+        destination = sqlite3.connect(os.path.join(backup_dir, 'single.db'))
+        source.backup(destination)
+        destination.close()
+        source.close()
+        result = {'mode': 'single', 'restarts': 0}
+    else:
+        result = maintenance.backup_database(path)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    return {
+        'backup_seconds': round(elapsed, 3),
+        'mode': result['mode'],
+        'restarts': result['restarts'],
+        'writes': len(latencies),
+        'write_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'write_max_ms': round(max(latencies, default=0) * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在线备份基准测试')
+    parser.add_argument('--size-mb', type=int, default=50)
+    parser.add_argument('--write-interval', type=float, nargs='+', default=[1.0, 0.2],
+                        help='写入线程两次写入的间隔（秒）')
+    parser.add_argument('--pages', type=int, default=256, help='stepped每步复制的页数')
+    parser.add_argument('--step-sleep', type=float, default=0.05)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    results = {'options': vars(args), 'runs': []}
+    with tempfile.TemporaryDirectory(prefix='bench_maintenance_') as workdir:
+        for journal_mode in ('delete', 'wal'):
+            path = os.path.join(workdir, f'{journal_mode}.db')
+            build_database(path, args.size_mb, journal_mode)
+            for interval in args.write_interval:
+                for method in ('single', 'stepped'):
+                    result = run(path, os.path.join(workdir, 'backups'), method, interval, args.pages, args.step_sleep)
+                    result.update(journal_mode=journal_mode, write_interval=interval, method=method)
+                    results['runs'].append(result)
+                    print(f'{journal_mode:<7}写入间隔 {interval}s  {method:<8}备份 {result["backup_seconds"]}s'
+                          f'（{result["mode"]}，重新开始 {result["restarts"]} 次）  写入 {result["writes"]} 次  '
+                          f'p99 {result["write_p99_ms"]}ms  最大 {result["write_max_ms"]}ms')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
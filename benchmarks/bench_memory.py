@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻记录内存基准测试
+
+生成N条合成新闻（正文长度可设置），对比运行期间保存新闻的两种方式：
+- dicts   每条新闻一个dict（含正文），全部追加到列表中（改为NewsRecord之前的 news_data）
+- records NewsRecord 写入 NewsWindow，只保留最近若干条不含正文的记录
+
+每种方式在独立进程中运行，输出峰值常驻内存（RSS）、tracemalloc峰值和每条记录的内存占用。
+正文在生成后即被丢弃（模拟已写入数据库），因此结果只反映运行期间保留的数据。
+
+用法：
+    python -m benchmarks.bench_memory --articles 50000 --content-kb 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tracemalloc
+from datetime import datetime
+
+from crawler_records import NewsRecord, NewsWindow
+
+MODES = ['dicts', 'records']
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def make_article(index, content_chars):
+    """合成一条新闻的字段（每条的字符串都是新对象，与真实爬取一致）"""
+    return {
+        'title': f'第{index}条新闻标题：经济数据发布，市场反应平稳',
+        'url': f'http://news.example.com/2026/10/{index:08d}.html',
+        'content': ('正文内容' * (content_chars // 4 + 1))[:content_chars] + str(index),
+        'summary': f'第{index}条新闻的摘要，介绍了主要事件和相关背景。',
+        'pub_time': '2026-10-18 08:00',
+        'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'source': '示例新闻',
+        'word_count': content_chars
+    }
+
+
+def run_mode(mode, articles, content_chars, window, result_queue):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    if mode == 'dicts':
+        news_data = []
+        for i in range(articles):
+            news = make_article(i, content_chars)
+            news['sentiment_score'] = 0.5
+            news['keywords'] = '经济,数据,市场'
+            news_data.append(news)
+    else:
+        news_data = NewsWindow(window)
+        for i in range(articles):
+            record = NewsRecord(**make_article(i, content_chars))
+            record.sentiment_score = 0.5
+            record.keywords = '经济,数据,市场'
+            news_data.append(record)
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result_queue.put({
+        'mode': mode,
+        'kept': len(list(news_data)),
+        'total': len(news_data),
+        'retained_mb': round((current - baseline) / 1024 / 1024, 2),
+        'traced_peak_mb': round((peak - baseline) / 1024 / 1024, 2),
+        'bytes_per_article': round((current - baseline) / articles),
+        'peak_rss_mb': peak_rss_mb()
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻记录内存基准测试')
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--content-kb', type=float, default=4, help='每条正文的字符数（千）')
+    parser.add_argument('--window', type=int, default=100, help='NewsWindow保留的最近条数')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    content_chars = int(args.content_kb * 1024)
+    context = multiprocessing.get_context('spawn')
+    results = {'options': vars(args), 'modes': {}}
+    for mode in args.modes:
+        result_queue = context.Queue()
+        process = context.Process(target=run_mode, args=(mode, args.articles, content_chars, args.window, result_queue))
+        process.start()
+        result = result_queue.get()
+        process.join()
+        results['modes'][mode] = result
+        print(f'{mode:<8}保留 {result["kept"]:>6}/{result["total"]} 条  保留内存 {result["retained_mb"]:>8} MB  '
+              f'每条 {result["bytes_per_article"]:>6} 字节  峰值RSS {result["peak_rss_mb"]} MB')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线爬取基准测试
+
+启动本地模拟新闻网站（见 mock_news_site.py），让真实的爬虫代码对其爬取：
+- basic            BasicNewsCrawler.crawl
+- advanced         AdvancedNewsCrawler.run
+- manager_basic    CrawlerManager.run_basic_crawl（含写入汇总数据库）
+- manager_advanced CrawlerManager.run_advanced_crawl（含同步到汇总数据库）
+
+每个场景在独立进程和临时目录中运行，统计吞吐量（页/秒）、抓取延迟 p50/p99、
+每页解析耗时、数据写入速率和峰值内存，结果保存为JSON，便于多次运行之间对比。
+
+用法：
+    python -m benchmarks.bench_offline --articles 300 --latency-ms 20
+    python -m benchmarks.bench_offline --scenarios advanced --baseline benchmarks/results/上次结果.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.mock_news_site import MockNewsSite
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+SCENARIOS = ['basic', 'advanced', 'manager_basic', 'manager_advanced']
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+class Probe:
+    """
+    给爬虫方法加上计时包装
+
+    fetch: 每次HTTP请求；page: 抓取并解析一个页面（扣除其中的抓取时间即为解析耗时）；
+    write: 数据写入；phase: 阶段总耗时
+    """
+
+    def __init__(self):
+        self.fetch_ms = []
+        self.fetch_errors = 0
+        self.parse_ms = []
+        self.phases = defaultdict(float)
+        self.writes = defaultdict(lambda: {'records': 0, 'seconds': 0.0})
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def _patch(owner, name, make_wrapper):
+        func = getattr(owner, name)
+        setattr(owner, name, make_wrapper(func))
+
+    def time_fetch(self, owner, name):
+        def make_wrapper(func):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                failed = True
+                try:
+                    response = func(*args, **kwargs)
+                    failed = response.status_code >= 400
+                    return response
+                finally:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self._local.fetch_ms = getattr(self._local, 'fetch_ms', 0.0) + elapsed_ms
+                    with self._lock:
+                        self.fetch_ms.append(elapsed_ms)
+                        self.fetch_errors += failed
+            return wrapper
+        self._patch(owner, name, make_wrapper)
+
+    def time_page(self, owner, name):
+        def make_wrapper(func):
+            def wrapper(*args, **kwargs):
+                self._local.fetch_ms = 0.0
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    parse_ms = (time.perf_counter() - start) * 1000 - self._local.fetch_ms
+                    with self._lock:
+                        self.parse_ms.append(parse_ms)
+            return wrapper
+        self._patch(owner, name, make_wrapper)
+
+    def time_write(self, owner, name, count):
+        """count(args, result) 返回本次写入的记录数"""
+        label = f'{getattr(owner, "__name__", type(owner).__name__)}.{name}'
+
+        def make_wrapper(func):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.writes[label]['records'] += count(args, result) or 0
+                    self.writes[label]['seconds'] += elapsed
+                return result
+            return wrapper
+        self._patch(owner, name, make_wrapper)
+
+    def time_phase(self, owner, name):
+        label = f'{getattr(owner, "__name__", type(owner).__name__)}.{name}'
+
+        def make_wrapper(func):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self.phases[label] += time.perf_counter() - start
+            return wrapper
+        self._patch(owner, name, make_wrapper)
+
+    def report(self, seconds):
+        writes = {}
+        for label, write in self.writes.items():
+            writes[label] = {
+                'records': write['records'],
+                'seconds': round(write['seconds'], 3),
+                'records_per_second': round(write['records'] / write['seconds'], 1) if write['seconds'] else None
+            }
+        return {
+            'seconds': round(seconds, 3),
+            'pages': len(self.parse_ms),
+            'pages_per_second': round(len(self.parse_ms) / seconds, 2) if seconds else None,
+            'fetches': len(self.fetch_ms),
+            'fetch_errors': self.fetch_errors,
+            'fetch_p50_ms': round(percentile(self.fetch_ms, 50), 2),
+            'fetch_p99_ms': round(percentile(self.fetch_ms, 99), 2),
+            'parse_p50_ms': round(percentile(self.parse_ms, 50), 2),
+            'parse_mean_ms': round(sum(self.parse_ms) / len(self.parse_ms), 2) if self.parse_ms else 0.0,
+            'writes': writes,
+            'phases': {label: round(value, 3) for label, value in self.phases.items()}
+        }
+
+
+def instrument(probe, skip_reports):
+    """在场景进程内给爬虫类的方法加上计时"""
+    import requests
+    from news_crawler_basic import BasicNewsCrawler
+    from news_crawler_advanced import AdvancedNewsCrawler
+    from crawler_manager import CrawlerManager
+
+    # 所有HTTP请求最终都经过Session.request
+    probe.time_fetch(requests.Session, 'request')
+
+    probe.time_page(BasicNewsCrawler, 'get_news_list')
+    probe.time_page(AdvancedNewsCrawler, 'extract_news_links')
+    probe.time_page(AdvancedNewsCrawler, 'extract_news_content')
+
+    probe.time_write(BasicNewsCrawler, 'save_to_csv', lambda args, result: len(args[1]))
+    probe.time_write(AdvancedNewsCrawler, 'save_to_database', lambda args, result: 1)
+    probe.time_write(CrawlerManager, 'save_to_summary_db', lambda args, result: len(args[1]))
+    probe.time_write(CrawlerManager, 'sync_advanced_data', lambda args, result: result)
+
+    probe.time_phase(AdvancedNewsCrawler, 'crawl_site')
+    if skip_reports:
+        # 统计图表和多格式导出耗时较长，需要时可以排除
+        AdvancedNewsCrawler.generate_statistics = lambda self: None
+        AdvancedNewsCrawler.export_data = lambda self: None
+    else:
+        probe.time_phase(AdvancedNewsCrawler, 'generate_statistics')
+        probe.time_phase(AdvancedNewsCrawler, 'export_data')
+
+
+def site_config(site_url):
+    return {
+        'name': '模拟新闻网',
+        'base_url': site_url + '/',
+        'page_url': site_url + '/list/{page}.html',
+        'selectors': {'content': '.post_content_main'}
+    }
+
+
+def write_manager_config(site_url, options):
+    """生成指向模拟网站的管理器配置文件"""
+    with open(os.path.join(REPO_ROOT, 'crawler_config.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    target = site_config(site_url)
+    config['basic_crawler']['settings']['request_delay'] = [0, 0]
+    config['basic_crawler']['target_sites'] = [target]
+    config['advanced_crawler']['settings'].update({
+        'request_delay': [0, 0],
+        'max_workers': options['workers']
+    })
+    config['advanced_crawler']['proxy_settings']['enabled'] = False
+    config['advanced_crawler']['target_sites'] = [target]
+
+    with open('crawler_config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return 'crawler_config.json'
+
+
+def run_basic(site_url, options):
+    from news_crawler_basic import BasicNewsCrawler
+    crawler = BasicNewsCrawler(base_url=site_url + '/', request_delay=(0, 0),
+                               page_url=site_url + '/list/{page}.html')
+    news = crawler.crawl(['news'], max_pages=options['pages'])
+    return {'news': len(news)}
+
+
+def run_advanced(site_url, options):
+    from news_crawler_advanced import AdvancedNewsCrawler
+    crawler = AdvancedNewsCrawler({
+        'max_workers': options['workers'],
+        'request_delay': (0, 0),
+        'target_sites': [site_config(site_url)]
+    })
+    crawler.run(max_news_per_site=options['articles'])
+    return {'news': len(crawler.news_data)}
+
+
+def run_manager_basic(site_url, options):
+    from crawler_manager import CrawlerManager
+    manager = CrawlerManager(write_manager_config(site_url, options), execution_mode='inline')
+    manager.run_basic_crawl(['news'], max_pages=options['pages'])
+    return {'news': manager.get_crawl_status()['total_news'], 'errors': manager.get_crawl_status()['errors']}
+
+
+def run_manager_advanced(site_url, options):
+    from crawler_manager import CrawlerManager
+    manager = CrawlerManager(write_manager_config(site_url, options), execution_mode='inline')
+    manager.run_advanced_crawl(max_news_per_site=options['articles'])
+    return {'news': manager.get_crawl_status()['total_news'], 'errors': manager.get_crawl_status()['errors']}
+
+
+SCENARIO_FUNCS = {
+    'basic': run_basic,
+    'advanced': run_advanced,
+    'manager_basic': run_manager_basic,
+    'manager_advanced': run_manager_advanced
+}
+
+
+def run_scenario(name, site_url, options, result_queue):
+    """场景进程入口：在临时目录中运行，避免污染项目的 news_data"""
+    sys.path.insert(0, REPO_ROOT)
+    work_dir = tempfile.mkdtemp(prefix=f'bench_{name}_')
+    os.chdir(work_dir)
+    try:
+        # 爬虫逐条打印和记录日志，基准测试中只保留警告以上
+        with contextlib.redirect_stdout(io.StringIO()):
+            from crawler_logging import setup_logging
+            setup_logging({'monitoring': {'log_level': 'WARNING'}})
+            logging.getLogger('matplotlib').setLevel(logging.ERROR)
+
+            probe = Probe()
+            instrument(probe, options['skip_reports'])
+            warnings.simplefilter('ignore')
+
+            start = time.perf_counter()
+            summary = SCENARIO_FUNCS[name](site_url, options)
+            seconds = time.perf_counter() - start
+
+        result = probe.report(seconds)
+        result.update(summary)
+        result['peak_rss_mb'] = peak_rss_mb()
+        result_queue.put(result)
+    except Exception as e:
+        result_queue.put({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def wait_result(process, result_queue):
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                return {'error': f'场景进程异常退出，退出码 {process.exitcode}'}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_comparison(results, baseline_file):
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    print(f'\n与基线对比（{baseline_file}，提交 {baseline.get("git_commit")}）:')
+    for name, result in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or 'error' in result or 'error' in previous:
+            continue
+        for metric in ('pages_per_second', 'fetch_p99_ms', 'parse_mean_ms', 'peak_rss_mb'):
+            old, new = previous.get(metric), result.get(metric)
+            if old and new is not None:
+                print(f'  {name:<18}{metric:<18}{old:>10} -> {new:<10}({(new - old) / old:+.1%})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线爬取基准测试')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--articles', type=int, default=200, help='模拟网站文章数')
+    parser.add_argument('--page-size-kb', type=float, default=8, help='文章正文大小（KB）')
+    parser.add_argument('--latency-ms', type=float, default=10, help='模拟网站响应延迟')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='随机返回500的比例')
+    parser.add_argument('--site-concurrency', type=int, default=0,
+                        help='模拟网站的并发上限，超出返回429（0为不限）')
+    parser.add_argument('--pages', type=int, default=5, help='基础爬虫爬取的列表页数')
+    parser.add_argument('--workers', type=int, default=5, help='高级爬虫线程数')
+    parser.add_argument('--skip-reports', action='store_true', help='跳过高级爬虫的图表和导出')
+    parser.add_argument('--output', help='结果文件，默认保存到 benchmarks/results/')
+    parser.add_argument('--baseline', help='与之前的结果文件对比')
+    args = parser.parse_args()
+
+    options = {
+        'articles': args.articles,
+        'pages': args.pages,
+        'workers': args.workers,
+        'skip_reports': args.skip_reports
+    }
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'site': {
+            'articles': args.articles,
+            'page_size_kb': args.page_size_kb,
+            'latency_ms': args.latency_ms,
+            'error_rate': args.error_rate,
+            'max_concurrency': args.site_concurrency
+        },
+        'options': options,
+        'scenarios': {}
+    }
+
+    # spawn保证每个场景从干净的进程开始，峰值内存互不影响
+    context = multiprocessing.get_context('spawn')
+    with MockNewsSite(args.articles, args.page_size_kb, args.latency_ms, args.error_rate,
+                      max_concurrency=args.site_concurrency) as site:
+        for name in args.scenarios:
+            result_queue = context.Queue()
+            process = context.Process(target=run_scenario,
+                                      args=(name, site.base_url, options, result_queue))
+            process.start()
+            result = wait_result(process, result_queue)
+            process.join()
+            results['scenarios'][name] = result
+
+            if 'error' in result:
+                print(f'{name:<18}失败: {result["error"]}')
+            else:
+                print(f'{name:<18}{result["pages_per_second"]:>8} 页/秒  '
+                      f'抓取 p50 {result["fetch_p50_ms"]}ms p99 {result["fetch_p99_ms"]}ms  '
+                      f'解析 {result["parse_mean_ms"]}ms/页  峰值内存 {result["peak_rss_mb"]}MB')
+        results['site']['served'] = site.stats()
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'offline_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f'结果已保存到 {output}')
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+代理池基准测试
+
+启动模拟新闻网站和几个本地代理替身（正常、慢速、失效），用多个线程抓取文章页，对比：
+- random  每个请求随机选一个代理，不记录健康状态（代理池之前的做法）
+- pool    ProxyPool 按评分加权选择，失效代理被隔离，每个代理复用连接
+
+输出吞吐量、成功率和抓取延迟 p50/p99，以及代理池中各代理的最终状态。
+
+用法：
+    python -m benchmarks.bench_proxy_pool --requests 300 --threads 8 --timeout 2
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mock_news_site import MockNewsSite
+from benchmarks.mock_proxy import BlackholeProxy, MockProxy
+from crawler_proxies import ProxyPool
+
+STRATEGIES = ['random', 'pool']
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def fetch_random(proxy_urls, timeout):
+    def fetch(url):
+        proxy = random.choice(proxy_urls)
+        try:
+            response = requests.get(url, proxies={'http': proxy, 'https': proxy}, timeout=timeout)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+    return fetch, None
+
+
+def fetch_pool(proxy_urls, timeout, attempts=3):
+    pool = ProxyPool(proxy_urls, failure_threshold=2, quarantine_seconds=30)
+
+    def fetch(url):
+        # 与爬虫相同：代理故障时换一个代理重试
+        for _ in range(attempts):
+            proxy = pool.acquire()
+            start = time.perf_counter()
+            try:
+                response = proxy.session.get(url, timeout=timeout)
+            except requests.RequestException:
+                pool.report(proxy, False)
+                continue
+            pool.report(proxy, True, time.perf_counter() - start)
+            return response.status_code == 200
+        return False
+    return fetch, pool
+
+
+def run_strategy(name, urls, proxy_urls, threads, timeout):
+    make_fetch = fetch_random if name == 'random' else fetch_pool
+    fetch, pool = make_fetch(proxy_urls, timeout)
+    latencies = []
+    lock = threading.Lock()
+
+    def task(url):
+        start = time.perf_counter()
+        ok = fetch(url)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(task, urls))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(len(urls) / elapsed, 2),
+        'success_rate': round(sum(results) / len(results), 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1)
+    }
+    if pool is not None:
+        result['proxies'] = pool.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='代理池基准测试')
+    parser.add_argument('--requests', type=int, default=300, help='抓取的页面数')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=2, help='请求超时（失效代理每次耗费的时间）')
+    parser.add_argument('--latency-ms', type=float, default=10, help='模拟网站响应延迟')
+    parser.add_argument('--good', type=int, default=2, help='正常代理数量')
+    parser.add_argument('--slow-ms', type=float, default=200, help='慢速代理的额外延迟（0为不启动）')
+    parser.add_argument('--dead', type=int, default=1, help='失效代理数量')
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    # 直连本地代理，不受环境变量中代理设置的影响
+    for name in ('HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy', 'ALL_PROXY', 'all_proxy'):
+        os.environ.pop(name, None)
+
+    site = MockNewsSite(articles=200, latency_ms=args.latency_ms)
+    proxies = [MockProxy() for _ in range(args.good)]
+    if args.slow_ms:
+        proxies.append(MockProxy(latency_ms=args.slow_ms))
+    proxies += [BlackholeProxy() for _ in range(args.dead)]
+
+    site_url = site.start()
+    proxy_urls = [proxy.start() for proxy in proxies]
+    results = {'options': vars(args), 'strategies': {}}
+    try:
+        urls = [f'{site_url}/news/article/{i % site.articles}.html' for i in range(args.requests)]
+        for name in args.strategies:
+            result = run_strategy(name, urls, proxy_urls, args.threads, args.timeout)
+            results['strategies'][name] = result
+            print(f'{name:<8}{result["requests_per_second"]:>8} 请求/秒  成功率 {result["success_rate"]:.1%}  '
+                  f'p50 {result["p50_ms"]}ms  p99 {result["p99_ms"]}ms')
+            for proxy in result.get('proxies', []):
+                print(f'    {proxy["proxy"]:<26}请求 {proxy["requests"]:>4}  成功率 {proxy["success_rate"]:.2f}  '
+                      f'延迟 {proxy["latency_ms"]}ms  隔离剩余 {proxy["quarantined_seconds"]}s')
+    finally:
+        for proxy in proxies:
+            proxy.stop()
+        site.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
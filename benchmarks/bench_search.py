@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文检索基准测试
+
+生成合成中文新闻写入临时的 news_summary 表，建立FTS5索引，
+统计索引速度和关键词查询的 p50/p99 延迟。
+
+用法：
+    python -m benchmarks.bench_search --articles 100000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from crawler_search import NewsSearchIndex
+
+VOCABULARY = [
+    '经济', '增长', '市场', '科技', '人工智能', '芯片', '新能源', '汽车', '体育', '足球',
+    '篮球', '教育', '医疗', '疫苗', '房地产', '政策', '国际', '外交', '气候', '环境',
+    '股票', '基金', '银行', '消费', '出口', '制造业', '互联网', '电商', '旅游', '文化',
+    '电影', '音乐', '航天', '卫星', '铁路', '城市', '农业', '粮食', '能源', '电力'
+]
+FILLER = ['今天', '记者', '表示', '发布', '数据', '显示', '相关', '部门', '进一步', '推动']
+
+
+def fake_text(rng, words):
+    return '，'.join(''.join(rng.choice(VOCABULARY + FILLER) for _ in range(4))
+                    for _ in range(words // 4)) + '。'
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全文检索基准测试')
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=200, help='每篇正文词数')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    work_dir = tempfile.mkdtemp(prefix='bench_search_')
+    try:
+        db_path = os.path.join(work_dir, 'search.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE news_summary (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT UNIQUE,
+                content TEXT, summary TEXT, pub_time TEXT, crawl_time TEXT, source TEXT,
+                category TEXT, keywords TEXT, sentiment_score REAL, word_count INTEGER,
+                crawler_type TEXT
+            )
+        ''')
+        index = NewsSearchIndex(db_path)
+        index.init_index(conn)
+
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        for i in range(args.articles):
+            title = fake_text(rng, 8)
+            content = fake_text(rng, args.words)
+            cursor.execute(
+                'INSERT INTO news_summary (title, url, content, summary, keywords, crawler_type) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (title, f'http://bench.local/{i}', content, content[:200], '', 'bench')
+            )
+            index.index_row(cursor, cursor.lastrowid, title, content[:200], content, '')
+            if i % 1000 == 999:
+                conn.commit()
+        conn.commit()
+        index_seconds = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.queries):
+            query = ''.join(rng.sample(VOCABULARY, rng.choice([1, 2])))
+            start = time.perf_counter()
+            index.search(conn, query, limit=20)
+            latencies.append((time.perf_counter() - start) * 1000)
+        conn.close()
+
+        result = {
+            'articles': args.articles,
+            'index_articles_per_second': round(args.articles / index_seconds, 1),
+            'query_p50_ms': round(percentile(latencies, 50), 2),
+            'query_p99_ms': round(percentile(latencies, 99), 2),
+            'db_size_mb': round(os.path.getsize(db_path) / 1024 / 1024, 1)
+        }
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试和导入预算检查
+
+每个入口在全新的Python进程和临时目录中导入，统计：
+- 进程总耗时（含解释器启动）和模块导入耗时，取多次运行的中位数
+- 导入后的峰值内存
+- 是否提前加载了重型依赖（pandas/matplotlib/jieba等应在用到时才导入）
+- 入口模块直接导入的模块中耗时最长的几个（python -X importtime）
+
+--check 模式下任一入口超出预算或提前加载了重型依赖时以退出码1结束，可放在CI中执行。
+
+用法：
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --check --runs 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+# 入口模块及导入耗时预算（秒）
+ENTRY_POINTS = {
+    'crawler_manager': 1.0,
+    'news_crawler_basic': 0.5,
+    'news_crawler_advanced': 0.5,
+    'demo': 0.5,
+    'wsgi': 1.5
+}
+
+# 启动时不应加载的重型依赖
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'matplotlib', 'seaborn', 'wordcloud', 'jieba']
+
+CHILD_CODE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+except ImportError:
+    peak = None
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print('@@' + json.dumps({{'import_seconds': elapsed, 'peak_rss_mb': peak, 'heavy_modules': heavy}}))
+'''
+
+
+def make_work_dir():
+    # wsgi 导入时会创建应用和数据库，放在临时目录中避免影响仓库
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    shutil.copy(os.path.join(REPO_ROOT, 'crawler_config.json'), work_dir)
+    return work_dir
+
+
+def child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def run_child(module, work_dir, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', CHILD_CODE.format(module=module, heavy=HEAVY_MODULES)]
+
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=work_dir, env=child_env(), capture_output=True, text=True)
+    wall = time.perf_counter() - start
+
+    marker = [line for line in completed.stdout.splitlines() if line.startswith('@@')]
+    if completed.returncode != 0 or not marker:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip()
+                           else f'退出码 {completed.returncode}')
+    result = json.loads(marker[-1][2:])
+    result['wall_seconds'] = wall
+    result['stderr'] = completed.stderr
+    return result
+
+
+def slowest_imports(importtime_output, module, limit=8):
+    """解析 -X importtime 输出，返回入口模块直接导入的模块中累计耗时最长的几个"""
+    entries = []
+    children = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # 每层嵌套缩进两个空格，子模块先于父模块输出
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        item = {'module': name.strip(), 'ms': round(int(cumulative) / 1000, 1)}
+        if depth == 1:
+            children.append(item)
+        elif depth == 0:
+            if item['module'] == module:
+                entries = children
+            children = []
+    return sorted(entries, key=lambda entry: entry['ms'], reverse=True)[:limit]
+
+
+def measure(module, runs):
+    work_dir = make_work_dir()
+    try:
+        samples = [run_child(module, work_dir) for _ in range(runs)]
+        detail = run_child(module, work_dir, importtime=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    peaks = [sample['peak_rss_mb'] for sample in samples if sample['peak_rss_mb'] is not None]
+    return {
+        'import_seconds': round(statistics.median(s['import_seconds'] for s in samples), 3),
+        'wall_seconds': round(statistics.median(s['wall_seconds'] for s in samples), 3),
+        'peak_rss_mb': round(max(peaks), 1) if peaks else None,
+        'heavy_modules': samples[-1]['heavy_modules'],
+        'slowest_imports': slowest_imports(detail['stderr'], module)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--entries', nargs='+', choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument('--runs', type=int, default=3, help='每个入口运行次数（取中位数）')
+    parser.add_argument('--check', action='store_true', help='超出预算或提前加载重型依赖时返回非零退出码')
+    parser.add_argument('--output', help='结果文件，默认保存到 benchmarks/results/')
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'entries': {}
+    }
+    failures = []
+
+    for module in args.entries:
+        budget = ENTRY_POINTS[module]
+        try:
+            result = measure(module, args.runs)
+        except Exception as e:
+            results['entries'][module] = {'error': str(e)}
+            failures.append(f'{module}: 导入失败 {e}')
+            print(f'{module:<24}失败: {e}')
+            continue
+
+        result['budget_seconds'] = budget
+        results['entries'][module] = result
+        print(f'{module:<24}导入 {result["import_seconds"]:.3f}s（预算 {budget}s）  '
+              f'进程 {result["wall_seconds"]:.3f}s  峰值内存 {result["peak_rss_mb"]}MB')
+        for entry in result['slowest_imports']:
+            print(f'    {entry["module"]:<30}{entry["ms"]:>8}ms')
+
+        if result['import_seconds'] > budget:
+            failures.append(f'{module}: 导入耗时 {result["import_seconds"]}s 超出预算 {budget}s')
+        if result['heavy_modules']:
+            failures.append(f'{module}: 启动时加载了 {", ".join(result["heavy_modules"])}')
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'startup_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f'结果已保存到 {output}')
+
+    if failures:
+        print('\n预算检查未通过:')
+        for failure in failures:
+            print(f'  {failure}')
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
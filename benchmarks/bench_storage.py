@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文压缩存储基准测试
+
+生成一个包含N条合成新闻的 news_summary 数据库（正文按齐夫分布从数千个中文词中取词，
+每个来源带固定的页面模板文字），复制后分别用以下方式迁移（crawler_storage.migrate）：
+- plain      不压缩（原来的存储方式）
+- zlib       zlib 压缩
+- zstd       zstd 压缩（需安装zstandard）
+- zstd_dict  zstd + 按来源训练的字典
+
+对每种方式输出：
+- 数据库文件大小和迁移耗时
+- 统计查询（与 /api/statistics 相同的SQL）和列表查询（/api/news 的一页，含解压正文）的耗时
+- 全量读取正文（导出）的耗时
+
+用法：
+    python -m benchmarks.bench_storage --articles 20000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from crawler_storage import ContentStore, fill_content, load_zstd, migrate
+
+MODES = ['plain', 'zlib', 'zstd', 'zstd_dict']
+
+STATISTICS_QUERIES = [
+    'SELECT COUNT(*) FROM news_summary',
+    'SELECT crawler_type, COUNT(*) FROM news_summary GROUP BY crawler_type',
+    'SELECT source, COUNT(*) FROM news_summary GROUP BY source',
+    'SELECT AVG(sentiment_score) FROM news_summary WHERE sentiment_score IS NOT NULL',
+    'SELECT AVG(word_count) FROM news_summary WHERE word_count > 0'
+]
+
+
+def make_vocabulary(rng, size=5000):
+    return [''.join(chr(rng.randint(0x4E00, 0x62FF)) for _ in range(rng.choice((1, 2, 2, 3))))
+            for _ in range(size)]
+
+
+def make_content(rng, vocabulary, weights, boilerplate, chars):
+    words = []
+    length = 0
+    while length < chars:
+        sentence = ''.join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(8, 20))) + '。'
+        words.append(sentence)
+        length += len(sentence)
+    return boilerplate[0] + ''.join(words) + boilerplate[1]
+
+
+def build_database(path, articles, content_chars, sources, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    templates = {}
+    for index in range(sources):
+        source = f'来源{index}'
+        templates[source] = (
+            f'{source}讯 记者 {"".join(rng.choices(vocabulary, k=6))} 报道：',
+            f'（责任编辑：{"".join(rng.choices(vocabulary, k=2))}）本文为{source}原创，'
+            f'未经授权不得转载。关注{source}客户端，获取更多新闻资讯。'
+        )
+
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE news_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            url TEXT UNIQUE NOT NULL,
+            content TEXT,
+            summary TEXT,
+            pub_time TEXT,
+            crawl_time TEXT,
+            source TEXT,
+            category TEXT,
+            keywords TEXT,
+            sentiment_score REAL,
+            word_count INTEGER,
+            crawler_type TEXT
+        )
+    ''')
+    rows = []
+    for i in range(articles):
+        source = f'来源{i % sources}'
+        chars = int(content_chars * rng.uniform(0.3, 1.7))
+        content = make_content(rng, vocabulary, weights, templates[source], chars)
+        rows.append((
+            ''.join(rng.choices(vocabulary, cum_weights=weights, k=8)), f'http://news{i % sources}.example.com/{i}.html',
+            content, content[:200], '2026-10-18 08:00', f'2026-10-18 {i % 24:02d}:{i % 60:02d}:00', source,
+            'news', ','.join(rng.choices(vocabulary, k=5)), rng.uniform(-1, 1), len(content),
+            rng.choice(['basic', 'advanced', 'distributed'])
+        ))
+        if len(rows) == 1000:
+            conn.executemany(f'INSERT INTO news_summary VALUES (NULL, {", ".join("?" * 12)})', rows)
+            rows = []
+    if rows:
+        conn.executemany(f'INSERT INTO news_summary VALUES (NULL, {", ".join("?" * 12)})', rows)
+    conn.commit()
+    conn.close()
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2)
+
+
+def measure(path, repeat):
+    def statistics():
+        conn = sqlite3.connect(path)
+        for sql in STATISTICS_QUERIES:
+            conn.execute(sql).fetchall()
+        conn.close()
+
+    def news_page():
+        conn = sqlite3.connect(path)
+        cursor = conn.execute('SELECT * FROM news_summary ORDER BY crawl_time DESC LIMIT 20 OFFSET 100')
+        columns = [column[0] for column in cursor.description]
+        fill_content(conn, [dict(zip(columns, row)) for row in cursor.fetchall()])
+        conn.close()
+
+    def export_all():
+        conn = sqlite3.connect(path)
+        cursor = conn.execute('SELECT * FROM news_summary')
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            fill_content(conn, [dict(zip(columns, row)) for row in rows])
+        conn.close()
+
+    return {
+        'statistics_ms': timed(statistics, repeat),
+        'news_page_ms': timed(news_page, repeat),
+        'export_ms': timed(export_all, max(1, repeat // 3))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='正文压缩存储基准测试')
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--content-chars', type=int, default=1500, help='正文平均字数')
+    parser.add_argument('--sources', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数（取最快一次）')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    modes = [mode for mode in args.modes if not mode.startswith('zstd') or load_zstd()]
+    if len(modes) < len(args.modes):
+        print('未安装zstandard，跳过zstd')
+
+    workdir = tempfile.mkdtemp(prefix='bench_storage_')
+    results = {'options': vars(args), 'modes': {}}
+    try:
+        source_path = os.path.join(workdir, 'source.db')
+        build_database(source_path, args.articles, args.content_chars, args.sources, args.seed)
+
+        for mode in modes:
+            path = os.path.join(workdir, f'{mode}.db')
+            shutil.copyfile(source_path, path)
+            migrate_ms = 0.0
+            if mode != 'plain':
+                store = ContentStore('zlib' if mode == 'zlib' else 'zstd', level=6 if mode == 'zlib' else 3,
+                                     dictionary=mode == 'zstd_dict')
+                start = time.perf_counter()
+                migrate(path, 'news_summary', store)
+                migrate_ms = round((time.perf_counter() - start) * 1000, 1)
+            else:
+                conn = sqlite3.connect(path)
+                conn.execute('VACUUM')
+                conn.close()
+
+            result = {'file_mb': round(os.path.getsize(path) / 1024 / 1024, 2), 'migrate_ms': migrate_ms}
+            result.update(measure(path, args.repeat))
+            results['modes'][mode] = result
+            print(f'{mode:<10}文件 {result["file_mb"]:>7}MB  迁移 {migrate_ms:>8}ms  统计查询 {result["statistics_ms"]:>7}ms  '
+                  f'列表一页 {result["news_page_ms"]:>6}ms  全量读取 {result["export_ms"]:>8}ms')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
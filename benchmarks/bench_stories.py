@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻事件聚类基准测试
+
+生成若干合成事件（每个事件由地点、两个主题词和一个动作词组成），多个来源用不同的标题
+模板和正文措辞报道同一事件，另有一部分互不相关的单篇新闻；按爬取时间顺序逐篇输入
+StoryClusterer，对比：
+- index   倒排索引取候选事件（StoryClusterer默认）
+- brute   与全部活跃事件逐一比较（精确最近邻）
+
+对每个相似度阈值输出：
+- 成对准确率/召回率/F1（同一真实事件的文章是否被分到同一事件）
+- 每篇耗时（其中最近邻查找耗时）、平均候选事件数
+- index 与 brute 选择的事件一致的比例
+
+用法：
+    python -m benchmarks.bench_stories --events 300 --thresholds 0.2 0.3 0.4
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from benchmarks.bench_keywords import TOPICS
+from crawler_stories import StoryClusterer
+
+CITIES = ['北京', '上海', '广州', '深圳', '杭州', '成都', '武汉', '西安', '南京', '重庆', '天津', '苏州',
+          '长沙', '郑州', '青岛', '厦门', '昆明', '哈尔滨', '沈阳', '大连', '合肥', '福州', '济南', '南宁']
+ACTIONS = ['发布', '启动', '召开', '宣布', '暂停', '调查', '签署', '举办', '推出', '公布', '实施', '取消']
+SOURCES = ['网易新闻', '新浪新闻', '腾讯新闻', '搜狐新闻', '凤凰网']
+TITLE_TEMPLATES = [
+    '{city}{action}{a}{b}',
+    '{a}{b}：{city}正式{action}',
+    '关注|{city}{a}{action}，{b}受关注',
+    '{city}{b}{action}，涉及{a}',
+    '最新消息：{a}与{b}在{city}{action}'
+]
+
+
+def common_words(size=3000):
+    """jieba词典中词频最高的常用词（名词、动词、形容词），按词频加权，作为正文的一般用语"""
+    import jieba
+
+    rows = []
+    with jieba.dt.get_dict_file() as f:
+        for line in f:
+            word, frequency, tag = line.decode('utf-8').split()[:3]
+            if len(word) >= 2 and tag in ('n', 'v', 'a', 'vn', 'd', 'ad', 'an'):
+                rows.append((int(frequency), word))
+    rows.sort(reverse=True)
+    return [word for _, word in rows[:size]], [frequency for frequency, _ in rows[:size]]
+
+
+def make_articles(rng, events, noise, span_hours):
+    topic_words = [word for words in TOPICS.values() for word in words]
+    words, weights = common_words()
+
+    def filler(count):
+        return ''.join(rng.choices(words, weights=weights, k=count))
+
+    articles = []
+    start = time.time() - span_hours * 3600
+    for event in range(events):
+        city, action = rng.choice(CITIES), rng.choice(ACTIONS)
+        a, b = rng.sample(topic_words, 2)
+        event_time = start + rng.uniform(0, span_hours * 3600)
+        for source in SOURCES:
+            if rng.random() > 0.6:
+                continue
+            title = rng.choice(TITLE_TEMPLATES).format(city=city, action=action, a=a, b=b)
+            summary = f'{city}{a}{filler(rng.randint(5, 10))}{b}{action}{filler(rng.randint(10, 20))}。'
+            articles.append({
+                'title': title, 'summary': summary, 'content': summary + filler(60),
+                'source': source, 'event': event,
+                'timestamp': event_time + rng.uniform(0, 6 * 3600)
+            })
+    for index in range(noise):
+        title = rng.choice(CITIES) + ''.join(rng.sample(topic_words, 3)) + rng.choice(ACTIONS)
+        text = title + filler(30)
+        articles.append({
+            'title': title, 'summary': text, 'content': text + filler(60),
+            'source': rng.choice(SOURCES), 'event': f'noise{index}',
+            'timestamp': start + rng.uniform(0, span_hours * 3600)
+        })
+    articles.sort(key=lambda item: item['timestamp'])
+    for article in articles:
+        article['crawl_time'] = datetime.fromtimestamp(article['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+    return articles
+
+
+def pairwise_scores(truth, predicted):
+    """成对准确率、召回率、F1"""
+    def pairs(labels):
+        return sum(count * (count - 1) // 2 for count in Counter(labels).values())
+
+    true_pairs = pairs(truth)
+    predicted_pairs = pairs(predicted)
+    both = pairs(list(zip(truth, predicted)))
+    precision = both / predicted_pairs if predicted_pairs else 1.0
+    recall = both / true_pairs if true_pairs else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return round(precision, 3), round(recall, 3), round(f1, 3)
+
+
+def brute_nearest(clusterer, vector):
+    best, best_similarity = None, 0.0
+    for story in clusterer.stories.values():
+        centroid = story.centroid
+        similarity = sum(weight * centroid.get(term, 0.0) for term, weight in vector.items()) / story.norm
+        if similarity > best_similarity:
+            best, best_similarity = story, similarity
+    return best, best_similarity
+
+
+def run(articles, threshold, method):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE news_summary (id INTEGER PRIMARY KEY, title TEXT, cluster_id INTEGER)')
+    clusterer = StoryClusterer(threshold=threshold)
+    clusterer.init_tables(conn)
+
+    stats = {'nearest_seconds': 0.0, 'candidates': 0, 'choices': []}
+    index_nearest = clusterer.nearest
+
+    def timed_nearest(vector):
+        start = time.perf_counter()
+        if method == 'brute':
+            result = brute_nearest(clusterer, vector)
+            stats['candidates'] += len(clusterer.stories)
+        else:
+            result = index_nearest(vector)
+            stats['candidates'] += len({story_id for term in sorted(vector, key=vector.get, reverse=True)
+                                        [:clusterer.index_terms] for story_id in clusterer.postings.get(term, ())})
+        stats['nearest_seconds'] += time.perf_counter() - start
+        stats['choices'].append(result[0].id if result[0] and result[1] >= threshold else None)
+        return result
+
+    clusterer.nearest = timed_nearest
+    predicted = []
+    start = time.perf_counter()
+    for row_id, article in enumerate(articles, 1):
+        conn.execute('INSERT INTO news_summary (id, title) VALUES (?, ?)', (row_id, article['title']))
+        predicted.append(clusterer.assign(conn, row_id, article))
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    precision, recall, f1 = pairwise_scores([article['event'] for article in articles], predicted)
+    return {
+        'precision': precision, 'recall': recall, 'f1': f1,
+        'stories': clusterer.created,
+        'ms_per_article': round(elapsed / len(articles) * 1000, 3),
+        'nearest_ms_per_article': round(stats['nearest_seconds'] / len(articles) * 1000, 4),
+        'avg_candidates': round(stats['candidates'] / len(articles), 1)
+    }, stats['choices']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻事件聚类基准测试')
+    parser.add_argument('--events', type=int, default=300)
+    parser.add_argument('--noise', type=int, default=300, help='不属于任何事件的单篇新闻数')
+    parser.add_argument('--span-hours', type=int, default=48)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.2, 0.3, 0.4])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    articles = make_articles(rng, args.events, args.noise, args.span_hours)
+    events = defaultdict(set)
+    for article in articles:
+        events[article['event']].add(article['source'])
+    print(f'{len(articles)} 篇新闻，{args.events} 个事件（平均 '
+          f'{sum(len(sources) for key, sources in events.items() if not str(key).startswith("noise")) / args.events:.1f} '
+          f'个来源），{args.noise} 篇单篇新闻')
+
+    # 预先加载jieba词典和IDF表，不计入耗时
+    run(articles[:20], 0.3, 'index')
+
+    results = {'options': vars(args), 'articles': len(articles), 'thresholds': {}}
+    for threshold in args.thresholds:
+        results['thresholds'][threshold] = {}
+        choices = {}
+        for method in ('index', 'brute'):
+            result, choices[method] = run(articles, threshold, method)
+            results['thresholds'][threshold][method] = result
+            print(f'阈值 {threshold}  {method:<6}准确率 {result["precision"]:.3f}  召回率 {result["recall"]:.3f}  '
+                  f'F1 {result["f1"]:.3f}  事件 {result["stories"]:>5}  每篇 {result["ms_per_article"]}ms  '
+                  f'（查找 {result["nearest_ms_per_article"]}ms，候选 {result["avg_candidates"]}）')
+        agreement = sum(a == b for a, b in zip(choices['index'], choices['brute'])) / len(articles)
+        results['thresholds'][threshold]['agreement'] = round(agreement, 4)
+        print(f'阈值 {threshold}  index与brute选择一致 {agreement:.1%}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点关键词基准测试
+
+按不同的历史数据量（默认1万/5万/20万篇，均匀分布在过去若干天内）生成新闻关键词，
+最近半小时加入一个突发词，对比：
+- full_scan  读取全部历史关键词并计数（generate_charts 词云之前的做法）
+- trending   TrendingTracker：启动加载近期新闻后，查询 /api/trending 同样的结果
+
+对每个数据量输出：
+- full_scan 的耗时
+- trending 每篇文章的累计耗时、启动加载耗时、各窗口查询耗时
+- 突发词在各窗口结果中的排名（1为最热）
+
+用法：
+    python -m benchmarks.bench_trending --history 10000 50000 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from crawler_trending import TrendingTracker
+
+BURST_TERM = '突发事件'
+
+
+def build_database(path, articles, days, vocabulary_size, now, seed):
+    rng = random.Random(seed)
+    vocabulary = [f'词{i}' for i in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    step = days * 86400 / articles
+
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE news_summary (id INTEGER PRIMARY KEY, keywords TEXT, crawl_time TEXT)')
+    conn.execute('CREATE INDEX idx_news_summary_crawl_time ON news_summary (crawl_time)')
+    rows = []
+    timestamp = now - days * 86400
+    for _ in range(articles):
+        terms = rng.choices(vocabulary, weights=weights, k=10)
+        if timestamp > now - 1800 and rng.random() < 0.3:
+            terms.append(BURST_TERM)
+        rows.append((', '.join(terms), datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')))
+        timestamp += step
+        if len(rows) == 5000:
+            conn.executemany('INSERT INTO news_summary (keywords, crawl_time) VALUES (?, ?)', rows)
+            rows = []
+    if rows:
+        conn.executemany('INSERT INTO news_summary (keywords, crawl_time) VALUES (?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def full_scan(path):
+    conn = sqlite3.connect(path)
+    counts = Counter()
+    for (keywords,) in conn.execute('SELECT keywords FROM news_summary WHERE keywords IS NOT NULL'):
+        counts.update(term.strip() for term in keywords.split(','))
+    conn.close()
+    return counts
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点关键词基准测试')
+    parser.add_argument('--history', type=int, nargs='+', default=[10000, 50000, 200000], help='历史新闻数')
+    parser.add_argument('--days', type=int, default=30, help='历史覆盖天数')
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    # 固定在整点之后10分钟，滑动窗口跨两个桶
+    now = (time.time() // 3600) * 3600 + 600
+    results = {'options': vars(args), 'history': {}}
+    with tempfile.TemporaryDirectory(prefix='bench_trending_') as workdir:
+        for articles in args.history:
+            path = os.path.join(workdir, f'{articles}.db')
+            build_database(path, articles, args.days, args.vocabulary, now, args.seed)
+
+            result = {'full_scan_ms': best_of(lambda: full_scan(path), max(1, args.repeat // 2))}
+
+            tracker = TrendingTracker()
+            conn = sqlite3.connect(path)
+            start = time.perf_counter()
+            loaded = tracker.warm(conn, now=now)
+            result['warm_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            result['add_us_per_article'] = round((time.perf_counter() - start) / max(loaded, 1) * 1e6, 1)
+            result['warm_articles'] = loaded
+            conn.close()
+
+            result['windows'] = {}
+            for window in tracker.windows:
+                terms = [item['term'] for item in tracker.trending(window, 100, now)['terms']]
+                result['windows'][window] = {
+                    'query_ms': best_of(lambda: tracker.trending(window, 20, now), args.repeat),
+                    'burst_rank': terms.index(BURST_TERM) + 1 if BURST_TERM in terms else None
+                }
+
+            results['history'][articles] = result
+            windows = '  '.join(f'{name} 查询{item["query_ms"]}ms 排名{item["burst_rank"]}'
+                                for name, item in result['windows'].items())
+            print(f'历史 {articles:>7} 篇  全量计数 {result["full_scan_ms"]:>8}ms  '
+                  f'加载 {loaded} 篇 {result["warm_ms"]}ms（每篇 {result["add_us_per_article"]}us）  {windows}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web接口并发压测
+
+模拟多个仪表盘（带ETag复验）和API客户端同时访问读接口，
+可选保持若干SSE长连接，输出各接口的吞吐量和 p50/p95/p99 延迟。
+
+用法：
+    python crawler_manager.py serve --workers 4          # 另一个终端
+    python -m benchmarks.load_test_api --url http://127.0.0.1:5000 --clients 50 --duration 30
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+ENDPOINTS = [
+    ('/api/status', 0.4),
+    ('/api/statistics', 0.3),
+    ('/api/news?limit=20&offset=0', 0.2),
+    ('/api/news?limit=20&offset=20', 0.1),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class LoadClient(threading.Thread):
+    """一个并发客户端：按权重随机请求读接口"""
+
+    def __init__(self, base_url, deadline, use_etag, think_time, results, lock):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.deadline = deadline
+        self.use_etag = use_etag
+        self.think_time = think_time
+        self.results = results
+        self.lock = lock
+        self.session = requests.Session()
+        self.etags = {}
+
+    def run(self):
+        paths = [path for path, _ in ENDPOINTS]
+        weights = [weight for _, weight in ENDPOINTS]
+
+        while time.time() < self.deadline:
+            path = random.choices(paths, weights)[0]
+            headers = {}
+            if self.use_etag and path in self.etags:
+                headers['If-None-Match'] = self.etags[path]
+
+            start = time.perf_counter()
+            try:
+                response = self.session.get(self.base_url + path, headers=headers, timeout=30)
+                status = response.status_code
+                if 'ETag' in response.headers:
+                    self.etags[path] = response.headers['ETag']
+            except requests.RequestException:
+                status = 'error'
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            endpoint = path.split('?')[0]
+            with self.lock:
+                self.results[endpoint].append((elapsed_ms, status))
+
+            if self.think_time:
+                time.sleep(random.uniform(0, self.think_time))
+
+
+def hold_event_streams(base_url, count, deadline):
+    """保持若干SSE长连接，模拟打开的仪表盘页面"""
+    def hold():
+        try:
+            with requests.get(base_url + '/api/events', stream=True,
+                              timeout=(5, max(1, deadline - time.time()))) as response:
+                for _ in response.iter_lines():
+                    if time.time() >= deadline:
+                        break
+        except requests.RequestException:
+            pass
+
+    threads = [threading.Thread(target=hold, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web接口并发压测')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--clients', type=int, default=50, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长（秒）')
+    parser.add_argument('--sse-clients', type=int, default=10, help='同时保持的SSE连接数')
+    parser.add_argument('--etag-ratio', type=float, default=0.5, help='使用ETag复验的客户端比例')
+    parser.add_argument('--think-time', type=float, default=0.0, help='请求间最大随机间隔（秒）')
+    parser.add_argument('--output', help='结果保存为JSON文件')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    deadline = time.time() + args.duration
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    hold_event_streams(base_url, args.sse_clients, deadline)
+
+    clients = [
+        LoadClient(base_url, deadline, i < args.clients * args.etag_ratio,
+                   args.think_time, results, lock)
+        for i in range(args.clients)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    report = {}
+    print(f'{"接口":<20}{"请求数":>8}{"QPS":>10}{"p50(ms)":>10}{"p95(ms)":>10}'
+          f'{"p99(ms)":>10}{"304":>8}{"错误":>6}')
+    for endpoint, samples in sorted(results.items()):
+        latencies = [elapsed for elapsed, _ in samples]
+        statuses = [status for _, status in samples]
+        report[endpoint] = {
+            'requests': len(samples),
+            'qps': round(len(samples) / args.duration, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'not_modified': statuses.count(304),
+            'errors': sum(1 for status in statuses if status == 'error' or status >= 500)
+        }
+        row = report[endpoint]
+        print(f'{endpoint:<20}{row["requests"]:>8}{row["qps"]:>10}{row["p50_ms"]:>10}'
+              f'{row["p95_ms"]:>10}{row["p99_ms"]:>10}{row["not_modified"]:>8}{row["errors"]:>6}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟新闻网站
+
+在本机启动一个HTTP服务，生成结构固定的合成新闻门户，用于离线基准测试：
+- /                       首页，列出全部文章链接
+- /list/<页码>.html        分页列表，每页 list_size 条
+- /news/article/<ID>.html  文章详情页（标题、发布时间、正文和页面噪声）
+
+开启 feeds 后还提供（首页<head>声明RSS地址）：
+- /robots.txt              带Sitemap行
+- /rss.xml                 最新 feed_size 篇文章
+- /sitemap.xml             站点地图索引，子站点地图 /sitemap/<序号>.xml 每个 sitemap_size 篇，带lastmod
+设置 images_per_article 后，文章正文中带图片（需要Pillow生成JPEG）：
+- /images/<序号>.jpg       图片池中的图片，多篇文章引用同一张
+- /cdn/<序号>.jpg          与 /images/ 下同序号的图片内容相同、地址不同
+初始文章按ID每10分钟发布一篇（最新一篇为启动时间），publish() 发布新文章，模拟网站更新。
+
+可配置文章数量、正文大小、响应延迟和错误率（随机返回500）；设置并发上限后，
+超出上限的请求返回429并带Retry-After，用于模拟限流的网站。
+
+单独运行：
+    python -m benchmarks.mock_news_site --port 8000 --articles 500 --latency-ms 20
+"""
+
+import argparse
+import io
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+WORDS = [
+    '经济', '增长', '市场', '科技', '人工智能', '芯片', '新能源', '汽车', '体育', '足球',
+    '教育', '医疗', '政策', '国际', '气候', '环境', '股票', '银行', '消费', '出口',
+    '制造业', '互联网', '旅游', '文化', '航天', '铁路', '城市', '农业', '能源', '电力',
+    '今天', '记者', '表示', '发布', '数据', '显示', '相关', '部门', '进一步', '推动'
+]
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>{title}</title>{head}
+<style>.nav a {{ margin: 0 8px; }}</style>
+<script>var _stat = {{page: "{path}"}};</script>
+</head>
+<body>
+<div class="nav">{nav}</div>
+{body}
+<div class="footer">模拟新闻网 版权所有 | <a href="/about">关于我们</a> | <a href="/contact">联系方式</a></div>
+</body>
+</html>'''
+
+FEED_LINK = '<link rel="alternate" type="application/rss+xml" title="模拟新闻网" href="/rss.xml">'
+CONTENT_TYPES = {'.txt': 'text/plain; charset=utf-8', '.xml': 'application/xml; charset=utf-8',
+                 '/rss.xml': 'application/rss+xml; charset=utf-8', '.jpg': 'image/jpeg'}
+# 正文外的图片（广告位），不应被当作文章图片下载
+LOGO = '<img src="/static/logo.png">'
+# 两篇文章的发布间隔（秒）
+PUBLISH_INTERVAL = 600
+
+NAV = ''.join(f'<a href="/channel/{i}">{name}</a>' for i, name in enumerate(['首页', '国内', '国际', '财经', '科技', '体育']))
+
+
+def make_sentence(rng, words=12):
+    return ''.join(rng.choice(WORDS) for _ in range(words)) + '。'
+
+
+class MockNewsSite:
+    """模拟新闻网站，页面在启动时预先生成，请求处理只做查表"""
+
+    def __init__(self, articles=200, page_size_kb=8, latency_ms=0, error_rate=0.0,
+                 list_size=20, seed=42, host='127.0.0.1', port=0, max_concurrency=0,
+                 feeds=False, visible=None, feed_size=20, sitemap_size=50,
+                 images_per_article=0, image_pool=40, image_size=(480, 320)):
+        self.articles = articles
+        self.page_size_kb = page_size_kb
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.list_size = list_size
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.feeds = feeds
+        # 已发布（首页、订阅源和站点地图中可见）的文章数
+        self.visible = articles if visible is None else min(visible, articles)
+        self.feed_size = feed_size
+        self.sitemap_size = sitemap_size
+        self.images_per_article = images_per_article
+        self.image_pool = image_pool
+        self.image_size = image_size
+        now = time.time()
+        # 每篇文章的发布时间（未发布的为None）
+        self._published = [now - (self.visible - 1 - i) * PUBLISH_INTERVAL if i < self.visible else None
+                           for i in range(articles)]
+
+        self.server = None
+        self.thread = None
+        self.requests_served = 0
+        self.errors_served = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._titles = []
+        self._summaries = []
+        if images_per_article:
+            self._build_images()
+        self._build_pages()
+
+    def _build_images(self):
+        from PIL import Image
+
+        rng = random.Random(self.seed)
+        for index in range(self.image_pool):
+            image = Image.frombytes('RGB', self.image_size, rng.randbytes(self.image_size[0] * self.image_size[1] * 3))
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=60)
+            self._pages[f'/images/{index}.jpg'] = self._pages[f'/cdn/{index}.jpg'] = buffer.getvalue()
+
+    def _build_pages(self):
+        rng = random.Random(self.seed)
+        # 图片使用单独的随机数，不影响文字内容
+        image_rng = random.Random(self.seed + 1)
+        titles = self._titles
+        summaries = self._summaries
+
+        for article_id in range(self.articles):
+            title = make_sentence(rng, rng.randint(4, 8))[:-1]
+            paragraphs = []
+            size = 0
+            while size < self.page_size_kb * 1024:
+                paragraph = ''.join(make_sentence(rng) for _ in range(rng.randint(2, 5)))
+                paragraphs.append(f'<p>{paragraph}</p>')
+                size += len(paragraph.encode('utf-8'))
+
+            body = (
+                f'<h1>{title}</h1>'
+                f'<div class="post_info"><span class="time">2025-01-{article_id % 28 + 1:02d} 10:{article_id % 60:02d}</span>'
+                f'<span class="source">模拟新闻网</span></div>'
+                f'<div class="ad">广告位招租{LOGO if self.images_per_article else ""}</div>'
+                f'<div class="post_content_main">{self._article_images(article_id, image_rng)}{"".join(paragraphs)}</div>'
+                f'<div class="related">{"".join(f"<a href=/news/article/{(article_id + i) % self.articles}.html>相关阅读{i}</a>" for i in range(1, 4))}</div>'
+            )
+            path = f'/news/article/{article_id}.html'
+            self._pages[path] = self._render(title, path, body)
+            titles.append(title)
+            summaries.append(paragraphs[0][3:63])
+
+        self._build_lists()
+
+    def _article_images(self, article_id, rng):
+        images = ''.join(
+            f'<img src="/{"cdn" if (article_id + index) % 2 else "images"}/{rng.randrange(self.image_pool)}.jpg">'
+            for index in range(self.images_per_article)
+        )
+        return images
+
+    def _list_items(self, ids):
+        return ''.join(
+            f'<li><a href="/news/article/{i}.html">{self._titles[i]}</a><p>{self._summaries[i]}</p></li>'
+            for i in ids
+        )
+
+    def _build_lists(self):
+        """首页、分页列表和订阅源/站点地图（只含已发布的文章）"""
+        self._pages['/'] = self._render('模拟新闻网', '/',
+                                        f'<ul class="news-list">{self._list_items(range(self.visible))}</ul>',
+                                        FEED_LINK if self.feeds else '')
+
+        pages = max(1, (self.visible + self.list_size - 1) // self.list_size)
+        for page in range(1, pages + 1):
+            ids = range((page - 1) * self.list_size, min(page * self.list_size, self.visible))
+            path = f'/list/{page}.html'
+            self._pages[path] = self._render(f'新闻列表 第{page}页', path,
+                                             f'<ul class="news-list">{self._list_items(ids)}</ul>')
+        if self.feeds:
+            self._build_feeds()
+
+    def _build_feeds(self):
+        def date(article_id, rfc822=False):
+            moment = self._published[article_id]
+            if rfc822:
+                return time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(moment))
+            return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(moment))
+
+        self._pages['/robots.txt'] = ('User-agent: *\nDisallow: /admin/\n'
+                                      'Sitemap: {base}/sitemap.xml\n').encode('utf-8')
+
+        latest = range(self.visible - 1, max(-1, self.visible - 1 - self.feed_size), -1)
+        items = ''.join(
+            f'<item><title>{self._titles[i]}</title><link>{{base}}/news/article/{i}.html</link>'
+            f'<description>{escape(self._summaries[i])}</description><pubDate>{date(i, True)}</pubDate></item>'
+            for i in latest
+        )
+        self._pages['/rss.xml'] = ('<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel>'
+                                   f'<title>模拟新闻网</title><link>{{base}}/</link>{items}</channel></rss>').encode('utf-8')
+
+        namespace = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        children = []
+        for index, start in enumerate(range(0, self.visible, self.sitemap_size)):
+            ids = range(start, min(start + self.sitemap_size, self.visible))
+            urls = ''.join(f'<url><loc>{{base}}/news/article/{i}.html</loc><lastmod>{date(i)}</lastmod></url>'
+                           for i in ids)
+            self._pages[f'/sitemap/{index}.xml'] = (f'<?xml version="1.0" encoding="utf-8"?>\n'
+                                                   f'<urlset {namespace}>{urls}</urlset>').encode('utf-8')
+            children.append(f'<sitemap><loc>{{base}}/sitemap/{index}.xml</loc><lastmod>{date(ids[-1])}</lastmod></sitemap>')
+        self._pages['/sitemap.xml'] = (f'<?xml version="1.0" encoding="utf-8"?>\n'
+                                       f'<sitemapindex {namespace}>{"".join(children)}</sitemapindex>').encode('utf-8')
+
+    def publish(self, count):
+        """再发布count篇文章，发布时间均匀分布在上一篇和当前时间之间"""
+        with self._lock:
+            last = self._published[self.visible - 1] if self.visible else time.time() - PUBLISH_INTERVAL
+            count = min(count, self.articles - self.visible)
+            step = (time.time() - last) / max(count, 1)
+            for index in range(count):
+                self._published[self.visible + index] = last + step * (index + 1)
+            self.visible += count
+            self._build_lists()
+
+    def _render(self, title, path, body, head=''):
+        return PAGE_TEMPLATE.format(title=title, path=path, nav=NAV, body=body, head=head).encode('utf-8')
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.server.server_address[1]}'
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def enter(self):
+        """登记一个进行中的请求，超出并发上限时返回False"""
+        with self._lock:
+            if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                self.throttled += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def count(self, error):
+        with self._lock:
+            self.requests_served += 1
+            if error:
+                self.errors_served += 1
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests_served, 'errors': self.errors_served,
+                    'throttled': self.throttled}
+
+    def make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if not site.enter():
+                    self.send(429, '请求过于频繁'.encode('utf-8'), {'Retry-After': '1'})
+                    site.count(True)
+                    return
+                try:
+                    self.handle_page()
+                finally:
+                    site.leave()
+
+            def handle_page(self):
+                if site.latency_ms:
+                    time.sleep(site.latency_ms / 1000)
+
+                path = self.path.split('?', 1)[0]
+                if site.should_fail():
+                    self.send(500, '服务器内部错误'.encode('utf-8'))
+                    site.count(True)
+                    return
+
+                page = site._pages.get(path)
+                if page is None:
+                    self.send(404, '页面不存在'.encode('utf-8'))
+                    site.count(True)
+                    return
+
+                content_type = CONTENT_TYPES.get(path) or CONTENT_TYPES.get(path[path.rfind('.'):])
+                if content_type and not content_type.startswith('image/'):
+                    # 订阅源和站点地图中的链接使用站点的实际地址
+                    page = page.replace(b'{base}', site.base_url.encode('utf-8'))
+                self.send(200, page, content_type=content_type)
+                site.count(False)
+
+            def send(self, status, body, headers=None, content_type=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', content_type or 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """在后台线程启动服务，返回站点地址"""
+        self.server = ThreadingHTTPServer((self.host, self.port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟新闻网站')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--page-size-kb', type=float, default=8)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-concurrency', type=int, default=0, help='并发上限，超出返回429（0为不限）')
+    parser.add_argument('--feeds', action='store_true', help='提供robots.txt、RSS和站点地图')
+    args = parser.parse_args()
+
+    site = MockNewsSite(args.articles, args.page_size_kb, args.latency_ms, args.error_rate, port=args.port,
+                        max_concurrency=args.max_concurrency, feeds=args.feeds)
+    print(f'模拟新闻网站已启动: {site.start()}/')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地代理替身
+
+- MockProxy      简单的HTTP转发代理（只支持http://地址的GET），可设置额外延迟，
+                 可要求Basic认证（认证失败返回407）
+- BlackholeProxy 接受TCP连接但从不响应，模拟失效代理（每个请求耗尽超时时间）
+
+用于代理池的基准测试，也可以单独运行：
+    python -m benchmarks.mock_proxy --port 8081 --latency-ms 50
+"""
+
+import argparse
+import base64
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockProxy:
+    """转发代理，请求处理在后台线程中进行"""
+
+    def __init__(self, latency_ms=0, username=None, password=None, host='127.0.0.1', port=0):
+        self.latency_ms = latency_ms
+        self.credentials = None
+        if username:
+            token = base64.b64encode(f'{username}:{password or ""}'.encode('utf-8')).decode('ascii')
+            self.credentials = f'Basic {token}'
+        self.host = host
+        self.port = port
+        self.server = None
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        # 直接连接目标，不使用环境变量中的代理
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.server.server_address[1]}'
+
+    def make_handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if proxy.credentials and self.headers.get('Proxy-Authorization') != proxy.credentials:
+                    self.send(407, b'', {'Proxy-Authenticate': 'Basic realm="mock"'})
+                    return
+                if proxy.latency_ms:
+                    time.sleep(proxy.latency_ms / 1000)
+
+                headers = {name: value for name, value in self.headers.items()
+                           if name.lower() not in ('proxy-authorization', 'proxy-connection', 'connection')}
+                request = urllib.request.Request(self.path, headers=headers)
+                try:
+                    with proxy._opener.open(request, timeout=30) as upstream:
+                        status, body, upstream_headers = upstream.status, upstream.read(), upstream.headers
+                except urllib.error.HTTPError as e:
+                    status, body, upstream_headers = e.code, e.read(), e.headers
+                except Exception:
+                    self.send(502, b'')
+                    return
+
+                with proxy._lock:
+                    proxy.requests_served += 1
+                passthrough = {name: value for name, value in upstream_headers.items()
+                               if name.lower() in ('content-type', 'retry-after', 'content-encoding')}
+                self.send(status, body, passthrough)
+
+            def send(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), self.make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class BlackholeProxy:
+    """监听端口但从不读取和响应，客户端连接成功后一直等到超时"""
+
+    def __init__(self, host='127.0.0.1'):
+        self.host = host
+        self.sock = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.sock.getsockname()[1]}'
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind((self.host, 0))
+        self.sock.listen(1024)
+        return self.url
+
+    def stop(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地代理替身')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    proxy = MockProxy(args.latency_ms, args.username, args.password, port=args.port)
+    print(f'代理已启动: {proxy.start()}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Web API响应缓存
+功能：
+1. 按接口和查询参数缓存序列化后的JSON响应
+2. 以数据版本号判断缓存是否失效（写入数据时递增版本号）
+3. 按响应体生成ETag（与进程无关），客户端缓存未变化时返回304 Not Modified
+4. 同一缓存键并发请求只计算一次，避免多个仪表盘同时击穿数据库
+"""
+
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from flask import current_app, request
+
+
+class ResponseCache:
+    """带版本号的JSON响应缓存"""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        # 分段锁：同一缓存键的并发计算串行化，锁数量固定
+        self._key_locks = [threading.Lock() for _ in range(32)]
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and entry[0] == version:
+            return entry
+        return None
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def get_or_compute(self, key, version, producer):
+        """
+        返回 (响应体, ETag)
+
+        缓存命中且版本一致时直接返回，否则调用producer重新生成
+        """
+        entry = self._get(key, version)
+        if entry:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        with self._key_lock(key):
+            # 等待期间其他线程可能已经生成
+            entry = self._get(key, version)
+            if entry:
+                self.hits += 1
+                return entry[1], entry[2]
+
+            self.misses += 1
+            body = current_app.json.dumps(producer()).encode('utf-8')
+            # 只按响应体计算：版本号是进程内的计数，多个Web工作进程相同的响应应得到相同的ETag
+            etag = hashlib.md5(body).hexdigest()
+            with self._lock:
+                self._cache[key] = (version, body, etag)
+            return body, etag
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+        return {'size': size, 'hits': self.hits, 'misses': self.misses}
+
+
+def cached_json_response(cache, key, version, producer):
+    """
+    生成带ETag的JSON响应，客户端ETag匹配时返回304
+    """
+    body, etag = cache.get_or_compute(key, version, producer)
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    # 每次都向服务器验证，由ETag决定是否需要重新传输
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
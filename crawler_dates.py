@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布时间标准化
+功能：
+1. 把页面上取到的发布时间文字解析为时间戳（秒），支持常见中文新闻格式：
+   - 2025年03月01日 10:20、2025-03-01 10:20:30、2025/3/1、2025.03.01
+   - ISO 8601（含T和时区）、RSS的RFC 822格式（Sat, 01 Mar 2025 10:20:00 +0800）
+   - 03-01 10:20、3月1日 10:20（没有年份，按参考时间补全）
+   - 刚刚、5分钟前、3小时前、2天前、昨天 10:20、前天
+   - 10位/13位Unix时间戳
+   文字中可以带其他内容（例如“发布时间：2025-03-01 10:20 来源：新华社”）
+2. 相对时间以爬取时间为参考，重新解析历史数据结果不变
+3. 汇总表的pub_ts列（带索引）保存解析结果，按发布时间范围查询走索引，不扫描全表；
+   无法解析的发布时间为NULL
+4. 命令行：
+   python crawler_dates.py backfill    给已有新闻补充pub_ts
+   python crawler_dates.py parse "3小时前"
+"""
+
+import argparse
+import logging
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+# 年月日（时分秒可选）
+FULL_DATE = re.compile(
+    r'((?:19|20)\d{2})\s*[年/\-.]\s*(\d{1,2})\s*[月/\-.]\s*(\d{1,2})\s*日?'
+    r'(?:\s*T?\s*(\d{1,2})\s*[:：时点]\s*(\d{1,2})(?:\s*[:：分]\s*(\d{1,2}))?)?'
+)
+# 没有年份：3月1日（时间可选）或 03-01 10:20（必须带时间，避免误匹配比分、编号等）
+MONTH_DAY = re.compile(
+    r'(?<!\d)(\d{1,2})\s*(?:月\s*(\d{1,2})\s*日|[\-/](\d{1,2})(?=\s+\d{1,2}[:：]))'
+    r'(?:\s*(\d{1,2})\s*[:：时点]\s*(\d{1,2})(?:\s*[:：分]\s*(\d{1,2}))?)?'
+)
+RELATIVE = re.compile(r'(\d+|半)\s*(秒|分钟|分|个?小时|天|日|周|星期|个月|年)\s*[以之]?前')
+DAY_WORDS = re.compile(r'(今天|昨天|前天)\s*(?:(\d{1,2})\s*[:：时点]\s*(\d{1,2})(?:\s*[:：分]\s*(\d{1,2}))?)?')
+EPOCH = re.compile(r'^\d{10}(\d{3})?$')
+RFC822 = re.compile(r'^[A-Za-z]{3},?\s+\d{1,2}\s+[A-Za-z]{3}\s+\d{4}')
+DATE_ONLY = re.compile(r'^\s*(?:19|20)\d{2}\s*[年/\-.]\s*\d{1,2}\s*[月/\-.]\s*\d{1,2}\s*日?\s*$')
+
+UNIT_SECONDS = {
+    '秒': 1, '分钟': 60, '分': 60, '小时': 3600, '个小时': 3600, '天': 86400, '日': 86400,
+    '周': 7 * 86400, '星期': 7 * 86400, '个月': 30 * 86400, '年': 365 * 86400
+}
+DAY_OFFSETS = {'今天': 0, '昨天': 1, '前天': 2}
+
+
+def to_datetime(value):
+    """参考时间：datetime、时间戳或时间字符串（无法解析时为当前时间）"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if value:
+        try:
+            return datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def _clock(hour, minute, second):
+    return int(hour or 0), int(minute or 0), int(second or 0)
+
+
+def parse_pub_time(text, reference=None):
+    """
+    发布时间文字转时间戳（秒，整数），无法解析时返回None
+
+    reference 为相对时间（“3小时前”）和缺少年份时的参考时间，默认当前时间；
+    入库时传入爬取时间
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text / 1000 if text > 1e12 else text)
+    text = str(text).strip()
+    if not text:
+        return None
+
+    try:
+        # 最常见的 2025-03-01 10:20[:30] 和ISO格式直接用C实现的解析
+        if len(text) <= 32 and text[4:5] == '-' and text[:4].isdigit():
+            try:
+                return int(datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp())
+            except ValueError:
+                pass
+
+        match = FULL_DATE.search(text)
+        if match:
+            year, month, day, hour, minute, second = match.groups()
+            return int(datetime(int(year), int(month), int(day), *_clock(hour, minute, second)).timestamp())
+
+        if EPOCH.match(text):
+            return int(text[:10])
+
+        if RFC822.match(text):
+            return int(parsedate_to_datetime(text).timestamp())
+
+        reference = to_datetime(reference)
+        if text == '刚刚' or text.startswith('刚刚'):
+            return int(reference.timestamp())
+
+        match = RELATIVE.search(text)
+        if match:
+            amount, unit = match.groups()
+            amount = 0.5 if amount == '半' else int(amount)
+            return int(reference.timestamp() - amount * UNIT_SECONDS[unit])
+
+        match = DAY_WORDS.search(text)
+        if match:
+            word, hour, minute, second = match.groups()
+            day = reference.date() - timedelta(days=DAY_OFFSETS[word])
+            if hour is None:
+                # 只有日期时取当天开始（今天取参考时间本身）
+                return int((reference if word == '今天' else datetime(day.year, day.month, day.day)).timestamp())
+            return int(datetime(day.year, day.month, day.day, *_clock(hour, minute, second)).timestamp())
+
+        match = MONTH_DAY.search(text)
+        if match:
+            month, day, dash_day, hour, minute, second = match.groups()
+            value = datetime(reference.year, int(month), int(day or dash_day), *_clock(hour, minute, second))
+            # 没有年份且晚于参考时间超过一天，应是去年的新闻（例如1月初看到12月底的文章）
+            if value - reference > timedelta(days=1):
+                value = value.replace(year=reference.year - 1)
+            return int(value.timestamp())
+    except (ValueError, OverflowError, TypeError):
+        # 月日超出范围等
+        return None
+    return None
+
+
+def parse_range_value(value, end=False, reference=None):
+    """
+    查询参数（since/until）转时间戳，无法解析时抛出ValueError
+
+    支持parse_pub_time的全部格式（例如 2025-03-01、7天前、时间戳）；
+    end为True且只给出日期时取次日零点，until=2025-03-01 包含当天
+    """
+    timestamp = parse_pub_time(value, reference)
+    if timestamp is None:
+        raise ValueError(f'无法解析的时间: {value}')
+    if end and DATE_ONLY.match(str(value)):
+        timestamp += 86400
+    return timestamp
+
+
+def format_timestamp(timestamp):
+    """时间戳转本地时间字符串"""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def init_pub_ts(conn, table='news_summary'):
+    """补充pub_ts列和索引，返回是否新增了列（新增时需要回填已有数据）"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    added = 'pub_ts' not in columns
+    if added:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN pub_ts INTEGER')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_pub_ts ON {table} (pub_ts)')
+    return added
+
+
+def backfill(conn, table='news_summary', batch_size=1000, missing_only=True):
+    """按pub_time和crawl_time解析已有新闻的pub_ts，返回解析成功的条数"""
+    condition = 'WHERE pub_ts IS NULL' if missing_only else ''
+    rows = conn.execute(f'SELECT id, pub_time, crawl_time FROM {table} {condition}').fetchall()
+    parsed = 0
+    for start in range(0, len(rows), batch_size):
+        updates = []
+        for row_id, pub_time, crawl_time in rows[start:start + batch_size]:
+            timestamp = parse_pub_time(pub_time, crawl_time)
+            if timestamp is not None:
+                updates.append((timestamp, row_id))
+        conn.executemany(f'UPDATE {table} SET pub_ts = ? WHERE id = ?', updates)
+        parsed += len(updates)
+    logging.info(f'{table} 发布时间解析完成：{parsed}/{len(rows)} 条')
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='发布时间标准化工具')
+    parser.add_argument('command', choices=['backfill', 'parse'])
+    parser.add_argument('text', nargs='?', help='parse：要解析的发布时间文字')
+    parser.add_argument('--db', default='news_data/crawler_manager.db')
+    parser.add_argument('--table', default='news_summary')
+    parser.add_argument('--all', action='store_true', help='重新解析全部新闻（默认只解析pub_ts为空的）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'parse':
+        timestamp = parse_pub_time(args.text)
+        print(f'{args.text} -> {timestamp} ({format_timestamp(timestamp)})')
+        return
+
+    conn = sqlite3.connect(args.db)
+    init_pub_ts(conn, args.table)
+    parsed = backfill(conn, args.table, missing_only=not args.all)
+    conn.commit()
+    conn.close()
+    print(f'{args.db} [{args.table}]: 解析 {parsed} 条发布时间')
+
+
+if __name__ == '__main__':
+    main()
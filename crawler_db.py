@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite连接管理
+功能：
+1. 开启WAL模式，读写互不阻塞
+2. 每个线程复用一个只读连接，避免每个请求都重新打开数据库；线程结束时关闭该连接
+3. 长时间的读取（例如流式导出）使用单独的只读连接，不占用线程的复用连接
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+def enable_wal(db_path):
+    """为数据库开启WAL模式（持久化设置，只需执行一次）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    finally:
+        conn.close()
+
+
+def connect_readonly(db_path, timeout=10):
+    """打开只读连接（可在其他线程中使用）"""
+    uri = f'file:{os.path.abspath(db_path)}?mode=ro'
+    conn = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+    conn.execute('PRAGMA query_only=ON')
+    return conn
+
+
+class _ThreadConnection:
+    """线程本地保存的连接；线程结束时线程本地数据被释放，触发连接池的回收"""
+
+    __slots__ = ('conn', 'pid', '__weakref__')
+
+    def __init__(self, conn, pid):
+        self.conn = conn
+        self.pid = pid
+
+
+class ReadConnectionPool:
+    """
+    线程本地的只读SQLite连接池
+
+    每个线程首次使用时打开一个只读连接并一直复用，线程结束时关闭；
+    开发服务器每个请求一个线程，连接数不会随请求数增长。
+    进程fork后会自动重新打开，避免跨进程共享连接
+    """
+
+    def __init__(self, db_path, timeout=10):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = connect_readonly(self.db_path, self.timeout)
+        holder = _ThreadConnection(conn, os.getpid())
+        with self._lock:
+            self._connections.append(conn)
+        weakref.finalize(holder, self._release, conn)
+        return holder
+
+    def get(self):
+        """获取当前线程的只读连接"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None or holder.pid != os.getpid():
+            holder = self._open()
+            self._local.holder = holder
+        return holder.conn
+
+    @contextmanager
+    def connection(self):
+        """
+        以上下文管理器形式使用只读连接
+
+        出错时丢弃该连接，下次使用时重新打开
+        """
+        conn = self.get()
+        try:
+            yield conn
+        except sqlite3.Error:
+            self._discard(conn)
+            raise
+
+    def _discard(self, conn):
+        """关闭出错的连接并移出连接池"""
+        self._local.holder = None
+        self._release(conn)
+
+    def _release(self, conn):
+        """关闭连接并移出连接池（重复调用无影响）"""
+        with self._lock:
+            if conn not in self._connections:
+                return
+            self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章发现 - 通过RSS/Atom和站点地图获取新文章链接，不再每轮下载并解析整个门户首页
+功能：
+1. 来源：目标网站配置的 feeds / sitemaps；未配置时自动发现——robots.txt中的Sitemap行，
+   以及首页 <link rel="alternate" type="application/rss+xml"> 声明的订阅源（结果缓存 detect_ttl_hours）
+2. robots.txt 按 robots_ttl_hours 缓存（内存和 discovery.db），发现的链接按其中的Disallow规则过滤
+3. XML流式解析（XMLPullParser分块输入，处理完的元素立即清除）：RSS的item、Atom的entry、
+   站点地图的url（含Google News扩展的标题和发布时间）和sitemapindex
+4. 按时间过滤：每个网站记录上一轮发现的最新发布时间（水位），只返回比水位新的文章；
+   站点地图索引中lastmod早于水位的子站点地图不再下载，每轮只请求少量小文件
+5. 发现不到链接时由调用方退回首页解析
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from crawler_dates import format_timestamp, parse_pub_time
+from crawler_fetch import is_binary_url
+from crawler_metrics import metrics
+
+DISCOVERY_FETCHES = metrics.counter(
+    'crawler_discovery_fetches_total', '文章发现请求的文件数（skipped为按lastmod跳过的子站点地图）', ['kind']
+)
+DISCOVERY_LINKS = metrics.counter(
+    'crawler_discovery_links_total', '文章发现返回的链接数', ['kind']
+)
+
+# 首页声明的订阅源
+_FEED_LINK = re.compile(r'<link\b[^>]*>', re.I)
+_ATTRIBUTE = re.compile(r'([\w-]+)\s*=\s*["\']([^"\']*)["\']')
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+# 自动发现只读取首页开头部分（<head>）
+DETECT_CHARS = 64 * 1024
+
+
+def _local(tag):
+    """去掉XML命名空间"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(element, *names):
+    """第一个名称匹配的子元素（任意层级、忽略命名空间）的文本"""
+    for child in element.iter():
+        if child is not element and _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+class FeedDiscovery:
+    """
+    RSS/Atom和站点地图文章发现
+
+    fetch(url) 返回已读取的响应（有 .text）或None，高级爬虫传入 make_request，
+    沿用其限流、重试和响应大小上限；scope 区分使用同一状态库的不同爬虫，各自记录水位
+
+    用法：
+        discovery = FeedDiscovery(crawler.make_request)
+        links = discovery.discover(site_config, max_links=50, exclude=crawled_urls)
+    """
+
+    def __init__(self, fetch, state_path='news_data/discovery.db', robots_ttl_hours=24, detect_ttl_hours=168,
+                 initial_hours=48, overlap_minutes=10, max_sitemaps=5, max_feeds=5, respect_robots=True,
+                 autodetect=True, user_agent='*', chunk_size=64 * 1024, scope=''):
+        self.fetch = fetch
+        self.scope = scope
+        self.state_path = state_path
+        self.robots_ttl = robots_ttl_hours * 3600
+        self.detect_ttl = detect_ttl_hours * 3600
+        self.initial_seconds = initial_hours * 3600
+        self.overlap_seconds = overlap_minutes * 60
+        self.max_sitemaps = max_sitemaps
+        self.max_feeds = max_feeds
+        self.respect_robots = respect_robots
+        self.autodetect = autodetect
+        self.user_agent = user_agent
+        self.chunk_size = chunk_size
+        # 域名 -> (获取时间, RobotFileParser)
+        self._robots = {}
+        self._lock = threading.Lock()
+        self._init_state()
+
+    @classmethod
+    def from_config(cls, settings, fetch, scope=''):
+        """按 discovery 设置创建，enabled 为 false 时返回None"""
+        settings = settings or {}
+        if not settings.get('enabled'):
+            return None
+        return cls(
+            fetch,
+            state_path=settings.get('state_path', 'news_data/discovery.db'),
+            robots_ttl_hours=settings.get('robots_ttl_hours', 24),
+            detect_ttl_hours=settings.get('detect_ttl_hours', 168),
+            initial_hours=settings.get('initial_hours', 48),
+            overlap_minutes=settings.get('overlap_minutes', 10),
+            max_sitemaps=settings.get('max_sitemaps', 5),
+            max_feeds=settings.get('max_feeds', 5),
+            respect_robots=settings.get('respect_robots', True),
+            autodetect=settings.get('autodetect', True),
+            scope=scope
+        )
+
+    # ---------- 状态（robots.txt、自动发现结果、水位） ----------
+
+    def _connect(self):
+        directory = os.path.dirname(self.state_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        conn = sqlite3.connect(self.state_path, timeout=30)
+        return conn
+
+    def _init_state(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS discovery_state (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    body TEXT,
+                    updated_at REAL,
+                    PRIMARY KEY (kind, key)
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load_state(self, kind, key):
+        """返回 (body, updated_at)，没有记录时为 (None, None)"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT body, updated_at FROM discovery_state WHERE kind = ? AND key = ?',
+                                   (kind, key)).fetchone()
+            finally:
+                conn.close()
+        return row or (None, None)
+
+    def save_state(self, kind, key, body):
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT INTO discovery_state (kind, key, body, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(kind, key) DO UPDATE SET body = excluded.body, updated_at = excluded.updated_at
+                ''', (kind, key, body, time.time()))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def watermark(self, site_key):
+        """上一轮发现的最新发布时间；第一次发现时取 initial_hours 之前"""
+        body, _ = self.load_state('watermark', site_key)
+        return float(body) if body else time.time() - self.initial_seconds
+
+    # ---------- robots.txt ----------
+
+    def robots(self, origin):
+        """域名的robots规则（内存和数据库缓存robots_ttl秒），获取失败时视为全部允许"""
+        now = time.time()
+        cached = self._robots.get(origin)
+        if cached and now - cached[0] < self.robots_ttl:
+            return cached[1]
+
+        body, updated_at = self.load_state('robots', origin)
+        if body is None or now - updated_at >= self.robots_ttl:
+            response = self.fetch(f'{origin}/robots.txt')
+            DISCOVERY_FETCHES.inc(kind='robots')
+            body = response.text if response is not None else ''
+            self.save_state('robots', origin, body)
+            updated_at = now
+
+        parser = RobotFileParser()
+        parser.parse(body.splitlines())
+        self._robots[origin] = (updated_at, parser)
+        return parser
+
+    def allowed(self, url):
+        if not self.respect_robots:
+            return True
+        parts = urlparse(url)
+        return self.robots(f'{parts.scheme}://{parts.netloc}').can_fetch(self.user_agent, url)
+
+    # ---------- 来源 ----------
+
+    def detect_feeds(self, base_url):
+        """首页<head>中声明的RSS/Atom订阅源"""
+        response = self.fetch(base_url)
+        DISCOVERY_FETCHES.inc(kind='homepage')
+        if response is None:
+            return []
+        feeds = []
+        for tag in _FEED_LINK.findall(response.text[:DETECT_CHARS]):
+            attributes = {name.lower(): value for name, value in _ATTRIBUTE.findall(tag)}
+            if ('alternate' in attributes.get('rel', '').lower().split()
+                    and attributes.get('type', '').lower() in FEED_TYPES and attributes.get('href')):
+                feeds.append(urljoin(base_url, attributes['href']))
+        return feeds
+
+    def sources(self, site_config):
+        """网站的订阅源和站点地图：[('feed' 或 'sitemap', url), ...]"""
+        base_url = site_config['base_url']
+        configured = ([('feed', urljoin(base_url, url)) for url in site_config.get('feeds', [])]
+                      + [('sitemap', urljoin(base_url, url)) for url in site_config.get('sitemaps', [])])
+        if configured or not self.autodetect:
+            return configured
+
+        body, updated_at = self.load_state('detected', base_url)
+        if body is None or time.time() - updated_at >= self.detect_ttl:
+            parts = urlparse(base_url)
+            robots = self.robots(f'{parts.scheme}://{parts.netloc}')
+            detected = [('feed', url) for url in self.detect_feeds(base_url)[:self.max_feeds]]
+            detected += [('sitemap', url) for url in (robots.site_maps() or [])]
+            self.save_state('detected', base_url, json.dumps(detected))
+            if detected:
+                logging.info(f'{site_config.get("name", base_url)} 自动发现 {len(detected)} 个订阅源/站点地图')
+            return detected
+        return [tuple(item) for item in json.loads(body)]
+
+    # ---------- 解析 ----------
+
+    def parse(self, text, handlers):
+        """
+        分块流式解析XML，局部标签名在handlers中的元素结束时调用handler(element)并清除该元素
+
+        handler返回True时停止解析；XML格式错误时保留已解析的部分
+        """
+        parser = XMLPullParser(events=('end',))
+        try:
+            for start in range(0, len(text), self.chunk_size):
+                parser.feed(text[start:start + self.chunk_size])
+                for _, element in parser.read_events():
+                    handler = handlers.get(_local(element.tag))
+                    if handler is None:
+                        continue
+                    stop = handler(element)
+                    element.clear()
+                    if stop:
+                        return
+            parser.close()
+        except ParseError as e:
+            logging.warning(f'XML解析出错，只使用已解析的部分: {e}')
+
+    def parse_feed(self, text, since, limit):
+        """RSS的item / Atom的entry -> [(url, 标题, 发布时间戳)]，只保留晚于since的"""
+        items = []
+
+        def handle(element):
+            link = _child_text(element, 'link')
+            if not link:
+                # Atom: <link rel="alternate" href="..."/>
+                for child in element:
+                    if _local(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate':
+                        link = child.get('href')
+                        break
+            if not link:
+                return False
+            published = parse_pub_time(_child_text(element, 'pubDate', 'published', 'updated', 'date'))
+            if published is None or published > since:
+                items.append((link.strip(), _child_text(element, 'title') or '', published))
+            return len(items) >= limit
+
+        self.parse(text, {'item': handle, 'entry': handle})
+        return items
+
+    def parse_sitemap(self, text, since):
+        """
+        站点地图 -> ([(url, 标题, 发布时间戳)], [(子站点地图url, lastmod)])
+
+        urlset中lastmod（或news:publication_date）不晚于since的文章不返回；
+        sitemapindex中的子站点地图全部返回，由调用方按lastmod筛选。
+        站点地图一般按时间正序排列，需要完整解析才能取到最新的文章
+        """
+        items = []
+        children = []
+
+        def handle_url(element):
+            location = _child_text(element, 'loc')
+            if location:
+                published = parse_pub_time(_child_text(element, 'publication_date', 'lastmod'))
+                if published is None or published > since:
+                    items.append((location, _child_text(element, 'title') or '', published))
+            return False
+
+        def handle_sitemap(element):
+            location = _child_text(element, 'loc')
+            if location:
+                children.append((location, parse_pub_time(_child_text(element, 'lastmod'))))
+            return False
+
+        self.parse(text, {'url': handle_url, 'sitemap': handle_sitemap})
+        return items, children
+
+    # ---------- 发现 ----------
+
+    def read_source(self, kind, url, since, limit):
+        """
+        下载并解析一个订阅源/站点地图（含索引中较新的子站点地图）
+
+        返回 (文章列表, 是否完整)；订阅源超过limit条、子站点地图请求失败或较新的子站点地图超过
+        max_sitemaps个时不完整；订阅源/站点地图本身请求失败时文章列表为None
+        """
+        response = self.fetch(url)
+        DISCOVERY_FETCHES.inc(kind=kind)
+        if response is None:
+            return None, False
+        if kind == 'feed':
+            items = self.parse_feed(response.text, since, limit)
+            return items, len(items) < limit
+
+        items, children = self.parse_sitemap(response.text, since)
+        # 子站点地图：只下载lastmod晚于水位的（没有lastmod的也下载），新的优先
+        fresh = [(location, lastmod) for location, lastmod in children if lastmod is None or lastmod > since]
+        fresh.sort(key=lambda item: item[1] or float('inf'), reverse=True)
+        complete = len(fresh) <= self.max_sitemaps
+        DISCOVERY_FETCHES.inc(len(children) - min(len(fresh), self.max_sitemaps), kind='skipped')
+        for location, _ in fresh[:self.max_sitemaps]:
+            if location.endswith('.gz'):
+                # 压缩的站点地图不在允许的响应类型内
+                logging.debug(f'跳过压缩的站点地图: {location}')
+                continue
+            child = self.fetch(location)
+            DISCOVERY_FETCHES.inc(kind='sitemap')
+            if child is None:
+                complete = False
+                continue
+            items.extend(self.parse_sitemap(child.text, since)[0])
+        return items, complete
+
+    def discover(self, site_config, max_links=50, exclude=()):
+        """
+        发现网站的新文章，返回 [{'url', 'title', 'source', 'pub_time'}, ...]（新的在前）
+
+        exclude 为已爬取的URL。没有新文章时返回空列表；没有可用的订阅源/站点地图或全部读取失败时
+        返回None（调用方此时才需要解析首页）
+        """
+        site_key = f'{self.scope}:{site_config["base_url"]}'
+        since = self.watermark(site_key) - self.overlap_seconds
+        now = time.time()
+
+        found = {}
+        kinds = {}
+        complete = True
+        readable = False
+        for kind, url in self.sources(site_config):
+            try:
+                items, source_complete = self.read_source(kind, url, since, max_links * 2)
+            except Exception as e:
+                logging.error(f'读取{kind} {url} 失败: {e}')
+                complete = False
+                continue
+            if items is None:
+                complete = False
+                continue
+            readable = True
+            complete = complete and source_complete
+            for link, title, published in items:
+                link = urljoin(url, link)
+                if (link in found or link in exclude or not link.startswith('http')
+                        or is_binary_url(link) or not self.allowed(link)):
+                    continue
+                # 时钟偏差导致的未来时间按当前时间计
+                found[link] = (title, min(published, now) if published else None)
+                kinds[link] = kind
+
+        if not readable:
+            return None
+
+        ordered = sorted(found.items(), key=lambda item: item[1][1] or 0, reverse=True)
+        links = ordered[:max_links]
+        # 全部返回时水位前移到最新的发布时间；截断或有来源读取不完整时不前移，
+        # 下一轮（排除已爬取的）继续返回剩下的较早文章
+        dated = [published for _, (_, published) in links if published]
+        if dated and complete and len(ordered) <= max_links:
+            self.save_state('watermark', site_key, str(max(dated)))
+
+        for link, _ in links:
+            DISCOVERY_LINKS.inc(kind=kinds[link])
+        return [{
+            'url': link,
+            'title': title,
+            'source': site_config.get('name', ''),
+            'pub_time': format_timestamp(published) or ''
+        } for link, (title, published) in links]
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式爬取 - 协调者/工作者模式
+功能：
+1. 共享URL队列（frontier），以租约方式分发URL
+2. 租约超时自动回收并重新分配
+3. 按域名分区，同一域名同一时刻只由一个工作者处理，保证礼貌爬取
+4. 工作者进程可运行在本机或其他机器上（通过HTTP连接协调者）
+5. 本地使用SQLite作为共享存储的替身，便于多进程测试
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from urllib.parse import urlparse
+
+import requests
+
+from crawler_logging import setup_logging
+
+
+class SQLiteFrontier:
+    """
+    基于SQLite的共享URL队列
+
+    多个进程可以同时打开同一个数据库文件，所有状态变更都在
+    BEGIN IMMEDIATE 事务中完成，保证租约分配的原子性。
+    """
+
+    def __init__(self, db_path='news_data/frontier.db', lease_seconds=120,
+                 max_attempts=3, domain_delay=1.0):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.domain_delay = domain_delay
+
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def init_database(self):
+        """初始化队列表结构"""
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS frontier (
+                    url TEXT PRIMARY KEY,
+                    domain TEXT NOT NULL,
+                    source TEXT,
+                    title TEXT,
+                    site_config TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    enqueued_at REAL,
+                    updated_at REAL,
+                    error_msg TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_frontier_status_domain '
+                         'ON frontier (status, domain, enqueued_at)')
+
+            # 域名租约：同一域名同一时刻只属于一个工作者
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS domain_leases (
+                    domain TEXT PRIMARY KEY,
+                    owner TEXT,
+                    expires REAL,
+                    next_allowed REAL
+                )
+            ''')
+
+            # 工作者回传的结果，由协调者批量取走
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS frontier_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT,
+                    worker_id TEXT,
+                    payload TEXT,
+                    created_at REAL
+                )
+            ''')
+        finally:
+            conn.close()
+
+    def enqueue(self, links, site_config=None):
+        """
+        批量加入待爬取URL，已存在的URL会被忽略
+
+        links: [{'url': ..., 'title': ..., 'source': ...}, ...]
+        """
+        now = time.time()
+        site_json = json.dumps(site_config or {}, ensure_ascii=False)
+        rows = [
+            (link['url'], urlparse(link['url']).netloc, link.get('source', ''),
+             link.get('title', ''), site_json, now, now)
+            for link in links
+        ]
+
+        conn = self._connect()
+        try:
+            before = conn.total_changes
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('''
+                INSERT OR IGNORE INTO frontier
+                (url, domain, source, title, site_config, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.execute('COMMIT')
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def _reclaim_expired(self, conn, now):
+        """回收超时的租约，超过最大尝试次数的URL标记为失败"""
+        conn.execute('''
+            UPDATE frontier
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_owner = NULL,
+                lease_expires = NULL,
+                error_msg = '租约超时',
+                updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ?
+        ''', (self.max_attempts, now, now))
+        conn.execute('''
+            UPDATE domain_leases SET owner = NULL, expires = NULL
+            WHERE owner IS NOT NULL AND expires < ?
+        ''', (now,))
+
+    def lease(self, worker_id, batch_size=10):
+        """
+        为工作者分配一批同域名的URL
+
+        返回任务列表，每个任务包含url、title、source、site_config；
+        没有可分配的域名时返回空列表
+        """
+        now = time.time()
+        expires = now + self.lease_seconds
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._reclaim_expired(conn, now)
+
+            # 选择一个空闲且已过礼貌间隔的域名（优先最早入队的）
+            row = conn.execute('''
+                SELECT f.domain FROM frontier f
+                LEFT JOIN domain_leases d ON d.domain = f.domain
+                WHERE f.status = 'pending'
+                  AND (d.owner IS NULL OR d.owner = ?)
+                  AND (d.next_allowed IS NULL OR d.next_allowed <= ?)
+                GROUP BY f.domain
+                ORDER BY MIN(f.enqueued_at)
+                LIMIT 1
+            ''', (worker_id, now)).fetchone()
+
+            if not row:
+                conn.execute('COMMIT')
+                return []
+
+            domain = row[0]
+            conn.execute('''
+                INSERT INTO domain_leases (domain, owner, expires, next_allowed)
+                VALUES (?, ?, ?, NULL)
+                ON CONFLICT(domain) DO UPDATE SET owner = excluded.owner,
+                                                  expires = excluded.expires
+            ''', (domain, worker_id, expires))
+
+            rows = conn.execute('''
+                SELECT url, title, source, site_config, attempts FROM frontier
+                WHERE domain = ? AND status = 'pending'
+                ORDER BY enqueued_at
+                LIMIT ?
+            ''', (domain, batch_size)).fetchall()
+
+            conn.executemany('''
+                UPDATE frontier
+                SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE url = ?
+            ''', [(worker_id, expires, now, r[0]) for r in rows])
+            conn.execute('COMMIT')
+
+            return [
+                {
+                    'url': r[0],
+                    'title': r[1],
+                    'source': r[2],
+                    'site_config': json.loads(r[3] or '{}'),
+                    'attempt': r[4] + 1,
+                    'domain': domain,
+                    'lease_expires': expires
+                }
+                for r in rows
+            ]
+        finally:
+            conn.close()
+
+    def renew(self, worker_id):
+        """延长工作者持有的所有租约"""
+        now = time.time()
+        expires = now + self.lease_seconds
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute('''
+                UPDATE frontier SET lease_expires = ?, updated_at = ?
+                WHERE status = 'leased' AND lease_owner = ?
+            ''', (expires, now, worker_id))
+            renewed = cursor.rowcount
+            conn.execute('UPDATE domain_leases SET expires = ? WHERE owner = ?',
+                         (expires, worker_id))
+            conn.execute('COMMIT')
+            return renewed
+        finally:
+            conn.close()
+
+    def complete(self, worker_id, url, result=None):
+        """
+        提交爬取结果
+
+        只有仍持有该URL租约的工作者才能提交，租约已被回收时返回False
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute('''
+                UPDATE frontier
+                SET status = 'done', lease_owner = NULL, lease_expires = NULL,
+                    error_msg = NULL, updated_at = ?
+                WHERE url = ? AND status = 'leased' AND lease_owner = ?
+            ''', (now, url, worker_id))
+
+            accepted = cursor.rowcount == 1
+            if accepted and result:
+                conn.execute('''
+                    INSERT INTO frontier_results (url, worker_id, payload, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (url, worker_id, json.dumps(result, ensure_ascii=False), now))
+            conn.execute('COMMIT')
+            return accepted
+        finally:
+            conn.close()
+
+    def fail(self, worker_id, url, error_msg='', retry=True):
+        """标记URL爬取失败，未超过最大尝试次数时重新排队"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute('''
+                UPDATE frontier
+                SET status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END,
+                    lease_owner = NULL, lease_expires = NULL,
+                    error_msg = ?, updated_at = ?
+                WHERE url = ? AND status = 'leased' AND lease_owner = ?
+            ''', (1 if retry else 0, self.max_attempts, error_msg, now, url, worker_id))
+            conn.execute('COMMIT')
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self, worker_id, domain):
+        """释放域名租约，并设置该域名下一次可被领取的时间"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('''
+                UPDATE domain_leases
+                SET owner = NULL, expires = NULL, next_allowed = ?
+                WHERE domain = ? AND owner = ?
+            ''', (now + self.domain_delay, domain, worker_id))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def release_worker(self, owner_prefix):
+        """
+        回收ID以 owner_prefix 开头的工作者持有的租约（工作者进程已退出时调用），返回回收的URL数
+
+        URL按尝试次数重新排队或标记为失败，与租约超时的处理相同
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute('''
+                UPDATE frontier
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL,
+                    lease_expires = NULL,
+                    error_msg = '工作者退出',
+                    updated_at = ?
+                WHERE status = 'leased' AND substr(lease_owner, 1, ?) = ?
+            ''', (self.max_attempts, now, len(owner_prefix), owner_prefix))
+            conn.execute('''
+                UPDATE domain_leases SET owner = NULL, expires = NULL
+                WHERE substr(owner, 1, ?) = ?
+            ''', (len(owner_prefix), owner_prefix))
+            conn.execute('COMMIT')
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def drain_results(self, limit=500):
+        """取出并删除一批工作者回传的结果"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT id, payload FROM frontier_results ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+            if rows:
+                conn.execute('DELETE FROM frontier_results WHERE id <= ?', (rows[-1][0],))
+            conn.execute('COMMIT')
+            return [json.loads(payload) for _, payload in rows]
+        finally:
+            conn.close()
+
+    def stats(self):
+        """队列统计信息"""
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM frontier GROUP BY status'
+            ).fetchall())
+            active_domains = conn.execute(
+                'SELECT COUNT(*) FROM domain_leases WHERE owner IS NOT NULL AND expires >= ?',
+                (time.time(),)
+            ).fetchone()[0]
+            pending_results = conn.execute(
+                'SELECT COUNT(*) FROM frontier_results'
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+        return {
+            'pending': counts.get('pending', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'active_domains': active_domains,
+            'pending_results': pending_results
+        }
+
+    def is_finished(self):
+        """队列中没有待处理或处理中的URL"""
+        stats = self.stats()
+        return stats['pending'] == 0 and stats['leased'] == 0
+
+    def reset(self):
+        """清空队列（开始新一轮爬取前调用）"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM frontier')
+            conn.execute('DELETE FROM domain_leases')
+            conn.execute('DELETE FROM frontier_results')
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+
+class HTTPFrontierClient:
+    """
+    远程工作者使用的队列客户端，通过协调者的 /api/frontier/* 接口访问队列
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, action, payload):
+        response = self.session.post(
+            f'{self.base_url}/api/frontier/{action}',
+            json=payload,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, worker_id, batch_size=10):
+        return self._post('lease', {'worker_id': worker_id, 'batch_size': batch_size})['tasks']
+
+    def renew(self, worker_id):
+        return self._post('renew', {'worker_id': worker_id})['renewed']
+
+    def complete(self, worker_id, url, result=None):
+        return self._post('complete', {'worker_id': worker_id, 'url': url,
+                                       'result': result})['accepted']
+
+    def fail(self, worker_id, url, error_msg='', retry=True):
+        return self._post('fail', {'worker_id': worker_id, 'url': url,
+                                   'error_msg': error_msg, 'retry': retry})['accepted']
+
+    def release(self, worker_id, domain):
+        self._post('release', {'worker_id': worker_id, 'domain': domain})
+
+
+def open_frontier(spec, **kwargs):
+    """
+    根据描述字符串打开队列
+
+    - http://host:port      连接远程协调者
+    - sqlite:///path/to.db  或直接给出文件路径，打开本地SQLite队列
+    """
+    if spec.startswith('http://') or spec.startswith('https://'):
+        return HTTPFrontierClient(spec)
+    if spec.startswith('sqlite:///'):
+        spec = spec[len('sqlite:///'):]
+    return SQLiteFrontier(spec, **kwargs)
+
+
+def default_worker_id():
+    return f'{local_worker_prefix(os.getpid())}{uuid.uuid4().hex[:6]}'
+
+
+def local_worker_prefix(pid):
+    """本机某个进程中工作者ID的前缀（用于回收已退出进程的租约）"""
+    return f'{socket.gethostname()}-{pid}-'
+
+
+class CrawlWorker:
+    """
+    爬取工作者：领取租约 -> 抓取解析 -> 回传结果
+    """
+
+    def __init__(self, frontier, worker_id=None, fetch_func=None, crawler_config=None,
+                 batch_size=10, request_delay=(1, 3), idle_timeout=15, lease_seconds=120):
+        self.frontier = frontier
+        self.worker_id = worker_id or default_worker_id()
+        self.fetch_func = fetch_func or self.fetch_with_crawler
+        self.crawler_config = crawler_config
+        self.batch_size = batch_size
+        self.request_delay = tuple(request_delay)
+        self.idle_timeout = idle_timeout
+        self.lease_seconds = lease_seconds
+        self.crawler = None
+        self.processed = 0
+        self.failed = 0
+
+    def fetch_with_crawler(self, task):
+        """
+        默认抓取函数：复用高级爬虫的内容解析、情感分析和关键词提取
+        """
+        if self.crawler is None:
+            from news_crawler_advanced import AdvancedNewsCrawler
+            self.crawler = AdvancedNewsCrawler(self.crawler_config)
+
+        site_config = dict(task['site_config'])
+        site_config.setdefault('name', task.get('source', ''))
+        site_config.setdefault('content_selector', '')
+
+        news = self.crawler.extract_news_content(task['url'], site_config)
+        if not news or not news.content:
+            return None
+
+        news.sentiment_score = self.crawler.analyze_sentiment(news.content)
+        news.keywords = self.crawler.extract_keywords(news.content)
+        return news.to_dict()
+
+    def process_batch(self, tasks):
+        """处理同一域名下的一批任务，任务间按礼貌间隔休眠"""
+        renew_at = time.time() + self.lease_seconds / 2
+
+        for index, task in enumerate(tasks):
+            if index > 0 and self.request_delay[1] > 0:
+                time.sleep(random.uniform(*self.request_delay))
+
+            if time.time() >= renew_at:
+                try:
+                    self.frontier.renew(self.worker_id)
+                except Exception as e:
+                    logging.error(f'工作者 {self.worker_id} 续约失败: {e}')
+                renew_at = time.time() + self.lease_seconds / 2
+
+            try:
+                result = self.fetch_func(task)
+                if result:
+                    self.frontier.complete(self.worker_id, task['url'], result)
+                    self.processed += 1
+                else:
+                    self.frontier.fail(self.worker_id, task['url'], '未提取到内容', retry=False)
+                    self.failed += 1
+            except Exception as e:
+                logging.error(f'工作者 {self.worker_id} 处理失败 {task["url"]}: {e}')
+                # 标记失败本身出错（例如数据库被锁）时不退出，租约超时后由队列回收
+                try:
+                    self.frontier.fail(self.worker_id, task['url'], str(e))
+                except Exception as fail_error:
+                    logging.error(f'工作者 {self.worker_id} 标记失败出错 {task["url"]}: {fail_error}')
+                self.failed += 1
+
+        try:
+            self.frontier.release(self.worker_id, tasks[0]['domain'])
+        except Exception as e:
+            logging.error(f'工作者 {self.worker_id} 释放域名租约失败: {e}')
+
+    def run(self, max_tasks=None):
+        """
+        主循环：持续领取任务，连续空闲超过 idle_timeout 秒后退出
+        """
+        logging.info(f'工作者 {self.worker_id} 启动')
+        idle_since = None
+
+        while max_tasks is None or self.processed + self.failed < max_tasks:
+            try:
+                tasks = self.frontier.lease(self.worker_id, self.batch_size)
+            except Exception as e:
+                logging.error(f'工作者 {self.worker_id} 领取任务失败: {e}')
+                tasks = []
+
+            if not tasks:
+                idle_since = idle_since or time.time()
+                if time.time() - idle_since >= self.idle_timeout:
+                    break
+                time.sleep(0.2)
+                continue
+
+            idle_since = None
+            self.process_batch(tasks)
+
+        logging.info(f'工作者 {self.worker_id} 退出，成功 {self.processed} 条，失败 {self.failed} 条')
+        return self.processed
+
+
+def run_worker_process(frontier_spec, worker_options=None, fetch_func=None):
+    """工作者进程入口（需可被multiprocessing序列化）"""
+    options = dict(worker_options or {})
+    frontier_options = options.pop('frontier_options', {})
+    frontier = open_frontier(frontier_spec, **frontier_options)
+    worker = CrawlWorker(frontier, fetch_func=fetch_func, **options)
+    return worker.run()
+
+
+def start_local_workers(frontier_spec, num_workers, worker_options=None, fetch_func=None):
+    """在本机启动多个工作者进程"""
+    processes = []
+    for _ in range(num_workers):
+        process = multiprocessing.Process(
+            target=run_worker_process,
+            args=(frontier_spec, worker_options, fetch_func),
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main():
+    """
+    命令行入口：在本机或远程机器上启动工作者
+    """
+    parser = argparse.ArgumentParser(description='分布式新闻爬虫工作者')
+    parser.add_argument('--frontier', default='http://127.0.0.1:5000',
+                        help='协调者地址(http://host:port)或本地SQLite队列路径')
+    parser.add_argument('--workers', type=int, default=1, help='本机启动的工作者进程数')
+    parser.add_argument('--config', default='crawler_config.json', help='配置文件')
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--idle-timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    setup_logging(config)
+    advanced_config = config.get('advanced_crawler', {})
+    settings = advanced_config.get('settings', {})
+
+    worker_options = {
+        'crawler_config': advanced_config,
+        'batch_size': args.batch_size,
+        'request_delay': settings.get('request_delay', [1, 3]),
+        'idle_timeout': args.idle_timeout
+    }
+
+    processes = start_local_workers(args.frontier, args.workers, worker_options)
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
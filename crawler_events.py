@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+爬取事件推送 - 基于Server-Sent Events
+功能：
+1. 进程内发布/订阅事件总线
+2. 每个订阅者一个有界队列，慢速订阅者不会阻塞爬取流程
+3. SSE消息格式化和心跳
+"""
+
+import json
+import logging
+import queue
+import threading
+
+
+class EventBus:
+    """线程安全的事件总线"""
+
+    def __init__(self, max_queue_size=500):
+        self.max_queue_size = max_queue_size
+        self._subscribers = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """订阅事件，返回该订阅者的事件队列"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def add_listener(self, callback):
+        """添加同步监听器，每条事件发布时调用 callback(event_type, data)"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type, data=None):
+        """
+        发布事件，不阻塞调用方
+
+        订阅者队列已满时清空其积压事件，改发一条resync事件，
+        由客户端重新拉取完整数据
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event_type, data)
+            except Exception as e:
+                logging.error(f'事件监听器处理失败: {e}')
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_type, data))
+            except queue.Full:
+                self._resync(subscriber)
+
+    def _resync(self, subscriber):
+        while True:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            subscriber.put_nowait(('resync', None))
+        except queue.Full:
+            pass
+
+
+def format_sse(event_type, data=None):
+    """格式化为一条SSE消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f'event: {event_type}\ndata: {payload}\n\n'
+
+
+def event_stream(bus, initial_events=(), heartbeat_seconds=15):
+    """
+    SSE响应生成器
+
+    先发送initial_events（例如当前状态快照），之后阻塞等待新事件，
+    空闲时定期发送注释行作为心跳，客户端断开后自动退订
+    """
+    subscriber = bus.subscribe()
+    try:
+        yield 'retry: 3000\n\n'
+        for event_type, data in initial_events:
+            yield format_sse(event_type, data)
+
+        while True:
+            try:
+                event_type, data = subscriber.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            yield format_sse(event_type, data)
+    finally:
+        bus.unsubscribe(subscriber)
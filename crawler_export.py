@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出
+功能：
+1. 在单独的只读连接上执行查询，用 fetchmany 按批读取，逐批编码后交给分块HTTP响应；
+   服务器内存只与批大小有关，与导出的行数无关
+2. 格式：CSV（带表头，UTF-8 BOM，Excel可直接打开）、JSON Lines（每行一个对象）、
+   Parquet（需安装pyarrow，每批写为一个行组）
+3. 压缩存储的正文按批解压；不需要正文时不读取 news_content 表
+4. 客户端中途断开时生成器被关闭，连接随之关闭
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import logging
+
+from crawler_db import connect_readonly
+from crawler_metrics import metrics
+from crawler_storage import load_contents, url_hash
+
+EXPORT_ROWS = metrics.counter('crawler_export_rows_total', '流式导出的行数', ['format'])
+
+# 格式 -> (Content-Type, 扩展名)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def parquet_available():
+    """pyarrow为可选依赖"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def column_types(conn, table):
+    """表中各列声明的类型（大写），用于确定Parquet的列类型"""
+    return {row[1]: (row[2] or '').upper() for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def read_batches(conn, query, params, batch_size=DEFAULT_BATCH_SIZE):
+    """执行查询，返回 (列名, 按批产生行元组列表的生成器)；content为NULL的行按批补上解压后的正文"""
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    content_index = columns.index('content') if 'content' in columns else None
+    url_index = columns.index('url') if 'url' in columns else None
+
+    def batches():
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if content_index is not None and url_index is not None:
+                missing = [i for i, row in enumerate(rows) if row[content_index] is None]
+                if missing:
+                    keys = [url_hash(rows[i][url_index]) for i in missing]
+                    contents = load_contents(conn, keys)
+                    for i, key in zip(missing, keys):
+                        row = list(rows[i])
+                        row[content_index] = contents.get(key, '')
+                        rows[i] = tuple(row)
+            yield rows
+
+    return columns, batches()
+
+
+def encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8'), len(rows)
+
+
+def encode_jsonl(columns, batches):
+    for rows in batches:
+        lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in rows]
+        yield ('\n'.join(lines) + '\n').encode('utf-8'), len(rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Parquet写入目标：收集写入的字节，每个行组写完后取走"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def encode_parquet(columns, batches, types=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # 列类型按表结构确定，不按第一批推断（第一批某列全为NULL时会推断错）
+    types = types or {}
+
+    def arrow_type(column):
+        declared = types.get(column, '')
+        if 'INT' in declared:
+            return pa.int64()
+        if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+            return pa.float64()
+        return pa.string()
+
+    schema = pa.schema([(column, arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            values = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values[i], type=schema.field(i).type) for i in range(len(columns))], schema=schema
+            ))
+            yield sink.drain(), len(rows)
+    finally:
+        # 写入文件尾（行组元数据）
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {'csv': encode_csv, 'jsonl': encode_jsonl, 'parquet': encode_parquet}
+
+
+def stream_export(db_path, query, params, fmt, table='news_summary', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    按批产生导出文件的字节块
+
+    连接在生成器结束（包括客户端断开时生成器被关闭）时关闭。
+    响应开始后出错只能记录日志并截断输出
+    """
+    if fmt not in ENCODERS:
+        raise ValueError(f'未知的导出格式: {fmt}')
+    conn = connect_readonly(db_path)
+    exported = 0
+    try:
+        columns, batches = read_batches(conn, query, params, batch_size)
+        if fmt == 'parquet':
+            chunks = encode_parquet(columns, batches, column_types(conn, table))
+        else:
+            chunks = ENCODERS[fmt](columns, batches)
+        for chunk in chunks:
+            # 数据块附带本块的行数；表头和文件尾不带
+            if isinstance(chunk, tuple):
+                chunk, count = chunk
+                exported += count
+            if chunk:
+                yield chunk
+        logging.info(f'导出完成: {exported} 条（{fmt}）')
+    except GeneratorExit:
+        logging.info(f'导出被客户端中断: 已导出 {exported} 条（{fmt}）')
+        raise
+    except Exception as e:
+        logging.error(f'导出数据失败: {e}')
+    finally:
+        EXPORT_ROWS.inc(exported, format=fmt)
+        conn.close()
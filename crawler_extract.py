@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+正文提取 - 基础爬虫和高级爬虫共用
+功能：
+1. 一次遍历DOM，按文字量和链接密度给区块打分，得分最高的区块作为正文，
+   并去掉其中以链接为主的区块（导航、相关阅读等）
+2. 先尝试配置的CSS选择器；匹配到的是外层容器时只取其中得分最高的区块，
+   链接密度过高或文字过少时不采用；选择器都不可用时对整个页面打分
+3. 记住每个站点模板（主机 + 去掉数字的URL路径）正文区块的路径，
+   同一模板的后续页面直接按路径取正文，取不到再按上述步骤提取
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from bs4 import NavigableString, Tag
+
+from crawler_metrics import metrics
+
+EXTRACT_RESULTS = metrics.counter(
+    'crawler_extract_total', '正文提取结果（selector/cached/density为提取成功，empty为失败）',
+    ['crawler', 'method'])
+
+# 不计入正文的标签
+SKIP_TAGS = {'script', 'style', 'noscript', 'iframe', 'svg', 'form', 'button', 'select',
+             'textarea', 'template', 'head'}
+# 段落类标签：文字得分计入父元素（全部）和祖父元素（一半）
+BLOCK_TAGS = {'p', 'pre', 'blockquote', 'td', 'li', 'dd', 'section'}
+# 行内标签不单独按链接密度剔除（段落中的链接文字保留）
+INLINE_TAGS = {'a', 'span', 'strong', 'b', 'em', 'i', 'u', 'font', 'br', 'img', 'sub', 'sup', 'code', 'small'}
+
+_DIGITS = re.compile(r'\d+')
+
+
+def template_key(url):
+    """站点模板：主机 + 数字替换为0的目录 + 扩展名，例如 news.163.com/news/article/*.html"""
+    parsed = urlparse(url)
+    path = _DIGITS.sub('0', parsed.path)
+    directory, _, name = path.rpartition('/')
+    ext = name[name.rfind('.'):] if '.' in name else ''
+    return f'{parsed.netloc}{directory}/*{ext}'
+
+
+def element_selector(elem):
+    """
+    元素的CSS路径，优先使用不含数字的id（含数字的id通常每篇文章不同）
+
+    例如 'body > div.main > div.post_content_main'
+    """
+    parts = []
+    while isinstance(elem, Tag) and elem.name not in ('body', 'html', '[document]'):
+        elem_id = elem.get('id')
+        if elem_id and not _DIGITS.search(elem_id) and re.fullmatch(r'[A-Za-z_][\w-]*', elem_id):
+            parts.append(f'{elem.name}#{elem_id}')
+            return ' > '.join(reversed(parts))
+
+        classes = [name for name in elem.get('class', []) if re.fullmatch(r'[A-Za-z_][\w-]*', name)]
+        if classes:
+            parts.append(elem.name + ''.join(f'.{name}' for name in classes))
+        else:
+            index = 1
+            for sibling in elem.previous_siblings:
+                if isinstance(sibling, Tag) and sibling.name == elem.name:
+                    index += 1
+            parts.append(f'{elem.name}:nth-of-type({index})')
+        elem = elem.parent
+
+    parts.append('body')
+    return ' > '.join(reversed(parts))
+
+
+class ContentExtractor:
+    """
+    正文提取器（线程安全）
+
+    用法：
+        extractor = ContentExtractor()
+        content, method = extractor.extract(soup, url, ['.post_content_main', '.content'])
+    method 为 'selector'、'cached'、'density'，提取失败时 content 为空字符串、method 为 'empty'
+    """
+
+    def __init__(self, min_chars=50, max_link_density=0.5, cache_size=512, crawler='advanced'):
+        self.min_chars = min_chars
+        self.max_link_density = max_link_density
+        self.cache_size = cache_size
+        self.crawler = crawler
+        self.templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def extract(self, soup, url, selectors=()):
+        try:
+            content, method = self._extract(soup, url, selectors)
+        except RecursionError:
+            # 嵌套过深的异常页面
+            content, method = '', 'empty'
+        EXTRACT_RESULTS.inc(crawler=self.crawler, method=method)
+        return content, method
+
+    def _extract(self, soup, url, selectors):
+        key = template_key(url)
+        with self._lock:
+            path = self.templates.get(key)
+            if path:
+                self.templates.move_to_end(key)
+        if path:
+            content, _ = self._content_of(self._select(soup, path))
+            if content:
+                with self._lock:
+                    self.hits += 1
+                return content, 'cached'
+
+        method = 'selector'
+        content = ''
+        for selector in selectors:
+            content, elem = self._content_of(self._select(soup, selector))
+            if content:
+                break
+        else:
+            method = 'density'
+            stats = {}
+            scores = {}
+            self._walk(soup.body or soup, stats, scores)
+            elem = self._best(scores, stats)
+            content = self._accept(elem, stats) if elem is not None else ''
+
+        with self._lock:
+            self.misses += 1
+            if content:
+                self.templates[key] = element_selector(elem)
+                self.templates.move_to_end(key)
+                while len(self.templates) > self.cache_size:
+                    self.templates.popitem(last=False)
+            elif path:
+                # 缓存的路径在新页面上失效，下次重新打分
+                self.templates.pop(key, None)
+        return (content, method) if content else ('', 'empty')
+
+    @staticmethod
+    def _select(soup, selector):
+        try:
+            return soup.select_one(selector)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _best(scores, stats):
+        """得分 × (1 - 链接密度) 最高的区块"""
+        best = None
+        best_score = 0.0
+        for elem, score in scores.values():
+            if id(elem) not in stats:
+                # 遍历范围之外的父元素
+                continue
+            text, links = stats[id(elem)]
+            score *= 1 - links / text if text else 0
+            if score > best_score:
+                best, best_score = elem, score
+        return best
+
+    def _content_of(self, elem):
+        """
+        选择器匹配到的元素作为正文，返回 (正文, 采用的元素)，不合格时正文为空字符串
+
+        匹配到的是外层容器时（其中得分最高的区块占一半以上文字），只取该区块
+        """
+        if elem is None:
+            return '', None
+        stats = {}
+        scores = {}
+        self._walk(elem, stats, scores)
+        best = self._best(scores, stats)
+        if best is not None and best is not elem:
+            text, links = stats[id(elem)]
+            best_text, best_links = stats[id(best)]
+            if best_text - best_links >= 0.5 * (text - links):
+                elem = best
+        return self._accept(elem, stats), elem
+
+    def _accept(self, elem, stats):
+        text, links = stats[id(elem)]
+        if text - links < self.min_chars or links > text * self.max_link_density:
+            return ''
+        parts = []
+        self._collect(elem, stats, parts)
+        content = ''.join(parts)
+        return content if len(content) >= self.min_chars else ''
+
+    def _walk(self, elem, stats, scores):
+        """
+        后序遍历，统计每个元素的文字长度和链接文字长度，同时给候选区块打分
+
+        返回 (文字长度, 链接文字长度)
+        """
+        text = links = direct = 0
+        for child in elem.children:
+            if type(child) is NavigableString:
+                length = len(child.strip())
+                text += length
+                direct += length
+            elif isinstance(child, Tag) and child.name not in SKIP_TAGS:
+                child_text, child_links = self._walk(child, stats, scores)
+                text += child_text
+                links += child_links
+        if elem.name == 'a':
+            links = text
+        stats[id(elem)] = (text, links)
+
+        if elem.name in BLOCK_TAGS:
+            own = text - links
+            if own > 0:
+                parent = elem.parent
+                if isinstance(parent, Tag):
+                    self._add_score(scores, parent, own)
+                    if isinstance(parent.parent, Tag):
+                        self._add_score(scores, parent.parent, own / 2)
+        elif direct >= 20 and elem.name not in INLINE_TAGS:
+            # 直接用<br>分段、不用<p>的正文容器
+            self._add_score(scores, elem, direct)
+        return text, links
+
+    @staticmethod
+    def _add_score(scores, elem, value):
+        entry = scores.get(id(elem))
+        scores[id(elem)] = (elem, entry[1] + value if entry else value)
+
+    def _collect(self, elem, stats, parts):
+        """收集正文文字，跳过以链接为主的区块"""
+        for child in elem.children:
+            if type(child) is NavigableString:
+                text = child.strip()
+                if text:
+                    parts.append(text)
+            elif isinstance(child, Tag) and child.name not in SKIP_TAGS:
+                if child.name not in INLINE_TAGS:
+                    text, links = stats.get(id(child), (0, 0))
+                    if text and links > text * self.max_link_density:
+                        continue
+                self._collect(child, stats, parts)
+
+    def stats(self):
+        with self._lock:
+            return {'templates': len(self.templates), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+响应读取和编码检测 - 基础爬虫和高级爬虫共用
+功能：
+1. 流式读取响应体，超过大小上限或总读取时间时立即中止
+2. 根据Content-Type提前拒绝图片、PDF等非HTML内容；明显指向二进制文件的链接不请求
+3. 编码按 BOM > HTTP头 > <meta> > chardet 的顺序确定，GBK/GB2312统一按GB18030解码
+4. 读取后的响应只解码一次，解析器直接使用解码后的文本
+"""
+
+import codecs
+import re
+import time
+from urllib.parse import urlparse
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml',
+                         'application/rss+xml', 'application/atom+xml')
+
+CHUNK_SIZE = 64 * 1024
+# chardet只检测开头部分，避免大页面耗费CPU
+DETECT_BYTES = 64 * 1024
+
+BINARY_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.ico', '.svg',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.zip', '.rar', '.7z', '.gz', '.tar', '.exe', '.apk', '.dmg',
+    '.mp3', '.mp4', '.avi', '.mov', '.flv', '.wmv', '.m3u8', '.css', '.js'
+}
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+)
+
+# GB2312和GBK是GB18030的子集，统一用GB18030解码避免生僻字乱码
+ENCODING_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030', 'ascii': 'utf-8'}
+
+_CHARSET_PARAM = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+
+class ResponseRejected(Exception):
+    """响应类型不符或超过大小上限，不应重试"""
+
+
+def is_binary_url(url):
+    """链接是否明显指向二进制文件（按扩展名判断）"""
+    path = urlparse(url).path.lower()
+    dot = path.rfind('.')
+    return dot != -1 and path[dot:] in BINARY_EXTENSIONS
+
+
+def normalize_encoding(name):
+    """规范编码名称，未知编码返回None"""
+    if not name:
+        return None
+    try:
+        name = codecs.lookup(name.strip().strip('"\'')).name
+    except LookupError:
+        return None
+    return ENCODING_ALIASES.get(name, name)
+
+
+def detect_encoding(body, content_type=None):
+    """确定响应体的编码"""
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = _CHARSET_PARAM.search(content_type)
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+    match = _META_CHARSET.search(body[:4096])
+    encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore')) if match else None
+    if encoding:
+        return encoding
+
+    try:
+        import chardet
+    except ImportError:
+        return 'utf-8'
+    guess = chardet.detect(body[:DETECT_BYTES])
+    return normalize_encoding(guess.get('encoding')) or 'utf-8'
+
+
+def check_content_type(content_type, allowed=DEFAULT_CONTENT_TYPES):
+    """没有Content-Type时放行"""
+    if not content_type or not allowed:
+        return True
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type in allowed
+
+
+def load_response(response, max_bytes=DEFAULT_MAX_BYTES, allowed_types=DEFAULT_CONTENT_TYPES,
+                  max_seconds=None):
+    """
+    读取以 stream=True 发出的请求的响应体并设置编码
+
+    超过max_bytes、读取超过max_seconds或类型不符时关闭连接并抛出ResponseRejected；
+    之后 response.content / response.text 可正常使用
+    """
+    content_type = response.headers.get('Content-Type', '')
+    try:
+        if not check_content_type(content_type, allowed_types):
+            raise ResponseRejected(f'不支持的内容类型: {content_type}')
+
+        length = response.headers.get('Content-Length')
+        if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+            raise ResponseRejected(f'响应大小 {int(length)} 字节超过上限 {max_bytes}')
+
+        start = time.monotonic()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise ResponseRejected(f'响应大小超过上限 {max_bytes} 字节')
+            if max_seconds and time.monotonic() - start > max_seconds:
+                raise ResponseRejected(f'读取响应超过 {max_seconds} 秒')
+            chunks.append(chunk)
+    except ResponseRejected:
+        response.close()
+        raise
+
+    body = b''.join(chunks)
+    response._content = body
+    response._content_consumed = True
+    response.encoding = detect_encoding(body, content_type)
+    return response
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+请求头配置 - User-Agent池
+功能：
+1. User-Agent从配置（user_agents）或本地文件（user_agents_file，每行一个，#开头为注释）读取，
+   同一文件只读取一次；都没有时使用内置列表，不依赖网络
+2. 启动时为每个User-Agent预先生成一套只读请求头（Accept等与浏览器类型一致），
+   发请求时只做查表
+3. 同一主机固定使用同一套请求头（像同一个浏览器连续访问），不同主机、不同爬虫实例分散到不同的请求头；
+   被限流或拒绝时可切换该主机的请求头
+"""
+
+import logging
+import os
+import random
+import threading
+import zlib
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+DEFAULT_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0'
+)
+
+ACCEPT_LANGUAGE = 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
+
+# 各浏览器默认的Accept头
+BROWSER_ACCEPT = {
+    'chrome': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'firefox': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'safari': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+
+_file_cache = {}
+_file_lock = threading.Lock()
+
+
+def browser_family(user_agent):
+    if 'Firefox/' in user_agent:
+        return 'firefox'
+    if 'Chrome/' in user_agent or 'Chromium/' in user_agent:
+        return 'chrome'
+    if 'Safari/' in user_agent:
+        return 'safari'
+    return 'chrome'
+
+
+def build_headers(user_agent):
+    """为一个User-Agent生成一套只读请求头"""
+    return MappingProxyType({
+        'User-Agent': user_agent,
+        'Accept': BROWSER_ACCEPT[browser_family(user_agent)],
+        'Accept-Language': ACCEPT_LANGUAGE,
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    })
+
+
+def read_user_agents_file(path):
+    """读取User-Agent文件，同一文件只读取一次"""
+    path = os.path.abspath(path)
+    with _file_lock:
+        if path not in _file_cache:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _file_cache[path] = tuple(
+                        line.strip() for line in f
+                        if line.strip() and not line.lstrip().startswith('#')
+                    )
+            except Exception as e:
+                logging.error(f'读取User-Agent文件失败 {path}: {e}')
+                _file_cache[path] = ()
+        return _file_cache[path]
+
+
+def load_user_agents(user_agents=None, user_agents_file=None):
+    """合并配置列表和本地文件中的User-Agent（去重并保持顺序），都为空时使用内置列表"""
+    agents = list(user_agents or [])
+    if user_agents_file:
+        agents.extend(read_user_agents_file(user_agents_file))
+    agents = list(dict.fromkeys(agent.strip() for agent in agents if agent and agent.strip()))
+    return tuple(agents) or DEFAULT_USER_AGENTS
+
+
+class HeaderProfiles:
+    """
+    预先生成的请求头集合，按主机分配
+
+    用法：
+        profiles = HeaderProfiles(config.get('user_agents'), config.get('user_agents_file'))
+        requests.get(url, headers=profiles.for_url(url))
+    """
+
+    def __init__(self, user_agents=None, user_agents_file=None, seed=None):
+        self.user_agents = load_user_agents(user_agents, user_agents_file)
+        self.profiles = tuple(build_headers(agent) for agent in self.user_agents)
+        # 每个实例随机偏移，同一主机在不同爬虫实例中使用不同的请求头
+        self._offset = random.Random(seed).randrange(len(self.profiles))
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def _index(self, host):
+        return (zlib.crc32(host.encode('utf-8')) + self._offset) % len(self.profiles)
+
+    def for_host(self, host):
+        """主机对应的请求头（只读映射，可直接传给requests）"""
+        index = self._hosts.get(host)
+        if index is None:
+            with self._lock:
+                index = self._hosts.setdefault(host, self._index(host))
+        return self.profiles[index]
+
+    def for_url(self, url):
+        return self.for_host(urlparse(url).netloc)
+
+    def rotate(self, host):
+        """主机切换到下一套请求头（例如收到403或429后）"""
+        with self._lock:
+            index = self._hosts.get(host, self._index(host))
+            self._hosts[host] = (index + 1) % len(self.profiles)
+            return self.profiles[self._hosts[host]]
+
+    def for_session(self):
+        """会话级别使用的一套请求头"""
+        return self.profiles[self._offset]
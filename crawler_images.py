@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章图片 - 内容寻址的图片下载和缩略图
+功能：
+1. 爬虫解析文章时只提交图片地址（放入有界队列，队列满时丢弃），下载由独立的线程完成，不拖慢正文爬取
+2. 图片下载使用单独的会话和带宽预算（令牌桶，bandwidth_kbps），不与正文请求争抢带宽
+3. 去重：同一图片地址只下载一次；不同地址内容相同（SHA-256相同）的图片只保存一份
+4. 按内容哈希存放：<root>/ab/cd/<sha256>.jpg；单张图片超过 max_image_kb、
+   总大小超过 max_total_mb 时不再保存
+5. 缩略图在进程池中生成（Pillow，未安装时不生成缩略图），不占用爬虫进程的GIL
+6. 每篇文章引用的图片记录在 article_images 表（images.db），/api/images?url= 查询
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+from crawler_metrics import metrics
+from crawler_proxies import make_session
+
+IMAGES_TOTAL = metrics.counter(
+    'crawler_images_total', '图片处理结果（stored/duplicate/known/dropped/full/rejected/error）', ['result']
+)
+IMAGE_BYTES = metrics.counter('crawler_image_bytes_total', '下载的图片字节数')
+
+IMAGE_EXTENSIONS = {
+    'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif', 'image/webp': '.webp'
+}
+# 懒加载图片常用的属性
+SOURCE_ATTRIBUTES = ('data-src', 'data-original', 'src')
+CHUNK_SIZE = 16 * 1024
+
+
+def extract_image_urls(soup, page_url, selector=None, limit=5):
+    """页面（或正文区块）中的图片地址，转为绝对地址并去重，最多limit个"""
+    urls = []
+    for image in soup.select(selector) if selector else soup.find_all('img'):
+        source = next((image.get(name) for name in SOURCE_ATTRIBUTES if image.get(name)), None)
+        if not source or source.startswith('data:'):
+            continue
+        source = urljoin(page_url, source.strip())
+        if source.startswith('http') and source not in urls:
+            urls.append(source)
+            if len(urls) >= limit:
+                break
+    return urls
+
+
+def make_thumbnail(source, destination, size):
+    """进程池中执行：生成JPEG缩略图，返回原图的 (宽, 高)"""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        dimensions = image.size
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        image.save(destination, 'JPEG', quality=80)
+    return dimensions
+
+
+def load_article_images(db_path, article_url):
+    """文章引用的图片（按在文章中的顺序），数据库不存在时返回空列表"""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT a.image_url, i.sha256, i.path, i.thumb_path, i.size, i.width, i.height, i.content_type
+            FROM article_images a JOIN images i ON i.sha256 = a.sha256
+            WHERE a.article_url = ?
+            ORDER BY a.position
+        ''', (article_url,)).fetchall()
+    finally:
+        conn.close()
+    columns = ('url', 'sha256', 'path', 'thumb_path', 'size', 'width', 'height', 'content_type')
+    return [dict(zip(columns, row)) for row in rows]
+
+
+class BandwidthBudget:
+    """令牌桶：平均每秒最多 bytes_per_second 字节，空闲后最多积累一秒的突发"""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.tokens = 0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        """扣除amount字节，预算不足时等待（多个线程共享同一预算）"""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class ImagePipeline:
+    """
+    文章图片下载管道（线程安全）
+
+    用法：
+        images = ImagePipeline.from_config(config['image_settings'], headers)
+        images.submit(article_url, extract_image_urls(soup, article_url))   # 立即返回
+        images.close()                                                      # 爬取结束时等待队列处理完
+    """
+
+    def __init__(self, root='news_data/images', db_path='news_data/images.db', workers=2, queue_size=500,
+                 bandwidth_kbps=512, max_image_kb=2048, min_image_bytes=1024, max_total_mb=1024,
+                 max_per_article=5, thumbnail_size=(240, 240), thumbnail_processes=1, timeout=15,
+                 close_timeout=60, headers=None):
+        self.root = root
+        self.db_path = db_path
+        self.workers = workers
+        self.max_image_bytes = int(max_image_kb * 1024)
+        self.min_image_bytes = min_image_bytes
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.max_per_article = max_per_article
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.thumbnail_processes = thumbnail_processes
+        self.timeout = timeout
+        self.close_timeout = close_timeout
+        self.budget = BandwidthBudget(int(bandwidth_kbps * 1024))
+
+        self.session = make_session(pool_size=workers)
+        self.session.headers.update(headers or {})
+        self.session.headers['Accept'] = 'image/webp,image/png,image/jpeg,image/*;q=0.8'
+
+        self.queue = queue.Queue(queue_size)
+        self._threads = []
+        self._executor = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+        if thumbnail_processes and importlib.util.find_spec('PIL') is None:
+            logging.warning('未安装Pillow，图片不生成缩略图')
+            self.thumbnail_processes = 0
+
+        for directory in (root, os.path.dirname(db_path)):
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_tables()
+        self.total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM images').fetchone()[0]
+
+    @classmethod
+    def from_config(cls, settings, headers=None):
+        """按 image_settings 创建，enabled 为 false 时返回None"""
+        settings = settings or {}
+        if not settings.get('enabled'):
+            return None
+        return cls(
+            root=settings.get('root', 'news_data/images'),
+            db_path=settings.get('db_path', 'news_data/images.db'),
+            workers=settings.get('workers', 2),
+            queue_size=settings.get('queue_size', 500),
+            bandwidth_kbps=settings.get('bandwidth_kbps', 512),
+            max_image_kb=settings.get('max_image_kb', 2048),
+            min_image_bytes=settings.get('min_image_bytes', 1024),
+            max_total_mb=settings.get('max_total_mb', 1024),
+            max_per_article=settings.get('max_per_article', 5),
+            thumbnail_size=settings.get('thumbnail_size', (240, 240)),
+            thumbnail_processes=settings.get('thumbnail_processes', 1),
+            timeout=settings.get('timeout', 15),
+            close_timeout=settings.get('close_timeout', 60),
+            headers=headers
+        )
+
+    def _init_tables(self):
+        with self._lock:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS images (
+                    sha256 TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    thumb_path TEXT,
+                    size INTEGER,
+                    width INTEGER,
+                    height INTEGER,
+                    content_type TEXT,
+                    created_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS image_urls (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT,
+                    status TEXT,
+                    fetched_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS article_images (
+                    article_url TEXT NOT NULL,
+                    image_url TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    position INTEGER,
+                    PRIMARY KEY (article_url, image_url)
+                );
+            ''')
+            self._conn.commit()
+
+    # ---------- 提交 ----------
+
+    def start(self):
+        """启动下载线程（第一次提交时自动启动）"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'image-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, article_url, image_urls):
+        """提交文章的图片地址，不等待下载；返回放入队列的数量（队列满时其余的丢弃）"""
+        if not self._threads:
+            self.start()
+        queued = 0
+        for position, image_url in enumerate(image_urls[:self.max_per_article]):
+            try:
+                self.queue.put_nowait((article_url, image_url, position))
+                queued += 1
+            except queue.Full:
+                IMAGES_TOTAL.inc(len(image_urls[:self.max_per_article]) - queued, result='dropped')
+                break
+        return queued
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                result = self.process(*item)
+                IMAGES_TOTAL.inc(result=result)
+            except Exception as e:
+                logging.error(f'处理图片失败 {item[1]}: {e}')
+                IMAGES_TOTAL.inc(result='error')
+            finally:
+                self.queue.task_done()
+
+    # ---------- 下载和保存 ----------
+
+    def process(self, article_url, image_url, position=0):
+        """下载（或复用）一张图片并记录文章引用，返回处理结果"""
+        with self._lock:
+            row = self._conn.execute('SELECT sha256, status FROM image_urls WHERE url = ?', (image_url,)).fetchone()
+        if row:
+            # 地址已处理过：已保存的直接引用，失败的不再重试
+            if row[0]:
+                self._link(article_url, image_url, row[0], position)
+            return 'known'
+        if self.total_bytes >= self.max_total_bytes:
+            return 'full'
+
+        try:
+            body, content_type = self.download(image_url, article_url)
+        except ValueError as e:
+            logging.debug(f'跳过图片 {image_url}: {e}')
+            self._record_url(image_url, None, 'rejected')
+            return 'rejected'
+
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            exists = self._conn.execute('SELECT 1 FROM images WHERE sha256 = ?', (sha256,)).fetchone()
+        if exists:
+            self._record_url(image_url, sha256, 'duplicate')
+            self._link(article_url, image_url, sha256, position)
+            return 'duplicate'
+
+        path = self.store(sha256, body, content_type)
+        with self._lock:
+            inserted = self._conn.execute('''
+                INSERT OR IGNORE INTO images (sha256, path, size, content_type, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (sha256, path, len(body), content_type, time.strftime('%Y-%m-%d %H:%M:%S'))).rowcount
+            self._conn.commit()
+            # 两个线程同时下载到相同内容时只计一次
+            self.total_bytes += len(body) if inserted else 0
+        self._record_url(image_url, sha256, 'stored')
+        self._link(article_url, image_url, sha256, position)
+        self.request_thumbnail(sha256, path)
+        return 'stored'
+
+    def download(self, image_url, referer):
+        """按带宽预算流式下载图片，返回 (内容, Content-Type)；类型或大小不符时抛出ValueError"""
+        response = self.session.get(image_url, stream=True, timeout=self.timeout, headers={'Referer': referer})
+        try:
+            if response.status_code != 200:
+                raise ValueError(f'状态码 {response.status_code}')
+            content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+            if content_type not in IMAGE_EXTENSIONS:
+                raise ValueError(f'不支持的图片类型: {content_type}')
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and int(length) > self.max_image_bytes:
+                raise ValueError(f'图片大小 {int(length)} 字节超过上限')
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                self.budget.consume(len(chunk))
+                size += len(chunk)
+                if size > self.max_image_bytes:
+                    raise ValueError('图片大小超过上限')
+                chunks.append(chunk)
+        finally:
+            response.close()
+        IMAGE_BYTES.inc(size)
+        if size < self.min_image_bytes:
+            # 图标、统计像素等
+            raise ValueError(f'图片太小（{size} 字节）')
+        return b''.join(chunks), content_type
+
+    def store(self, sha256, body, content_type):
+        """写入内容寻址的路径，返回相对root的路径"""
+        relative = os.path.join(sha256[:2], sha256[2:4], sha256 + IMAGE_EXTENSIONS[content_type])
+        destination = os.path.join(self.root, relative)
+        if not os.path.exists(destination):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            temporary = f'{destination}.{threading.get_ident()}.tmp'
+            with open(temporary, 'wb') as f:
+                f.write(body)
+            os.replace(temporary, destination)
+        return relative
+
+    def _record_url(self, image_url, sha256, status):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO image_urls (url, sha256, status, fetched_at) VALUES (?, ?, ?, ?)',
+                               (image_url, sha256, status, time.strftime('%Y-%m-%d %H:%M:%S')))
+            self._conn.commit()
+
+    def _link(self, article_url, image_url, sha256, position):
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR IGNORE INTO article_images (article_url, image_url, sha256, position)
+                VALUES (?, ?, ?, ?)
+            ''', (article_url, image_url, sha256, position))
+            self._conn.commit()
+
+    # ---------- 缩略图 ----------
+
+    def request_thumbnail(self, sha256, path):
+        """把缩略图任务交给进程池，完成后记录缩略图路径和原图尺寸"""
+        if not self.thumbnail_processes:
+            return
+        with self._start_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.thumbnail_processes)
+        thumb_path = os.path.join('thumbs', sha256[:2], sha256 + '.jpg')
+        future = self._executor.submit(make_thumbnail, os.path.join(self.root, path),
+                                       os.path.join(self.root, thumb_path), self.thumbnail_size)
+        future.add_done_callback(lambda done: self._thumbnail_done(done, sha256, thumb_path))
+
+    def _thumbnail_done(self, future, sha256, thumb_path):
+        try:
+            width, height = future.result()
+        except Exception as e:
+            logging.warning(f'生成缩略图失败 {sha256}: {e}')
+            return
+        with self._lock:
+            self._conn.execute('UPDATE images SET thumb_path = ?, width = ?, height = ? WHERE sha256 = ?',
+                               (thumb_path, width, height, sha256))
+            self._conn.commit()
+
+    # ---------- 结束和查询 ----------
+
+    def close(self, timeout=None):
+        """等待已提交的图片处理完（最多timeout秒，默认close_timeout），然后停止线程和进程池"""
+        timeout = self.close_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if self.queue.unfinished_tasks:
+            logging.warning(f'图片队列未处理完，放弃剩余 {self.queue.qsize()} 张')
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    break
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()) + 1)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def images_for(self, article_url):
+        return load_article_images(self.db_path, article_url)
+
+    def stats(self):
+        with self._lock:
+            images, thumbnails = self._conn.execute('SELECT COUNT(*), COUNT(thumb_path) FROM images').fetchone()
+            articles = self._conn.execute('SELECT COUNT(DISTINCT article_url) FROM article_images').fetchone()[0]
+        return {
+            'images': images,
+            'thumbnails': thumbnails,
+            'articles': articles,
+            'total_mb': round(self.total_bytes / 1024 / 1024, 2),
+            'queued': self.queue.qsize()
+        }
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+爬取任务队列与跨进程事件
+功能：
+1. Web进程只负责提交爬取任务，由独立的任务执行进程领取并运行
+2. 执行进程把状态和事件写入事件日志表
+3. 每个Web进程用一个后台线程跟踪事件日志，转发给本进程的SSE订阅者
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+
+def _connect(db_path, check_same_thread=True):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None,
+                           check_same_thread=check_same_thread)
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+def init_job_tables(db_path):
+    """创建任务队列、事件日志、状态快照和指标快照表"""
+    conn = _connect(db_path)
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_type TEXT NOT NULL,
+                params TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                stop_requested INTEGER NOT NULL DEFAULT 0,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                data TEXT,
+                created_at REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                status TEXT,
+                updated_at REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_metrics (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                snapshot TEXT,
+                updated_at REAL
+            )
+        ''')
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    """基于SQLite的爬取任务队列"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def submit(self, job_type, params=None):
+        conn = _connect(self.db_path)
+        try:
+            cursor = conn.execute(
+                'INSERT INTO crawl_jobs (job_type, params, created_at) VALUES (?, ?, ?)',
+                (job_type, json.dumps(params or {}, ensure_ascii=False), time.time())
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def claim(self):
+        """领取最早提交的待执行任务"""
+        conn = _connect(self.db_path)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT id, job_type, params FROM crawl_jobs
+                WHERE status = 'pending' AND stop_requested = 0
+                ORDER BY id LIMIT 1
+            ''').fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE crawl_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                    (time.time(), row[0])
+                )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+        if not row:
+            return None
+        return {'id': row[0], 'job_type': row[1], 'params': json.loads(row[2] or '{}')}
+
+    def finish(self, job_id, status='finished'):
+        conn = _connect(self.db_path)
+        try:
+            conn.execute('UPDATE crawl_jobs SET status = ?, finished_at = ? WHERE id = ?',
+                         (status, time.time(), job_id))
+        finally:
+            conn.close()
+
+    def request_stop(self):
+        """请求停止所有未完成的任务，返回受影响的任务数"""
+        conn = _connect(self.db_path)
+        try:
+            cursor = conn.execute('''
+                UPDATE crawl_jobs SET stop_requested = 1
+                WHERE status IN ('pending', 'running')
+            ''')
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def stop_requested(self, job_id):
+        conn = _connect(self.db_path)
+        try:
+            row = conn.execute('SELECT stop_requested FROM crawl_jobs WHERE id = ?',
+                               (job_id,)).fetchone()
+            return bool(row and row[0])
+        finally:
+            conn.close()
+
+    def recover(self):
+        """执行进程启动时，把上次异常退出遗留的running任务标记为中断"""
+        conn = _connect(self.db_path)
+        try:
+            conn.execute(
+                "UPDATE crawl_jobs SET status = 'interrupted', finished_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+        finally:
+            conn.close()
+
+
+def apply_event(status, event_type, data):
+    """把一条事件应用到状态快照上"""
+    if event_type == 'status':
+        status.clear()
+        status.update(data)
+    elif event_type == 'progress':
+        status.update(data)
+
+
+class EventLog:
+    """
+    事件日志：由任务执行进程写入，Web进程读取
+    """
+
+    def __init__(self, db_path, keep_events=5000):
+        self.db_path = db_path
+        self.keep_events = keep_events
+        self.status = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._appended = 0
+
+    def _get_conn(self):
+        if self._conn is None:
+            self._conn = _connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def record(self, event_type, data):
+        """
+        EventBus监听器：写入事件，并同步保存最新状态快照
+        """
+        with self._lock:
+            conn = self._get_conn()
+            now = time.time()
+            apply_event(self.status, event_type, data)
+
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT INTO crawl_events (event_type, data, created_at) VALUES (?, ?, ?)',
+                         (event_type, json.dumps(data, ensure_ascii=False, default=str), now))
+            if event_type in ('status', 'progress'):
+                conn.execute('''
+                    INSERT INTO crawl_state (id, status, updated_at) VALUES (1, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET status = excluded.status,
+                                                  updated_at = excluded.updated_at
+                ''', (json.dumps(self.status, ensure_ascii=False, default=str), now))
+            conn.execute('COMMIT')
+
+            self._appended += 1
+            if self._appended % 500 == 0:
+                conn.execute('DELETE FROM crawl_events WHERE id <= '
+                             '(SELECT MAX(id) FROM crawl_events) - ?', (self.keep_events,))
+
+    def save_metrics(self, snapshot):
+        """保存执行进程的指标快照"""
+        with self._lock:
+            self._get_conn().execute('''
+                INSERT INTO crawl_metrics (id, snapshot, updated_at) VALUES (1, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET snapshot = excluded.snapshot,
+                                              updated_at = excluded.updated_at
+            ''', (json.dumps(snapshot, ensure_ascii=False), time.time()))
+
+    def load_metrics(self, conn):
+        row = conn.execute('SELECT snapshot FROM crawl_metrics WHERE id = 1').fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_state(self, conn):
+        """读取最新状态快照和最后一条事件的ID"""
+        row = conn.execute('SELECT status FROM crawl_state WHERE id = 1').fetchone()
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM crawl_events').fetchone()[0]
+        return (json.loads(row[0]) if row else None), last_id
+
+    def read_since(self, conn, last_id, limit=500):
+        rows = conn.execute(
+            'SELECT id, event_type, data FROM crawl_events WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, limit)
+        ).fetchall()
+        return [(row[0], row[1], json.loads(row[2])) for row in rows]
+
+
+class EventRelay(threading.Thread):
+    """
+    Web进程中的事件转发线程
+
+    定期读取事件日志中的新事件，交给handler处理（更新状态镜像、
+    递增缓存版本号、推送给SSE订阅者）
+    """
+
+    def __init__(self, event_log, read_pool, handler, interval=0.5):
+        super().__init__(daemon=True)
+        self.event_log = event_log
+        self.read_pool = read_pool
+        self.handler = handler
+        self.interval = interval
+        self._stopped = threading.Event()
+        self.last_id = 0
+
+    def load_state(self):
+        with self.read_pool.connection() as conn:
+            status, self.last_id = self.event_log.load_state(conn)
+        return status
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.read_pool.connection() as conn:
+                    events = self.event_log.read_since(conn, self.last_id)
+                for event_id, event_type, data in events:
+                    self.last_id = event_id
+                    self.handler(event_type, data)
+            except Exception as e:
+                logging.error(f'读取爬取事件失败: {e}')
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语料级TF-IDF关键词提取
+功能：
+1. 每篇文章只分词一次，按 analysis_settings 中的 stop_words、min_word_length 过滤
+2. 维护本地语料的文档频率表（增量更新，保存在数据库的keyword_df表中），
+   IDF来自已爬取的新闻而不是jieba的通用IDF表；语料太少时暂用jieba的IDF
+3. 一批文章组成稀疏词频矩阵（scipy.sparse），TF-IDF和每篇的top-k一次向量化计算
+4. 大批量时分词可使用多进程
+5. 命令行按全部语料重新计算已有新闻的关键词：
+   python crawler_keywords.py rebuild --db news_data/news.db --table news
+"""
+
+import argparse
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# 纯数字、标点或空白的词不作为关键词
+_NOISE = re.compile(r'^[\W\d_]+$', re.UNICODE)
+
+# 文档总数在keyword_df表中的存储键（空字符串不会是分词结果）
+_DOC_COUNT_KEY = ''
+
+
+def tokenize(text, stop_words=frozenset(), min_word_length=2):
+    """分词并过滤停用词、短词和纯数字/标点"""
+    import jieba
+
+    return [word for word in jieba.cut(text or '')
+            if len(word) >= min_word_length and word not in stop_words and not _NOISE.match(word)]
+
+
+def _tokenize_chunk(texts, stop_words, min_word_length):
+    """进程池中执行的分词任务"""
+    return [tokenize(text, stop_words, min_word_length) for text in texts]
+
+
+class KeywordEngine:
+    """
+    TF-IDF关键词引擎（线程安全）
+
+    用法：
+        engine = KeywordEngine(stop_words=['的', '了'])
+        engine.extract_batch(texts)        # [[关键词, ...], ...]，同时把这些文章计入语料
+        engine.extract(text)               # 单篇文章
+    """
+
+    def __init__(self, stop_words=(), min_word_length=2, top_k=10, min_corpus_docs=50, processes=1):
+        self.stop_words = frozenset(stop_words or ())
+        self.min_word_length = min_word_length
+        self.top_k = top_k
+        # 语料少于此文档数时IDF使用jieba的通用IDF表
+        self.min_corpus_docs = min_corpus_docs
+        self.processes = processes or os.cpu_count() or 1
+
+        self.vocabulary = {}
+        self.terms = []
+        self.df = None
+        self.num_docs = 0
+        self.dirty = False
+        self._prior = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, analysis_settings, processes=1):
+        settings = (analysis_settings or {}).get('keyword_extraction', {})
+        return cls(
+            stop_words=settings.get('stop_words', ()),
+            min_word_length=settings.get('min_word_length', 2),
+            top_k=settings.get('top_k', 10),
+            min_corpus_docs=settings.get('min_corpus_docs', 50),
+            processes=processes
+        )
+
+    def tokenize_batch(self, texts):
+        """批量分词；文章较多且允许多进程时分块交给进程池"""
+        texts = list(texts)
+        if self.processes <= 1 or len(texts) < 50 * self.processes:
+            return _tokenize_chunk(texts, self.stop_words, self.min_word_length)
+
+        size = math.ceil(len(texts) / (self.processes * 4))
+        chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+        results = []
+        with ProcessPoolExecutor(self.processes) as executor:
+            for tokens in executor.map(_tokenize_chunk, chunks, [self.stop_words] * len(chunks),
+                                       [self.min_word_length] * len(chunks)):
+                results.extend(tokens)
+        return results
+
+    def count_matrix(self, token_lists, update=True):
+        """
+        词频稀疏矩阵（文章 × 词表），update=True 时把这些文章计入文档频率
+        """
+        import numpy as np
+        from scipy import sparse
+
+        with self._lock:
+            # 直接按CSR格式构建：每篇文章的(词, 词频)连续存放
+            indices = []
+            data = []
+            indptr = [0]
+            for tokens in token_lists:
+                for token, count in Counter(tokens).items():
+                    column = self.vocabulary.get(token)
+                    if column is None:
+                        column = self.vocabulary[token] = len(self.terms)
+                        self.terms.append(token)
+                    indices.append(column)
+                    data.append(count)
+                indptr.append(len(indices))
+            size = len(self.terms)
+
+            counts = sparse.csr_matrix(
+                (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+                shape=(len(token_lists), size)
+            )
+
+            if update:
+                self._grow(size)
+                # 每个(文章, 词)只出现一次，按列计数即文档频率
+                self.df[:size] += np.bincount(counts.indices, minlength=size)
+                self.num_docs += len(token_lists)
+                self.dirty = True
+        return counts
+
+    def _grow(self, size):
+        import numpy as np
+
+        if self.df is None:
+            self.df = np.zeros(max(size, 1024), dtype=np.int64)
+        elif size > len(self.df):
+            df = np.zeros(max(size, len(self.df) * 2), dtype=np.int64)
+            df[:len(self.df)] = self.df
+            self.df = df
+
+    def idf(self, size):
+        """词表前size个词的IDF（平滑：ln((1+N)/(1+df)) + 1）"""
+        import numpy as np
+
+        with self._lock:
+            self._grow(size)
+            if self.num_docs >= self.min_corpus_docs:
+                return np.log((1 + self.num_docs) / (1 + self.df[:size])) + 1
+            return self._prior_idf(size)
+
+    def _prior_idf(self, size):
+        """语料不足时的IDF：jieba通用IDF表，表中没有的词取中位数"""
+        import numpy as np
+        # jieba.analyse导入和IDF表加载耗时近1秒，只在语料不足时用到
+        import jieba.analyse
+
+        tfidf = jieba.analyse.default_tfidf
+        known = 0 if self._prior is None else len(self._prior)
+        if known < size:
+            extra = np.array([tfidf.idf_freq.get(term, tfidf.median_idf) for term in self.terms[known:size]])
+            self._prior = extra if self._prior is None else np.concatenate([self._prior, extra])
+        return self._prior[:size]
+
+    def top_terms(self, counts, top_k=None, with_weight=False):
+        """按TF-IDF取每篇文章的top-k词（向量化计算，不逐篇排序）"""
+        import numpy as np
+
+        top_k = top_k or self.top_k
+        num_rows = counts.shape[0]
+        if counts.nnz == 0:
+            return [[] for _ in range(num_rows)]
+
+        idf = self.idf(counts.shape[1])
+        lengths = np.diff(counts.indptr)
+        row_ids = np.repeat(np.arange(num_rows), lengths)
+        totals = np.bincount(row_ids, weights=counts.data, minlength=num_rows)
+        scores = counts.data / totals[row_ids] * idf[counts.indices]
+
+        # 按(文章, 得分降序)排序后，每篇文章的前top_k项即结果
+        order = np.lexsort((-scores, row_ids))
+        rank = np.arange(len(order)) - counts.indptr[row_ids[order]]
+        keep = order[rank < top_k]
+        boundaries = np.searchsorted(row_ids[keep], np.arange(num_rows + 1))
+
+        terms = self.terms
+        results = []
+        for row in range(num_rows):
+            selected = keep[boundaries[row]:boundaries[row + 1]]
+            words = [terms[column] for column in counts.indices[selected]]
+            if with_weight:
+                results.append(list(zip(words, scores[selected].round(6).tolist())))
+            else:
+                results.append(words)
+        return results
+
+    def extract_batch(self, texts, top_k=None, update=True, with_weight=False):
+        """一批文章的关键词，update=True 时同时计入语料"""
+        counts = self.count_matrix(self.tokenize_batch(texts), update)
+        return self.top_terms(counts, top_k, with_weight)
+
+    def extract(self, text, top_k=None):
+        return self.extract_batch([text], top_k)[0]
+
+    def reset(self):
+        """清空语料统计"""
+        with self._lock:
+            self.vocabulary = {}
+            self.terms = []
+            self.df = None
+            self.num_docs = 0
+            self._prior = None
+            self.dirty = True
+
+    def init_table(self, conn):
+        conn.execute('CREATE TABLE IF NOT EXISTS keyword_df (term TEXT PRIMARY KEY, df INTEGER NOT NULL)')
+
+    def load(self, conn):
+        """从keyword_df表加载文档频率"""
+        import numpy as np
+
+        rows = conn.execute('SELECT term, df FROM keyword_df').fetchall()
+        with self._lock:
+            self.vocabulary = {}
+            self.terms = []
+            frequencies = []
+            for term, df in rows:
+                if term == _DOC_COUNT_KEY:
+                    self.num_docs = df
+                    continue
+                self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+                frequencies.append(df)
+            self.df = None
+            self._prior = None
+            self._grow(len(frequencies))
+            self.df[:len(frequencies)] = np.array(frequencies, dtype=np.int64)
+            self.dirty = False
+
+    def save(self, conn):
+        """把文档频率写入keyword_df表（没有变化时跳过）"""
+        with self._lock:
+            if not self.dirty:
+                return
+            rows = [(_DOC_COUNT_KEY, self.num_docs)]
+            rows.extend(zip(self.terms, self.df[:len(self.terms)].tolist()))
+            self.dirty = False
+        conn.execute('DELETE FROM keyword_df')
+        conn.executemany('INSERT INTO keyword_df (term, df) VALUES (?, ?)', rows)
+
+
+def rebuild(db_path, table, engine, batch_size=1000):
+    """
+    按全部语料重新计算表中所有新闻的关键词，返回处理条数
+
+    第一遍分词并统计文档频率，第二遍用完整语料的IDF计算关键词（词频矩阵保留在内存中，不重复分词）
+    """
+    from crawler_storage import fill_content
+
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        hash_key = 'url_hash' if 'url_hash' in columns else None
+        select = f'SELECT id, url, content{", url_hash" if hash_key else ""} FROM {table} ORDER BY id'
+
+        engine.reset()
+        batches = []
+        cursor = conn.execute(select)
+        names = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            # 压缩存储的正文
+            news = fill_content(conn, [dict(zip(names, row)) for row in rows], hash_key)
+            counts = engine.count_matrix(engine.tokenize_batch([item['content'] or '' for item in news]))
+            batches.append(([item['id'] for item in news], counts))
+            logging.info(f'已分词 {engine.num_docs} 篇')
+
+        total = 0
+        for ids, counts in batches:
+            keywords = engine.top_terms(counts)
+            conn.executemany(f'UPDATE {table} SET keywords = ? WHERE id = ?',
+                             [(', '.join(words), row_id) for words, row_id in zip(keywords, ids)])
+            total += len(ids)
+
+        engine.init_table(conn)
+        engine.save(conn)
+        conn.commit()
+        return total
+    finally:
+        conn.close()
+
+
+def main():
+    import json
+
+    parser = argparse.ArgumentParser(description='语料级TF-IDF关键词工具')
+    parser.add_argument('command', choices=['rebuild', 'extract'])
+    parser.add_argument('text', nargs='?', default='', help='extract: 要提取关键词的文字')
+    parser.add_argument('--config', default='crawler_config.json', help='读取analysis_settings中的停用词等设置')
+    parser.add_argument('--db', default='news_data/news.db')
+    parser.add_argument('--table', default='news')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=0, help='分词进程数（默认CPU核数）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    settings = {}
+    if os.path.exists(args.config):
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('analysis_settings', {})
+    engine = KeywordEngine.from_config(settings, processes=args.processes or os.cpu_count())
+
+    if args.command == 'rebuild':
+        total = rebuild(args.db, args.table, engine, args.batch_size)
+        print(f'{args.db} [{args.table}]: 重新计算 {total} 条新闻的关键词，词表 {len(engine.terms)} 个词')
+        if args.table == 'news_summary':
+            print('关键词已更新，请执行 python crawler_search.py rebuild 重建全文索引')
+    else:
+        if os.path.exists(args.db):
+            conn = sqlite3.connect(args.db)
+            try:
+                engine.load(conn)
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                conn.close()
+        for word, weight in engine.extract_batch([args.text], update=False, with_weight=True)[0]:
+            print(f'{weight:.4f}  {word}')
+
+
+if __name__ == '__main__':
+    main()
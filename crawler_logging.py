@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+异步日志 - 爬虫和管理器共用
+功能：
+1. 业务线程只把日志记录放入内存队列（QueueHandler），
+   由后台监听线程（QueueListener）写文件和控制台，文件和控制台I/O不再阻塞爬取线程
+2. 日志文件按 monitoring.max_log_size_mb 大小轮转
+3. 文件中每行一条JSON记录，控制台保持原有文本格式
+4. 同一调用位置的INFO及以下日志限速（例如逐条新闻的“保存新闻”），超出部分丢弃，
+   下一条放行的日志注明省略条数；警告和错误不限速
+5. 多个进程（gunicorn工作进程、任务执行进程、分布式工作者等）共用同一个日志文件：
+   每次写入和轮转都持有文件锁，其他进程轮转后重新打开
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，不加锁（多进程同时轮转时可能丢失日志）
+    fcntl = None
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord自带属性，其余属性视为extra字段写入JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_state = {'listener': None, 'options': None, 'pid': None}
+_state_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'process': record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按调用位置（文件+行号）限速的令牌桶
+
+    rate为每秒允许的条数，burst为允许的突发条数
+    """
+
+    def __init__(self, rate=5, burst=20):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not self.rate:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f'{record.getMessage()}（此前省略 {suppressed} 条同类日志）'
+            record.args = None
+            record.suppressed = suppressed
+        return True
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    多进程共用的按大小轮转的日志文件
+
+    写入和轮转都在 <日志文件>.lock 的文件锁内进行；是否轮转按文件当前大小判断，
+    文件已被其他进程轮转（改名）时先重新打开再写入
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        self._lock_file = open(self.baseFilename + '.lock', 'a') if fcntl else None
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename)
+            rotated = not os.path.samestat(current, os.fstat(self.stream.fileno()))
+        except OSError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record):
+        if self._lock_file is None:
+            super().emit(record)
+            return
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.shouldRollover(record):
+                    self.doRollover()
+                logging.FileHandler.emit(self, record)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def _build_handlers(log_file, max_bytes, backup_count):
+    handlers = []
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = SharedRotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers.append(stream_handler)
+    return handlers
+
+
+def setup_logging(config=None, log_file=None, force=False):
+    """
+    配置根日志器（同一进程内只配置一次，force=True 时重新配置）
+
+    config为完整配置（读取其中的monitoring部分），log_file优先于配置中的日志文件
+    """
+    monitoring = (config or {}).get('monitoring', {})
+    options = {
+        'level': monitoring.get('log_level', 'INFO'),
+        'log_file': log_file or monitoring.get('log_file', 'news_crawler.log'),
+        'max_bytes': int(monitoring.get('max_log_size_mb', 100) * 1024 * 1024),
+        'backup_count': monitoring.get('log_backup_count', 5),
+        'rate_limit': monitoring.get('log_rate_limit_per_second', 5)
+    }
+
+    with _state_lock:
+        if _state['listener'] is not None and _state['pid'] == os.getpid() and not force:
+            return
+        _stop_listener()
+
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue,
+            *_build_handlers(options['log_file'], options['max_bytes'], options['backup_count']),
+            respect_handler_level=True
+        )
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(rate=options['rate_limit'],
+                                                burst=options['rate_limit'] * 4))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(options['level'])
+
+        listener.start()
+        _state.update(listener=listener, options=(config, log_file), pid=os.getpid())
+
+
+def _stop_listener():
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        listener.stop()
+    _state['listener'] = None
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止监听线程"""
+    with _state_lock:
+        _stop_listener()
+
+
+def _reinit_after_fork():
+    # fork出的子进程没有父进程的监听线程，按相同参数重新配置
+    if _state['options'] is None:
+        return
+    global _state_lock
+    _state_lock = threading.Lock()
+    _state['listener'] = None
+    config, log_file = _state['options']
+    setup_logging(config, log_file, force=True)
+
+
+class _ForkHook:
+    pass
+
+
+_fork_hook = _ForkHook()
+
+
+def _flush_on_process_exit(_):
+    # multiprocessing以fork方式启动的子进程退出时不执行atexit，改用其退出清理钩子
+    multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=0)
+
+
+atexit.register(shutdown_logging)
+multiprocessing.util.register_after_fork(_fork_hook, _flush_on_process_exit)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
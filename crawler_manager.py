@@ -9,24 +9,63 @@
 5. Web API接口
 """
 
+import argparse
 import json
+import multiprocessing
 import os
 import time
 import threading
 from datetime import datetime
 import sqlite3
-import pandas as pd
-from flask import Flask, render_template, jsonify, request
+from flask import (Blueprint, Flask, Response, current_app, jsonify, render_template,
+                   request, send_from_directory, stream_with_context)
 import logging
 from news_crawler_basic import BasicNewsCrawler
 from news_crawler_advanced import AdvancedNewsCrawler
+from crawler_distributed import SQLiteFrontier, local_worker_prefix, start_local_workers
+from crawler_events import EventBus, event_stream
+from crawler_export import DEFAULT_BATCH_SIZE, EXPORT_FORMATS, parquet_available, stream_export
+from crawler_images import load_article_images
+from crawler_cache import ResponseCache, cached_json_response
+from crawler_dates import backfill as backfill_pub_ts, init_pub_ts, parse_pub_time, parse_range_value
+from crawler_db import ReadConnectionPool, enable_wal
+from crawler_jobs import EventLog, EventRelay, JobQueue, apply_event, init_job_tables
+from crawler_maintenance import DatabaseMaintenance
+from crawler_search import NewsSearchIndex
+from crawler_stories import StoryClusterer
+from crawler_trending import TrendingTracker
+from crawler_storage import ContentStore, fill_content, init_content_tables, url_hash
+from crawler_logging import setup_logging
+from crawler_profiler import PROFILE_DIR, SamplingProfiler, list_profiles
+from crawler_metrics import (QUEUE_DEPTH, STAGE_SECONDS, WORKERS_TOTAL, metrics, render_snapshot,
+                             summarize_delta)
+
+# 汇总表写入列（按url去重）
+SUMMARY_COLUMNS = [
+    'title', 'url', 'content', 'summary', 'pub_time', 'crawl_time', 'source',
+    'category', 'keywords', 'sentiment_score', 'word_count', 'crawler_type', 'pub_ts'
+]
 
 class CrawlerManager:
-    def __init__(self, config_file='crawler_config.json'):
+    # 运行模式：
+    #   inline - 开发模式，Web请求线程内直接启动爬取线程
+    #   web    - 生产Web进程，只提交任务，状态和事件从事件日志同步
+    #   runner - 独立的任务执行进程，领取并执行爬取任务
+    EXECUTION_MODES = ('inline', 'web', 'runner')
+    
+    def __init__(self, config_file='crawler_config.json', execution_mode=None):
         self.config_file = config_file
         self.config = self.load_config()
+        
+        # 配置日志（异步写入，按monitoring设置轮转）
+        setup_logging(self.config)
+        self.execution_mode = execution_mode or self.config.get(
+            'web_interface', {}).get('execution_mode', 'inline')
+        if self.execution_mode not in self.EXECUTION_MODES:
+            raise ValueError(f'未知的运行模式: {self.execution_mode}')
         self.basic_crawler = None
         self.advanced_crawler = None
+        self.frontier = None
         self.crawl_status = {
             'is_running': False,
             'current_task': None,
@@ -37,19 +76,41 @@ class CrawlerManager:
             'errors': []
         }
         self.lock = threading.Lock()
+        self.events = EventBus()
+        
+        # 数据版本号：每次写入汇总数据库后递增，用于API缓存失效
+        self.data_version = 0
+        self.status_version = 0
+        
+        # 正文压缩存储（content_storage.compress 为 true 时开启）
+        self.content_store = ContentStore.from_config(self.config.get('content_storage'))
+        
+        # 热点关键词：新新闻事件到达时按时间窗口累计
+        self.trending = TrendingTracker.from_config(self.config.get('analysis_settings', {}).get('trending'))
+        self.events.add_listener(self.trending.on_event)
+        
+        # 新闻事件聚类（analysis_settings.story_clustering.enabled 为 false 时关闭）
+        self.story_clusterer = StoryClusterer.from_config(self.config.get('analysis_settings'))
         
         # 初始化数据库
         self.init_database()
+        self.read_pool = ReadConnectionPool(self.db_path)
+        self.job_queue = JobQueue(self.db_path)
+        self.event_log = EventLog(self.db_path)
+        self.event_relay = None
+        
+        # 数据库维护（备份、数据保留、空间回收）：由执行进程（或inline模式的进程）在后台定期执行，
+        # web模式只读取维护状态
+        self.maintenance = DatabaseMaintenance.from_config(self.config, self.db_path)
+        if self.maintenance and self.execution_mode != 'web':
+            self.start_in_thread(self.maintenance.run_forever, busy=self.is_crawling)
         
-        # 配置日志
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('crawler_manager.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        if self.execution_mode == 'runner':
+            # 执行进程的所有事件写入事件日志，供Web进程读取
+            self.events.add_listener(self.event_log.record)
+        else:
+            # 提供Web接口的进程在后台加载近期新闻的热点统计，不阻塞启动
+            self.start_in_thread(self.warm_trending)
         
         logging.info('爬虫管理器初始化完成')
     
@@ -104,10 +165,16 @@ class CrawlerManager:
                 total_news INTEGER,
                 success_count INTEGER,
                 error_count INTEGER,
-                config TEXT
+                config TEXT,
+                metrics TEXT
             )
         ''')
         
+        # 旧版本数据库补充指标汇总列
+        task_columns = {row[1] for row in cursor.execute('PRAGMA table_info(crawl_tasks)')}
+        if 'metrics' not in task_columns:
+            cursor.execute('ALTER TABLE crawl_tasks ADD COLUMN metrics TEXT')
+        
         # 创建新闻汇总表
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS news_summary (
@@ -123,220 +190,897 @@ class CrawlerManager:
                 keywords TEXT,
                 sentiment_score REAL,
                 word_count INTEGER,
-                crawler_type TEXT
+                crawler_type TEXT,
+                cluster_id INTEGER,
+                pub_ts INTEGER
             )
         ''')
         
+        # 旧版本数据库补充新闻事件ID列
+        summary_columns = {row[1] for row in cursor.execute('PRAGMA table_info(news_summary)')}
+        if 'cluster_id' not in summary_columns:
+            cursor.execute('ALTER TABLE news_summary ADD COLUMN cluster_id INTEGER')
+        
+        # 按爬取时间排序和加载近期新闻
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_summary_crawl_time ON news_summary (crawl_time)')
+        
+        # 标准化的发布时间（按发布时间范围查询），旧版本数据库新增列后解析已有新闻
+        if init_pub_ts(conn):
+            backfill_pub_ts(conn)
+        
+        if self.content_store:
+            init_content_tables(conn)
+        
+        # 事件表和cluster_id列（web模式只读取，不加载聚类索引）
+        if self.story_clusterer:
+            self.story_clusterer.init_tables(conn)
+            if self.execution_mode != 'web':
+                self.story_clusterer.warm(conn)
+        
+        # 全文索引
+        self.search_index = NewsSearchIndex(self.db_path)
+        index_created = self.search_index.init_index(conn)
+        
         conn.commit()
         conn.close()
+        
+        enable_wal(self.db_path)
+        init_job_tables(self.db_path)
+        
+        if index_created and self.execution_mode != 'web':
+            self.search_index.rebuild()
+    
+    def start_in_thread(self, target, **params):
+        """在后台线程中执行爬取任务（inline模式）"""
+        thread = threading.Thread(target=target, kwargs=params)
+        thread.daemon = True
+        thread.start()
+        return thread
     
-    def start_basic_crawl(self, categories=['news'], max_pages=3):
-        """启动基础爬虫"""
-        def crawl_task():
+    def submit_job(self, job_type, params, task_name):
+        """提交爬取任务，由任务执行进程运行（web模式）"""
+        job_id = self.job_queue.submit(job_type, params)
+        return {'status': 'queued', 'job_id': job_id, 'message': f'{task_name}任务已提交'}
+    
+    def run_jobs(self, poll_interval=1.0, metrics_interval=5.0):
+        """任务执行进程主循环（runner模式）"""
+        runners = {
+            'basic': self.run_basic_crawl,
+            'advanced': self.run_advanced_crawl,
+            'distributed': self.run_distributed_crawl
+        }
+        self.job_queue.recover()
+        logging.info('爬取任务执行进程已启动')
+        
+        # 定期保存指标快照，供Web进程的 /api/metrics 读取
+        def flush_metrics():
+            while True:
+                try:
+                    self.event_log.save_metrics(metrics.snapshot())
+                except Exception as e:
+                    logging.error(f'保存指标快照失败: {e}')
+                time.sleep(metrics_interval)
+        
+        threading.Thread(target=flush_metrics, daemon=True).start()
+        
+        while True:
+            job = self.job_queue.claim()
+            if not job:
+                time.sleep(poll_interval)
+                continue
+            
+            logging.info(f'开始执行任务 #{job["id"]}: {job["job_type"]}')
+            watcher_done = threading.Event()
+            
+            def watch_stop(job_id=job['id']):
+                while not watcher_done.wait(poll_interval):
+                    if self.job_queue.stop_requested(job_id):
+                        self.stop_crawl()
+                        return
+            
+            watcher = threading.Thread(target=watch_stop, daemon=True)
+            watcher.start()
             try:
-                with self.lock:
-                    self.crawl_status['is_running'] = True
-                    self.crawl_status['current_task'] = '基础爬虫'
-                    self.crawl_status['start_time'] = datetime.now().isoformat()
-                    self.crawl_status['errors'] = []
-                
-                self.basic_crawler = BasicNewsCrawler()
-                news_data = self.basic_crawler.crawl(categories, max_pages)
-                
-                # 保存到汇总数据库
-                self.save_to_summary_db(news_data, 'basic')
-                
-                with self.lock:
-                    self.crawl_status['is_running'] = False
-                    self.crawl_status['end_time'] = datetime.now().isoformat()
-                    self.crawl_status['total_news'] = len(news_data)
-                
-                logging.info(f'基础爬虫完成，共爬取 {len(news_data)} 条新闻')
-                
+                runners[job['job_type']](**job['params'])
+                self.job_queue.finish(job['id'])
             except Exception as e:
-                with self.lock:
-                    self.crawl_status['is_running'] = False
-                    self.crawl_status['errors'].append(str(e))
-                logging.error(f'基础爬虫执行失败: {e}')
+                logging.error(f'任务 #{job["id"]} 执行失败: {e}')
+                self.job_queue.finish(job['id'], 'failed')
+            finally:
+                watcher_done.set()
+                watcher.join()
+    
+    def start_event_relay(self):
+        """web模式下启动事件转发线程，同步执行进程的状态和事件"""
+        if self.event_relay is not None:
+            return
         
-        thread = threading.Thread(target=crawl_task)
-        thread.daemon = True
-        thread.start()
+        self.event_relay = EventRelay(self.event_log, self.read_pool, self.handle_relayed_event)
+        status = self.event_relay.load_state()
+        if status:
+            with self.lock:
+                self.crawl_status.update(status)
+        self.event_relay.start()
+    
+    def handle_relayed_event(self, event_type, data):
+        """处理来自执行进程的事件"""
+        with self.lock:
+            apply_event(self.crawl_status, event_type, data)
+            if event_type in ('status', 'progress'):
+                self.status_version += 1
+            elif event_type in ('news', 'data_changed'):
+                self.data_version += 1
+        self.events.publish(event_type, data)
+    
+    def start_basic_crawl(self, categories=['news'], max_pages=3, profile=False):
+        """启动基础爬虫（profile=True 时对本次任务进行采样分析）"""
+        params = {'categories': categories, 'max_pages': max_pages, 'profile': profile}
+        if self.execution_mode == 'web':
+            return self.submit_job('basic', params, '基础爬虫')
         
+        self.start_in_thread(self.run_basic_crawl, **params)
         return {'status': 'started', 'message': '基础爬虫已启动'}
     
-    def start_advanced_crawl(self, max_news_per_site=50):
-        """启动高级爬虫"""
-        def crawl_task():
-            try:
+    def run_basic_crawl(self, categories=['news'], max_pages=3, profile=False):
+        """执行基础爬虫任务"""
+        task = None
+        try:
+            task = self.begin_task('basic', {'categories': categories, 'max_pages': max_pages},
+                                   profile)
+            self.update_status(
+                is_running=True,
+                current_task='基础爬虫',
+                task_id=task['id'],
+                progress=0,
+                total_news=0,
+                start_time=datetime.now().isoformat(),
+                end_time=None,
+                errors=[],
+                profile=None
+            )
+            
+            def on_page(done_pages, total_pages, news_list):
                 with self.lock:
-                    self.crawl_status['is_running'] = True
-                    self.crawl_status['current_task'] = '高级爬虫'
-                    self.crawl_status['start_time'] = datetime.now().isoformat()
-                    self.crawl_status['errors'] = []
-                
-                # 获取完整的高级爬虫配置
-                config = self.config.get('advanced_crawler', {})
-                self.advanced_crawler = AdvancedNewsCrawler(config)
-                self.advanced_crawler.run(max_news_per_site)
+                    total_news = self.crawl_status['total_news'] + len(news_list)
+                self.update_progress(progress=int(done_pages * 100 / total_pages),
+                                     total_news=total_news)
+            
+            self.basic_crawler = self.create_basic_crawler()
+            news_data = self.basic_crawler.crawl(categories, max_pages, progress_callback=on_page)
+            
+            # 保存到汇总数据库
+            self.save_to_summary_db(news_data, 'basic')
+            
+            self.update_status(
+                is_running=False,
+                progress=100,
+                end_time=datetime.now().isoformat(),
+                total_news=len(news_data)
+            )
+            
+            self.finish_task(task, 'finished')
+            logging.info(f'基础爬虫完成，共爬取 {len(news_data)} 条新闻')
+            
+        except Exception as e:
+            self.record_error(e)
+            self.finish_task(task, 'failed')
+            logging.error(f'基础爬虫执行失败: {e}')
+    
+    def create_basic_crawler(self):
+        """按配置创建基础爬虫（目标地址取第一个目标网站）"""
+        basic_config = self.config.get('basic_crawler', {})
+        settings = basic_config.get('settings', {})
+        options = {
+            'request_delay': settings.get('request_delay', [1, 3]),
+            'timeout': settings.get('timeout', 10),
+            'user_agents': basic_config.get('user_agents'),
+            'user_agents_file': basic_config.get('user_agents_file'),
+            'max_response_bytes': int(settings.get('max_response_mb', 5) * 1024 * 1024),
+            'discovery_settings': settings.get('discovery'),
+            'image_settings': self.config.get('image_settings')
+        }
+        target_sites = basic_config.get('target_sites', [])
+        if target_sites:
+            options['base_url'] = target_sites[0]['base_url']
+            options['page_url'] = target_sites[0].get('page_url')
+        return BasicNewsCrawler(**options)
+    
+    def advanced_config(self):
+        """高级爬虫配置（附带正文压缩存储、分析和图片设置）"""
+        config = dict(self.config.get('advanced_crawler', {}))
+        config['content_storage'] = self.config.get('content_storage', {})
+        config['analysis_settings'] = self.config.get('analysis_settings', {})
+        config['image_settings'] = self.config.get('image_settings', {})
+        return config
+    
+    def start_advanced_crawl(self, max_news_per_site=50, profile=False):
+        """启动高级爬虫（profile=True 时对本次任务进行采样分析）"""
+        params = {'max_news_per_site': max_news_per_site, 'profile': profile}
+        if self.execution_mode == 'web':
+            return self.submit_job('advanced', params, '高级爬虫')
+        
+        self.start_in_thread(self.run_advanced_crawl, **params)
+        return {'status': 'started', 'message': '高级爬虫已启动'}
+    
+    def run_advanced_crawl(self, max_news_per_site=50, profile=False):
+        """执行高级爬虫任务"""
+        task = None
+        try:
+            task = self.begin_task('advanced', {'max_news_per_site': max_news_per_site}, profile)
+            self.update_status(
+                is_running=True,
+                current_task='高级爬虫',
+                task_id=task['id'],
+                progress=0,
+                total_news=0,
+                start_time=datetime.now().isoformat(),
+                end_time=None,
+                errors=[],
+                profile=None
+            )
+            
+            def on_news(news_item):
+                with self.lock:
+                    total_news = self.crawl_status['total_news'] + 1
+                self.update_progress(total_news=total_news)
+                self.events.publish('news', self.news_event(news_item, 'advanced'))
+            
+            # 获取完整的高级爬虫配置
+            self.advanced_crawler = AdvancedNewsCrawler(self.advanced_config(), on_news=on_news)
+            self.advanced_crawler.run(max_news_per_site)
+            
+            # 从高级爬虫数据库读取数据并保存到汇总数据库
+            self.sync_advanced_data()
+            
+            self.update_status(
+                is_running=False,
+                progress=100,
+                end_time=datetime.now().isoformat(),
+                total_news=len(self.advanced_crawler.news_data)
+            )
+            
+            self.finish_task(task, 'finished')
+            logging.info(f'高级爬虫完成，共爬取 {len(self.advanced_crawler.news_data)} 条新闻')
+            
+        except Exception as e:
+            self.record_error(e)
+            self.finish_task(task, 'failed')
+            logging.error(f'高级爬虫执行失败: {e}')
+    
+    def begin_task(self, task_type, params, profile=False):
+        """写入任务记录，返回任务信息（含开始时的指标快照，需要时启动采样分析）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cursor = conn.execute(
+                'INSERT INTO crawl_tasks (task_type, start_time, status, config) VALUES (?, ?, ?, ?)',
+                (task_type, datetime.now().isoformat(), 'running', json.dumps(params, ensure_ascii=False))
+            )
+            conn.commit()
+            task_id = cursor.lastrowid
+        finally:
+            conn.close()
+        profiler = SamplingProfiler(name=f'{task_type}_task{task_id}').start() if profile else None
+        return {'id': task_id, 'started': time.time(), 'metrics': metrics.snapshot(),
+                'profiler': profiler}
+    
+    def finish_task(self, task, status):
+        """结束任务记录，保存本次运行的指标汇总"""
+        if not task:
+            return
+        
+        profile = None
+        if task['profiler']:
+            try:
+                result = task['profiler'].stop()
+                profile = {
+                    'samples': result['samples'],
+                    'collapsed_url': f'/api/profiles/{result["collapsed_file"]}',
+                    'summary_url': f'/api/profiles/{result["summary_file"]}',
+                    'top_functions': result['top_functions'][:5]
+                }
+                self.update_status(profile=profile)
+            except Exception as e:
+                logging.error(f'保存性能分析结果失败: {e}')
+        
+        try:
+            duration = time.time() - task['started']
+            summary = summarize_delta(task['metrics'], metrics.snapshot())
+            
+            # 工作线程利用率 = 累计忙碌时间 / (线程数 × 运行时间)
+            workers = summary.get('crawler_workers', {})
+            utilization = {
+                crawler: round(busy / (workers[crawler] * duration), 3)
+                for crawler, busy in summary.get('crawler_worker_busy_seconds_total', {}).items()
+                if workers.get(crawler) and duration > 0
+            }
+            responses = summary.get('crawler_http_responses_total', {})
+            http_errors = sum(count for label, count in responses.items()
+                              if not label.rsplit(',', 1)[-1].startswith('2'))
+            
+            with self.lock:
+                total_news = self.crawl_status['total_news']
+                error_count = len(self.crawl_status['errors']) + http_errors
+            
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.execute('''
+                    UPDATE crawl_tasks SET end_time = ?, status = ?, total_news = ?,
+                        success_count = ?, error_count = ?, metrics = ?
+                    WHERE id = ?
+                ''', (datetime.now().isoformat(), status, total_news, total_news, error_count,
+                      json.dumps({'duration_seconds': round(duration, 3),
+                                  'worker_utilization': utilization,
+                                  'profile': profile,
+                                  'metrics': summary}, ensure_ascii=False),
+                      task['id']))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f'保存任务记录失败: {e}')
+    
+    def render_metrics(self):
+        """Prometheus文本格式的指标；web模式下读取执行进程保存的快照"""
+        if self.execution_mode == 'web':
+            with self.read_pool.connection() as conn:
+                snapshot = self.event_log.load_metrics(conn)
+            return render_snapshot(snapshot or {})
+        return metrics.render()
+    
+    def update_status(self, **changes):
+        """更新爬取状态并推送状态事件"""
+        with self.lock:
+            self.crawl_status.update(changes)
+            self.status_version += 1
+            snapshot = self.crawl_status.copy()
+        self.events.publish('status', snapshot)
+        return snapshot
+    
+    def update_progress(self, **changes):
+        """更新爬取进度并推送进度事件"""
+        with self.lock:
+            self.crawl_status.update(changes)
+            self.status_version += 1
+        self.events.publish('progress', changes)
+    
+    def record_error(self, error):
+        """记录爬取错误并结束当前任务"""
+        with self.lock:
+            errors = self.crawl_status['errors'] + [str(error)]
+        self.update_status(is_running=False, end_time=datetime.now().isoformat(), errors=errors)
+    
+    def bump_data_version(self):
+        """汇总数据发生变化，使API缓存失效"""
+        with self.lock:
+            self.data_version += 1
+    
+    def news_event(self, news, crawler_type):
+        """新闻事件数据（不含正文）"""
+        return {
+            'title': news.get('title', ''),
+            'url': news.get('link', news.get('url', '')),
+            'summary': news.get('summary', ''),
+            'pub_time': news.get('pub_time', ''),
+            'crawl_time': news.get('crawl_time', ''),
+            'source': news.get('source', ''),
+            'keywords': news.get('keywords', ''),
+            'sentiment_score': news.get('sentiment_score'),
+            'word_count': news.get('word_count', 0),
+            'crawler_type': crawler_type,
+            # 页面按发布时间范围过滤推送的新闻
+            'pub_ts': news.get('pub_ts') or parse_pub_time(news.get('pub_time', ''), news.get('crawl_time'))
+        }
+    
+    def get_frontier(self):
+        """获取分布式爬取共享队列"""
+        if self.frontier is None:
+            settings = self.config.get('distributed_settings', {})
+            self.frontier = SQLiteFrontier(
+                settings.get('frontier_path', 'news_data/frontier.db'),
+                lease_seconds=settings.get('lease_seconds', 120),
+                max_attempts=settings.get('max_attempts', 3),
+                domain_delay=settings.get('domain_delay', 1.0)
+            )
+        return self.frontier
+    
+    def start_distributed_crawl(self, max_news_per_site=50, num_workers=None, profile=False):
+        """启动分布式爬虫（协调者模式，profile只分析协调者进程）"""
+        settings = self.config.get('distributed_settings', {})
+        num_workers = num_workers or settings.get('num_workers', 4)
+        params = {'max_news_per_site': max_news_per_site, 'num_workers': num_workers,
+                  'profile': profile}
+        if self.execution_mode == 'web':
+            return self.submit_job('distributed', params, '分布式爬虫')
+        
+        self.start_in_thread(self.run_distributed_crawl, **params)
+        return {'status': 'started', 'message': f'分布式爬虫已启动（{num_workers} 个工作者）'}
+    
+    def run_distributed_crawl(self, max_news_per_site=50, num_workers=4, profile=False):
+        """执行分布式爬虫任务"""
+        settings = self.config.get('distributed_settings', {})
+        processes = []
+        task = None
+        try:
+            task = self.begin_task('distributed', {'max_news_per_site': max_news_per_site,
+                                                   'num_workers': num_workers}, profile)
+            self.update_status(
+                is_running=True,
+                current_task='分布式爬虫',
+                task_id=task['id'],
+                progress=0,
+                total_news=0,
+                start_time=datetime.now().isoformat(),
+                end_time=None,
+                errors=[],
+                profile=None
+            )
+            
+            config = self.advanced_config()
+            frontier = self.get_frontier()
+            frontier.reset()
+            
+            # 协调者负责发现链接并写入共享队列
+            seeder = AdvancedNewsCrawler(config)
+            for site_config in seeder.config['target_sites']:
+                links = seeder.extract_news_links(site_config, max_news_per_site)
+                added = frontier.enqueue(links, site_config)
+                logging.info(f'{site_config["name"]} 加入队列 {added} 个链接')
+            
+            worker_options = {
+                'crawler_config': config,
+                'batch_size': settings.get('batch_size', 10),
+                'request_delay': seeder.config['request_delay'],
+                'idle_timeout': settings.get('idle_timeout', 15),
+                'lease_seconds': frontier.lease_seconds,
+                'frontier_options': {
+                    'lease_seconds': frontier.lease_seconds,
+                    'max_attempts': frontier.max_attempts,
+                    'domain_delay': frontier.domain_delay
+                }
+            }
+            processes = start_local_workers(frontier.db_path, num_workers, worker_options)
+            WORKERS_TOTAL.set(num_workers, crawler='distributed')
+            
+            # 汇总工作者回传的结果，直到队列处理完毕
+            total = 0
+            crashes = 0
+            max_restarts = settings.get('max_worker_restarts', 3)
+            while True:
+                results = frontier.drain_results()
+                if results:
+                    self.save_to_summary_db(results, 'distributed')
+                    total += len(results)
                 
-                # 从高级爬虫数据库读取数据并保存到汇总数据库
-                self.sync_advanced_data()
+                stats = frontier.stats()
+                QUEUE_DEPTH.set(stats['pending'], queue='frontier_pending')
+                QUEUE_DEPTH.set(stats['leased'], queue='frontier_leased')
+                QUEUE_DEPTH.set(stats['pending_results'], queue='frontier_results')
+                processed = stats['done'] + stats['failed']
+                queued = processed + stats['pending'] + stats['leased']
+                progress = int(processed * 100 / queued) if queued else 100
                 
                 with self.lock:
-                    self.crawl_status['is_running'] = False
-                    self.crawl_status['end_time'] = datetime.now().isoformat()
-                    self.crawl_status['total_news'] = len(self.advanced_crawler.news_data)
+                    changed = (progress, total) != (self.crawl_status['progress'],
+                                                    self.crawl_status['total_news'])
+                    stopped = not self.crawl_status['is_running']
+                if changed:
+                    self.update_progress(progress=progress, total_news=total)
                 
-                logging.info(f'高级爬虫完成，共爬取 {len(self.advanced_crawler.news_data)} 条新闻')
+                if stopped:
+                    break
                 
-            except Exception as e:
-                with self.lock:
-                    self.crawl_status['is_running'] = False
-                    self.crawl_status['errors'].append(str(e))
-                logging.error(f'高级爬虫执行失败: {e}')
+                # 工作者空闲超时或崩溃退出：回收其租约；全部退出而队列未处理完时重新启动
+                alive = []
+                for process in processes:
+                    if process.is_alive():
+                        alive.append(process)
+                        continue
+                    process.join()
+                    released = frontier.release_worker(local_worker_prefix(process.pid))
+                    if process.exitcode != 0:
+                        crashes += 1
+                        logging.error(f'工作者进程 {process.pid} 异常退出（{process.exitcode}），回收 {released} 个租约')
+                processes = alive
+                if not processes and not frontier.is_finished():
+                    if crashes > max_restarts:
+                        raise RuntimeError(f'工作者进程异常退出 {crashes} 次，队列未处理完')
+                    logging.info('工作者均已退出但队列未处理完，重新启动工作者')
+                    processes = start_local_workers(frontier.db_path, num_workers, worker_options)
+                WORKERS_TOTAL.set(len(processes), crawler='distributed')
+                
+                if not results and stats['pending_results'] == 0 and frontier.is_finished():
+                    break
+                if not results:
+                    time.sleep(1)
+            
+            self.update_status(is_running=False, end_time=datetime.now().isoformat())
+            
+            self.finish_task(task, 'stopped' if stopped else 'finished')
+            logging.info(f'分布式爬虫完成，共爬取 {total} 条新闻')
+            
+        except Exception as e:
+            self.record_error(e)
+            self.finish_task(task, 'failed')
+            logging.error(f'分布式爬虫执行失败: {e}')
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+    
+    def upsert_summary(self, cursor, record):
+        """
+        写入一条汇总新闻并维护全文索引
         
-        thread = threading.Thread(target=crawl_task)
-        thread.daemon = True
-        thread.start()
+        按url去重并保留原有ID；同一url且爬取时间未变的记录直接跳过
+        """
+        existing = cursor.execute(
+            'SELECT id, crawl_time, cluster_id FROM news_summary WHERE url = ?', (record['url'],)
+        ).fetchone()
+        if existing and existing[1] == record['crawl_time']:
+            return False
         
-        return {'status': 'started', 'message': '高级爬虫已启动'}
+        # 发布时间文字标准化为时间戳，相对时间（“3小时前”）以爬取时间为准
+        record['pub_ts'] = parse_pub_time(record['pub_time'], record['crawl_time'])
+        values = [record[column] for column in SUMMARY_COLUMNS]
+        if self.content_store:
+            # 正文压缩写入news_content，汇总表的content列为NULL
+            self.content_store.put(cursor, url_hash(record['url']), record['content'], record['source'])
+            values[SUMMARY_COLUMNS.index('content')] = None
+        
+        columns = ', '.join(SUMMARY_COLUMNS)
+        placeholders = ', '.join('?' for _ in SUMMARY_COLUMNS)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in SUMMARY_COLUMNS
+                            if column != 'url')
+        cursor.execute(f'''
+            INSERT INTO news_summary ({columns}) VALUES ({placeholders})
+            ON CONFLICT(url) DO UPDATE SET {updates}
+        ''', values)
+        
+        row_id = existing[0] if existing else cursor.lastrowid
+        self.search_index.index_row(cursor, row_id, record['title'], record['summary'],
+                                    record['content'], record['keywords'])
+        
+        # 新文章归入新闻事件（已有事件的文章更新时保持不变）
+        if self.story_clusterer and not (existing and existing[2]):
+            self.story_clusterer.assign(cursor, row_id, record)
+        return True
+    
+    def search_news(self, query, limit=20, cursor=None, source=None):
+        """全文检索新闻"""
+        try:
+            with self.read_pool.connection() as conn:
+                return self.search_index.search(conn, query, limit, cursor, source)
+        except Exception as e:
+            logging.error(f'全文检索失败: {e}')
+            return {'results': [], 'next_cursor': None, 'error': str(e)}
     
     def save_to_summary_db(self, news_data, crawler_type):
         """保存到汇总数据库"""
         try:
+            store_start = time.perf_counter()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             for news in news_data:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO news_summary 
-                    (title, url, content, summary, pub_time, crawl_time, source, 
-                     category, keywords, sentiment_score, word_count, crawler_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    news.get('title', ''),
-                    news.get('link', news.get('url', '')),
-                    news.get('content', ''),
-                    news.get('summary', ''),
-                    news.get('pub_time', ''),
-                    news.get('crawl_time', ''),
-                    news.get('source', ''),
-                    news.get('category', ''),
-                    news.get('keywords', ''),
-                    news.get('sentiment_score', 0.0),
-                    news.get('word_count', 0),
-                    crawler_type
-                ))
+                self.upsert_summary(cursor, {
+                    'title': news.get('title', ''),
+                    'url': news.get('link', news.get('url', '')),
+                    'content': news.get('content', ''),
+                    'summary': news.get('summary', ''),
+                    'pub_time': news.get('pub_time', ''),
+                    'crawl_time': news.get('crawl_time', ''),
+                    'source': news.get('source', ''),
+                    'category': news.get('category', ''),
+                    'keywords': news.get('keywords', ''),
+                    'sentiment_score': news.get('sentiment_score') or 0.0,
+                    'word_count': news.get('word_count', 0),
+                    'crawler_type': crawler_type
+                })
             
+            if self.story_clusterer:
+                self.story_clusterer.maybe_save(conn)
             conn.commit()
             conn.close()
+            STAGE_SECONDS.observe(time.perf_counter() - store_start, crawler='summary', stage='store')
+            self.bump_data_version()
+            
+            for news in news_data:
+                self.events.publish('news', self.news_event(news, crawler_type))
             
         except Exception as e:
             logging.error(f'保存到汇总数据库失败: {e}')
     
     def sync_advanced_data(self):
-        """同步高级爬虫数据"""
+        """
+        同步高级爬虫数据，返回同步的新闻条数
+        
+        只读取爬取时间不早于汇总表中最新高级爬虫记录的行（同一秒内的行可能上次未同步，
+        已同步的由upsert_summary跳过），只解压这些行的正文
+        """
         try:
             # 从高级爬虫数据库读取数据
             advanced_db = 'news_data/news.db'
             if os.path.exists(advanced_db):
+                conn_summary = sqlite3.connect(self.db_path)
+                last_synced = conn_summary.execute(
+                    "SELECT MAX(crawl_time) FROM news_summary WHERE crawler_type = 'advanced'"
+                ).fetchone()[0]
+                
                 conn_advanced = sqlite3.connect(advanced_db)
-                df = pd.read_sql_query('SELECT * FROM news', conn_advanced)
+                conn_advanced.row_factory = sqlite3.Row
+                rows = [dict(row) for row in conn_advanced.execute(
+                    'SELECT * FROM news WHERE crawl_time >= ? ORDER BY crawl_time', (last_synced or '',)
+                )]
+                # 高级爬虫压缩保存的正文
+                fill_content(conn_advanced, rows, hash_key='url_hash')
                 conn_advanced.close()
                 
                 # 保存到汇总数据库
-                conn_summary = sqlite3.connect(self.db_path)
-                for _, row in df.iterrows():
-                    cursor = conn_summary.cursor()
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO news_summary 
-                        (title, url, content, summary, pub_time, crawl_time, source, 
-                         keywords, sentiment_score, word_count, crawler_type)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['title'],
-                        row['url'],
-                        row['content'],
-                        row['summary'],
-                        row['pub_time'],
-                        row['crawl_time'],
-                        row['source'],
-                        row['keywords'],
-                        row['sentiment_score'],
-                        row['word_count'],
-                        'advanced'
-                    ))
+                store_start = time.perf_counter()
+                cursor = conn_summary.cursor()
+                synced = []
+                for row in rows:
+                    record = {
+                        'title': row['title'],
+                        'url': row['url'],
+                        'content': row['content'],
+                        'summary': row['summary'],
+                        'pub_time': row['pub_time'],
+                        'crawl_time': row['crawl_time'],
+                        'source': row['source'],
+                        'category': None,
+                        'keywords': row['keywords'],
+                        'sentiment_score': row['sentiment_score'],
+                        'word_count': row['word_count'],
+                        'crawler_type': 'advanced'
+                    }
+                    if self.upsert_summary(cursor, record):
+                        synced.append(record)
                 
+                if self.story_clusterer:
+                    self.story_clusterer.maybe_save(conn_summary)
                 conn_summary.commit()
                 conn_summary.close()
+                STAGE_SECONDS.observe(time.perf_counter() - store_start, crawler='summary', stage='store')
+                self.bump_data_version()
+                
+                # 与基础爬虫相同按条发布新闻事件（热点关键词统计和仪表盘都由事件增量更新）
+                for record in synced:
+                    self.events.publish('news', self.news_event(record, 'advanced'))
+                self.events.publish('data_changed', {'crawler_type': 'advanced', 'rows': len(synced)})
+                return len(synced)
                 
         except Exception as e:
             logging.error(f'同步高级爬虫数据失败: {e}')
+        return 0
+    
+    def warm_trending(self):
+        """启动时加载最长时间窗口内的新闻关键词"""
+        try:
+            with self.read_pool.connection() as conn:
+                self.trending.warm(conn)
+        except Exception as e:
+            logging.error(f'加载热点关键词统计失败: {e}')
+    
+    def get_trending(self, window='1h', limit=20):
+        """热点关键词"""
+        try:
+            return self.trending.trending(window, limit)
+        except Exception as e:
+            logging.error(f'获取热点关键词失败: {e}')
+            return {'window': window, 'terms': [], 'error': str(e)}
     
     def get_crawl_status(self):
         """获取爬取状态"""
         with self.lock:
             return self.crawl_status.copy()
     
-    def get_news_data(self, limit=100, offset=0, source=None, crawler_type=None):
-        """获取新闻数据"""
+    def is_crawling(self):
+        """是否有爬取任务正在运行（数据库维护在运行期间只做备份）"""
+        with self.lock:
+            return self.crawl_status['is_running']
+    
+    def get_maintenance_status(self):
+        """数据库维护状态：各任务上次执行结果、数据库大小和备份列表"""
+        if not self.maintenance:
+            return {'enabled': False}
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            query = 'SELECT * FROM news_summary WHERE 1=1'
-            params = []
-            
-            if source:
-                query += ' AND source = ?'
-                params.append(source)
-            
-            if crawler_type:
-                query += ' AND crawler_type = ?'
-                params.append(crawler_type)
-            
-            query += ' ORDER BY crawl_time DESC LIMIT ? OFFSET ?'
+            return dict(self.maintenance.status(), enabled=True)
+        except Exception as e:
+            logging.error(f'获取数据库维护状态失败: {e}')
+            return {'enabled': True, 'error': str(e)}
+    
+    def image_settings(self):
+        settings = self.config.get('image_settings') or {}
+        return settings.get('root', 'news_data/images'), settings.get('db_path', 'news_data/images.db')
+    
+    def get_article_images(self, article_url):
+        """文章引用的已下载图片（原图和缩略图地址为 /api/images/file/ 下的路径）"""
+        _, db_path = self.image_settings()
+        try:
+            images = load_article_images(db_path, article_url)
+        except Exception as e:
+            logging.error(f'获取文章图片失败: {e}')
+            return []
+        for image in images:
+            image['file_url'] = f'/api/images/file/{image["path"]}'
+            image['thumb_url'] = f'/api/images/file/{image["thumb_path"]}' if image['thumb_path'] else None
+        return images
+    
+    def get_news_data(self, limit=100, offset=0, source=None, crawler_type=None, cluster_id=None,
+                      since=None, until=None, sort=None):
+        """
+        获取新闻数据
+        
+        cluster_id: 只返回该新闻事件中的文章
+        since/until: 发布时间范围（时间戳，左闭右开），按pub_ts索引查询
+        sort: crawl_time（默认）或 pub_time；指定了发布时间范围时默认按发布时间倒序
+        """
+        try:
+            query, params = self.news_query('SELECT * FROM news_summary', source, crawler_type, cluster_id,
+                                            since, until, sort)
+            # 范围条件和排序使用同一个索引，只读取当前页
+            query += ' LIMIT ? OFFSET ?'
             params.extend([limit, offset])
             
-            df = pd.read_sql_query(query, conn, params=params)
-            conn.close()
-            
-            return df.to_dict('records')
+            # 直接用游标构造字典，避免为一次查询导入pandas
+            with self.read_pool.connection() as conn:
+                cursor = conn.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                news = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                # 压缩存储的正文只解压当前页
+                return fill_content(conn, news)
             
         except Exception as e:
             logging.error(f'获取新闻数据失败: {e}')
             return []
     
-    def get_statistics(self):
-        """获取统计数据"""
+    def get_stories(self, limit=20, offset=0, min_size=2, articles=3):
+        """
+        最近更新的新闻事件（按最近出现时间倒序）
+        
+        每个事件包含篇数、来源、首次/最近出现时间和最早的几篇文章
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # 基本统计
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM news_summary')
-            total_news = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT crawler_type, COUNT(*) FROM news_summary GROUP BY crawler_type')
-            crawler_stats = dict(cursor.fetchall())
-            
-            cursor.execute('SELECT source, COUNT(*) FROM news_summary GROUP BY source')
-            source_stats = dict(cursor.fetchall())
-            
-            cursor.execute('SELECT AVG(sentiment_score) FROM news_summary WHERE sentiment_score IS NOT NULL')
-            avg_sentiment = cursor.fetchone()[0] or 0
-            
-            cursor.execute('SELECT AVG(word_count) FROM news_summary WHERE word_count > 0')
-            avg_word_count = cursor.fetchone()[0] or 0
-            
-            conn.close()
+            with self.read_pool.connection() as conn:
+                rows = conn.execute('''
+                    SELECT id, title, size, sources, first_seen, last_seen FROM story_clusters
+                    WHERE size >= ? ORDER BY last_seen DESC LIMIT ? OFFSET ?
+                ''', (min_size, limit, offset)).fetchall()
+                stories = [{
+                    'id': story_id,
+                    'title': title,
+                    'size': size,
+                    'sources': json.loads(sources or '[]'),
+                    'first_seen': first_seen,
+                    'last_seen': last_seen,
+                    'articles': []
+                } for story_id, title, size, sources, first_seen, last_seen in rows]
+                
+                if stories and articles:
+                    by_id = {story['id']: story for story in stories}
+                    placeholders = ', '.join('?' for _ in by_id)
+                    # 每个事件只取最早的几篇，大事件不读取全部成员
+                    members = conn.execute(f'''
+                        SELECT cluster_id, title, url, source, crawl_time FROM (
+                            SELECT cluster_id, title, url, source, crawl_time,
+                                   ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY crawl_time) AS position
+                            FROM news_summary WHERE cluster_id IN ({placeholders})
+                        ) WHERE position <= ? ORDER BY crawl_time
+                    ''', list(by_id) + [articles])
+                    for cluster_id, title, url, source, crawl_time in members:
+                        by_id[cluster_id]['articles'].append({'title': title, 'url': url, 'source': source,
+                                                              'crawl_time': crawl_time})
+            return stories
+        
+        except Exception as e:
+            logging.error(f'获取新闻事件失败: {e}')
+            return []
+    
+    def news_query(self, select, source=None, crawler_type=None, cluster_id=None, since=None, until=None,
+                   sort=None):
+        """
+        拼接新闻列表和导出共用的过滤条件和排序，返回 (SQL, 参数)
+        
+        sort: crawl_time（默认）或 pub_time；指定了发布时间范围时默认按发布时间倒序。
+        两种排序都有索引，按顺序读取时不需要临时排序
+        """
+        query = select + ' WHERE 1=1'
+        params = []
+        
+        if source:
+            query += ' AND source = ?'
+            params.append(source)
+        
+        if crawler_type:
+            query += ' AND crawler_type = ?'
+            params.append(crawler_type)
+        
+        if cluster_id:
+            query += ' AND cluster_id = ?'
+            params.append(cluster_id)
+        
+        query, params = self.pub_time_filter(query, params, since, until)
+        
+        if sort == 'pub_time' or (sort is None and (since is not None or until is not None)):
+            query += ' ORDER BY pub_ts DESC'
+        else:
+            query += ' ORDER BY crawl_time DESC'
+        return query, params
+    
+    def export_news(self, fmt, source=None, crawler_type=None, cluster_id=None, since=None, until=None,
+                    sort=None, include_content=True, limit=None):
+        """
+        流式导出新闻，返回按批产生字节块的生成器（过滤条件与get_news_data相同）
+        
+        在单独的只读连接上按批读取，服务器内存与导出行数无关；
+        include_content为False时不导出正文，也不解压压缩存储的正文
+        """
+        columns = ['id'] + [c for c in SUMMARY_COLUMNS if include_content or c != 'content'] + ['cluster_id']
+        query, params = self.news_query(f'SELECT {", ".join(columns)} FROM news_summary', source,
+                                        crawler_type, cluster_id, since, until, sort)
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        batch_size = self.config.get('export_settings', {}).get('stream_batch_size', DEFAULT_BATCH_SIZE)
+        return stream_export(self.db_path, query, params, fmt, batch_size=batch_size)
+    
+    @staticmethod
+    def pub_time_filter(query, params, since=None, until=None):
+        """追加发布时间范围条件（since含，until不含）"""
+        if since is not None:
+            query += ' AND pub_ts >= ?'
+            params.append(since)
+        if until is not None:
+            query += ' AND pub_ts < ?'
+            params.append(until)
+        return query, params
+    
+    def get_statistics(self, since=None, until=None):
+        """
+        获取统计数据
+        
+        since/until: 只统计该发布时间范围内的新闻（时间戳），按pub_ts索引读取范围内的行；
+        daily_counts 为按发布日期的篇数
+        """
+        try:
+            where, params = self.pub_time_filter('WHERE 1=1', [], since, until)
+            with self.read_pool.connection() as conn:
+                # 基本统计
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT COUNT(*) FROM news_summary {where}', params)
+                total_news = cursor.fetchone()[0]
+                
+                cursor.execute(f'SELECT crawler_type, COUNT(*) FROM news_summary {where} GROUP BY crawler_type',
+                               params)
+                crawler_stats = dict(cursor.fetchall())
+                
+                cursor.execute(f'SELECT source, COUNT(*) FROM news_summary {where} GROUP BY source', params)
+                source_stats = dict(cursor.fetchall())
+                
+                cursor.execute(f'SELECT AVG(sentiment_score) FROM news_summary {where} '
+                               'AND sentiment_score IS NOT NULL', params)
+                avg_sentiment = cursor.fetchone()[0] or 0
+                
+                cursor.execute(f'SELECT AVG(word_count) FROM news_summary {where} AND word_count > 0', params)
+                avg_word_count = cursor.fetchone()[0] or 0
+                
+                # 只读取pub_ts索引（覆盖索引），不访问表
+                dated_where, dated_params = self.pub_time_filter('WHERE pub_ts IS NOT NULL', [], since, until)
+                cursor.execute(f"""
+                    SELECT date(pub_ts, 'unixepoch', 'localtime') AS day, COUNT(*) FROM news_summary
+                    {dated_where} GROUP BY day ORDER BY day
+                """, dated_params)
+                daily_counts = dict(cursor.fetchall())
             
             return {
                 'total_news': total_news,
                 'crawler_stats': crawler_stats,
                 'source_stats': source_stats,
                 'avg_sentiment': round(avg_sentiment, 3),
-                'avg_word_count': round(avg_word_count, 0)
+                'avg_word_count': round(avg_word_count, 0),
+                'daily_counts': daily_counts
             }
             
         except Exception as e:
@@ -345,70 +1089,386 @@ class CrawlerManager:
     
     def stop_crawl(self):
         """停止爬取"""
+        if self.execution_mode == 'web':
+            # 由执行进程在下一次检查时停止
+            if self.job_queue.request_stop():
+                return {'status': 'stopping', 'message': '已请求停止爬虫'}
+            return {'status': 'not_running', 'message': '爬虫未在运行'}
+        
         with self.lock:
-            if self.crawl_status['is_running']:
-                self.crawl_status['is_running'] = False
-                self.crawl_status['end_time'] = datetime.now().isoformat()
-                return {'status': 'stopped', 'message': '爬虫已停止'}
-            else:
-                return {'status': 'not_running', 'message': '爬虫未在运行'}
+            is_running = self.crawl_status['is_running']
+        
+        if is_running:
+            self.update_status(is_running=False, end_time=datetime.now().isoformat())
+            return {'status': 'stopped', 'message': '爬虫已停止'}
+        else:
+            return {'status': 'not_running', 'message': '爬虫未在运行'}
+
+# Flask Web接口
+api = Blueprint('api', __name__)
 
-# 创建全局管理器实例
-crawler_manager = CrawlerManager()
+def get_manager():
+    """当前应用的爬虫管理器"""
+    return current_app.extensions['crawler_manager']
 
-# Flask Web应用
-app = Flask(__name__)
+def get_response_cache():
+    """当前应用的读接口响应缓存"""
+    return current_app.extensions['response_cache']
 
-@app.route('/')
+@api.route('/')
 def index():
     """主页"""
     return render_template('index.html')
 
-@app.route('/api/status')
+@api.route('/api/status')
 def api_status():
     """获取爬取状态API"""
-    return jsonify(crawler_manager.get_crawl_status())
+    manager = get_manager()
+    return cached_json_response(get_response_cache(), ('status',), manager.status_version,
+                                manager.get_crawl_status)
 
-@app.route('/api/statistics')
+@api.route('/api/events')
+def api_events():
+    """爬取状态和新新闻的SSE事件流"""
+    manager = get_manager()
+    initial_events = [('status', manager.get_crawl_status())]
+    return Response(
+        stream_with_context(event_stream(manager.events, initial_events)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def pub_time_range_args():
+    """
+    读取since/until查询参数（发布时间范围），返回时间戳
+    
+    支持 2025-03-01、2025-03-01 10:00、7天前、Unix时间戳等；until只给日期时包含当天。
+    无法解析时抛出ValueError
+    """
+    since = request.args.get('since')
+    until = request.args.get('until')
+    return (parse_range_value(since) if since else None,
+            parse_range_value(until, end=True) if until else None)
+
+@api.route('/api/statistics')
 def api_statistics():
-    """获取统计数据API"""
-    return jsonify(crawler_manager.get_statistics())
+    """获取统计数据API（可选since/until发布时间范围）"""
+    manager = get_manager()
+    try:
+        since, until = pub_time_range_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return cached_json_response(get_response_cache(), ('statistics', since, until), manager.data_version,
+                                lambda: manager.get_statistics(since, until))
 
-@app.route('/api/news')
+@api.route('/api/news')
 def api_news():
     """获取新闻数据API"""
+    manager = get_manager()
     limit = request.args.get('limit', 20, type=int)
     offset = request.args.get('offset', 0, type=int)
     source = request.args.get('source')
     crawler_type = request.args.get('crawler_type')
+    cluster_id = request.args.get('cluster_id', type=int)
+    sort = request.args.get('sort')
+    if sort not in (None, 'crawl_time', 'pub_time'):
+        return jsonify({'error': f'未知的排序方式: {sort}'}), 400
+    try:
+        since, until = pub_time_range_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    news_data = crawler_manager.get_news_data(limit, offset, source, crawler_type)
-    return jsonify(news_data)
+    return cached_json_response(
+        get_response_cache(),
+        ('news', limit, offset, source, crawler_type, cluster_id, since, until, sort),
+        manager.data_version,
+        lambda: manager.get_news_data(limit, offset, source, crawler_type, cluster_id, since, until, sort)
+    )
 
-@app.route('/api/start_basic', methods=['POST'])
+@api.route('/api/export')
+def api_export():
+    """
+    流式导出新闻（分块响应，不缓存）
+    
+    format: csv（默认）/ jsonl / parquet（需安装pyarrow）
+    过滤条件与/api/news相同（source、crawler_type、cluster_id、since/until、sort）；
+    content=0 不导出正文；limit 限制导出行数（默认全部）
+    """
+    manager = get_manager()
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'未知的导出格式: {fmt}'}), 400
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify({'error': '导出Parquet需要安装pyarrow'}), 400
+    sort = request.args.get('sort')
+    if sort not in (None, 'crawl_time', 'pub_time'):
+        return jsonify({'error': f'未知的排序方式: {sort}'}), 400
+    try:
+        since, until = pub_time_range_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    chunks = manager.export_news(
+        fmt,
+        source=request.args.get('source'),
+        crawler_type=request.args.get('crawler_type'),
+        cluster_id=request.args.get('cluster_id', type=int),
+        since=since,
+        until=until,
+        sort=sort,
+        include_content=request.args.get('content', '1') not in ('0', 'false'),
+        limit=request.args.get('limit', type=int)
+    )
+    content_type, extension = EXPORT_FORMATS[fmt]
+    filename = f'news_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+    return Response(
+        stream_with_context(chunks),
+        content_type=content_type,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@api.route('/api/stories')
+def api_stories():
+    """新闻事件API（同一事件的多来源报道归为一组）"""
+    manager = get_manager()
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    offset = request.args.get('offset', 0, type=int)
+    min_size = request.args.get('min_size', 2, type=int)
+    
+    return cached_json_response(
+        get_response_cache(),
+        ('stories', limit, offset, min_size),
+        manager.data_version,
+        lambda: manager.get_stories(limit, offset, min_size)
+    )
+
+@api.route('/api/search')
+def api_search():
+    """全文检索API"""
+    manager = get_manager()
+    query = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    cursor = request.args.get('cursor')
+    source = request.args.get('source')
+    
+    if not query:
+        return jsonify({'results': [], 'next_cursor': None})
+    
+    return cached_json_response(
+        get_response_cache(),
+        ('search', query, limit, cursor, source),
+        manager.data_version,
+        lambda: manager.search_news(query, limit, cursor, source)
+    )
+
+@api.route('/api/trending')
+def api_trending():
+    """热点关键词API（window: 5m/1h/1d）"""
+    manager = get_manager()
+    window = request.args.get('window', '1h')
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    
+    if window not in manager.trending.windows:
+        return jsonify({'error': f'未知的时间窗口: {window}',
+                        'windows': list(manager.trending.windows)}), 400
+    
+    # 时间桶滚动或新关键词累计后缓存失效
+    return cached_json_response(
+        get_response_cache(),
+        ('trending', window, limit, manager.trending.bucket_number(window)),
+        manager.trending.version,
+        lambda: manager.get_trending(window, limit)
+    )
+
+@api.route('/api/start_basic', methods=['POST'])
 def api_start_basic():
     """启动基础爬虫API"""
     data = request.get_json() or {}
     categories = data.get('categories', ['news'])
     max_pages = data.get('max_pages', 3)
     
-    result = crawler_manager.start_basic_crawl(categories, max_pages)
+    result = get_manager().start_basic_crawl(categories, max_pages, bool(data.get('profile')))
     return jsonify(result)
 
-@app.route('/api/start_advanced', methods=['POST'])
+@api.route('/api/start_advanced', methods=['POST'])
 def api_start_advanced():
     """启动高级爬虫API"""
     data = request.get_json() or {}
     max_news = data.get('max_news_per_site', 50)
     
-    result = crawler_manager.start_advanced_crawl(max_news)
+    result = get_manager().start_advanced_crawl(max_news, bool(data.get('profile')))
+    return jsonify(result)
+
+@api.route('/api/start_distributed', methods=['POST'])
+def api_start_distributed():
+    """启动分布式爬虫API"""
+    data = request.get_json() or {}
+    max_news = data.get('max_news_per_site', 50)
+    num_workers = data.get('num_workers')
+    
+    result = get_manager().start_distributed_crawl(max_news, num_workers, bool(data.get('profile')))
     return jsonify(result)
 
-@app.route('/api/stop', methods=['POST'])
+@api.route('/api/frontier/<action>', methods=['POST'])
+def api_frontier(action):
+    """远程工作者访问共享队列API"""
+    data = request.get_json() or {}
+    frontier = get_manager().get_frontier()
+    worker_id = data.get('worker_id')
+    
+    if action == 'lease':
+        return jsonify({'tasks': frontier.lease(worker_id, data.get('batch_size', 10))})
+    if action == 'renew':
+        return jsonify({'renewed': frontier.renew(worker_id)})
+    if action == 'complete':
+        return jsonify({'accepted': frontier.complete(worker_id, data['url'], data.get('result'))})
+    if action == 'fail':
+        return jsonify({'accepted': frontier.fail(worker_id, data['url'], data.get('error_msg', ''),
+                                                  data.get('retry', True))})
+    if action == 'release':
+        frontier.release(worker_id, data['domain'])
+        return jsonify({'status': 'ok'})
+    
+    return jsonify({'error': f'未知操作: {action}'}), 404
+
+@api.route('/api/frontier/stats')
+def api_frontier_stats():
+    """共享队列统计API"""
+    return jsonify(get_manager().get_frontier().stats())
+
+@api.route('/api/metrics')
+def api_metrics():
+    """Prometheus格式的爬取指标"""
+    return Response(get_manager().render_metrics(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@api.route('/api/maintenance')
+def api_maintenance():
+    """数据库备份、数据保留和空间回收的状态"""
+    return jsonify(get_manager().get_maintenance_status())
+
+@api.route('/api/images')
+def api_images():
+    """文章图片API（url为文章地址）"""
+    article_url = request.args.get('url', '').strip()
+    if not article_url:
+        return jsonify({'error': '缺少url参数'}), 400
+    return jsonify({'url': article_url, 'images': get_manager().get_article_images(article_url)})
+
+@api.route('/api/images/file/<path:filename>')
+def api_image_file(filename):
+    """按内容哈希存放的图片和缩略图文件"""
+    root, _ = get_manager().image_settings()
+    return send_from_directory(os.path.abspath(root), filename, max_age=365 * 86400)
+
+@api.route('/api/profiles')
+def api_profiles():
+    """已保存的性能分析结果列表"""
+    return jsonify(list_profiles())
+
+@api.route('/api/profiles/<path:filename>')
+def api_profile_file(filename):
+    """下载性能分析结果文件（折叠栈或汇总JSON）"""
+    return send_from_directory(os.path.abspath(PROFILE_DIR), filename)
+
+@api.route('/api/stop', methods=['POST'])
 def api_stop():
     """停止爬虫API"""
-    result = crawler_manager.stop_crawl()
+    result = get_manager().stop_crawl()
     return jsonify(result)
 
+def create_app(manager=None, config_file='crawler_config.json', execution_mode=None):
+    """
+    创建Flask应用
+    
+    manager为空时按配置创建管理器；web模式下同时启动事件转发线程
+    """
+    manager = manager or CrawlerManager(config_file, execution_mode)
+    web_settings = manager.config.get('web_interface', {})
+    
+    app = Flask(__name__)
+    app.extensions['crawler_manager'] = manager
+    app.extensions['response_cache'] = ResponseCache(
+        maxsize=web_settings.get('cache_max_entries', 256),
+        ttl=web_settings.get('cache_ttl_seconds', 300)
+    )
+    app.register_blueprint(api)
+    
+    if manager.execution_mode == 'web':
+        manager.start_event_relay()
+    
+    return app
+
+def run_job_runner(config_file='crawler_config.json'):
+    """独立的爬取任务执行进程入口"""
+    manager = CrawlerManager(config_file, execution_mode='runner')
+    manager.run_jobs()
+
+def serve(config_file='crawler_config.json', host=None, port=None, workers=4, threads=8):
+    """
+    生产模式：启动任务执行进程，并用多进程WSGI服务器提供Web接口
+    
+    优先使用gunicorn（gthread工作模式，适合SSE长连接），
+    不可用时（例如Windows）退回waitress多线程服务器
+    """
+    with open(config_file, 'r', encoding='utf-8') as f:
+        web_settings = json.load(f).get('web_interface', {})
+    host = host or web_settings.get('host', '127.0.0.1')
+    port = port or web_settings.get('port', 5000)
+    
+    runner = multiprocessing.Process(target=run_job_runner, args=(config_file,), daemon=True)
+    runner.start()
+    
+    try:
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            BaseApplication = None
+        
+        if BaseApplication is not None:
+            class GunicornApplication(BaseApplication):
+                def load_config(self):
+                    self.cfg.set('bind', f'{host}:{port}')
+                    self.cfg.set('workers', workers)
+                    self.cfg.set('threads', threads)
+                    self.cfg.set('worker_class', 'gthread')
+                
+                def load(self):
+                    # 每个工作进程fork之后各自创建应用和连接池
+                    return create_app(config_file=config_file, execution_mode='web')
+            
+            GunicornApplication().run()
+        else:
+            from waitress import serve as waitress_serve
+            app = create_app(config_file=config_file, execution_mode='web')
+            waitress_serve(app, host=host, port=port, threads=workers * threads)
+    finally:
+        runner.terminate()
+        runner.join()
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫管理器')
+    parser.add_argument('command', nargs='?', default='dev', choices=['dev', 'serve', 'runner'],
+                        help='dev: 开发服务器; serve: 生产服务; runner: 仅启动任务执行进程')
+    parser.add_argument('--config', default='crawler_config.json', help='配置文件')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, default=4, help='Web工作进程数')
+    parser.add_argument('--threads', type=int, default=8, help='每个工作进程的线程数')
+    args = parser.parse_args()
+    
+    if args.command == 'serve':
+        serve(args.config, args.host, args.port, args.workers, args.threads)
+    elif args.command == 'runner':
+        run_job_runner(args.config)
+    else:
+        app = create_app(config_file=args.config)
+        app.run(debug=True, host=args.host or '0.0.0.0', port=args.port or 5000)
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    main()
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+爬取指标采集 - Prometheus文本格式
+功能：
+1. 进程内计数器、仪表和直方图，支持标签
+2. 导出为Prometheus文本格式（/api/metrics）
+3. 指标快照可序列化为JSON，跨进程传递，并可计算两次快照之间的差值
+   用于汇总单次爬取任务
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 耗时直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """指标基类，按标签值保存各个样本"""
+
+    metric_type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = registry.lock
+        self._samples = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), self._copy(value)] for key, value in self._samples.items()]
+        return {
+            'type': self.metric_type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': samples
+        }
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample['buckets'][index] += 1
+                    break
+            sample['sum'] += value
+            sample['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：with STAGE_SECONDS.time(crawler='basic', stage='parse'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['buckets'] = list(self.buckets)
+        return data
+
+    def _copy(self, value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+
+class MetricsRegistry:
+    """指标注册表，同名指标只创建一次"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics = {}
+        self._create_lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._create_lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self):
+        """可JSON序列化的指标快照"""
+        with self._create_lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def render(self):
+        return render_snapshot(self.snapshot())
+
+
+def render_snapshot(snapshot):
+    """把指标快照渲染为Prometheus文本格式"""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        labelnames = metric['labelnames']
+        lines.append(f'# HELP {name} {metric["help"]}')
+        lines.append(f'# TYPE {name} {metric["type"]}')
+
+        for labelvalues, value in sorted(metric['samples']):
+            if metric['type'] != 'histogram':
+                lines.append(f'{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}')
+                continue
+
+            cumulative = 0
+            for bound, count in zip(metric['buckets'], value['buckets']):
+                cumulative += count
+                labels = _format_labels(labelnames, labelvalues, ('le', _format_value(bound)))
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = _format_labels(labelnames, labelvalues, ('le', '+Inf'))
+            lines.append(f'{name}_bucket{labels} {value["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labelnames, labelvalues)} {_format_value(value["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labelnames, labelvalues)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def summarize_delta(before, after):
+    """
+    计算两次快照之间的变化，生成适合保存到任务记录中的简要汇总
+
+    计数器给出增量，直方图给出次数、总耗时和平均耗时，仪表只保留结束时的值
+    """
+    summary = {}
+    for name, metric in after.items():
+        previous = {tuple(labels): value
+                    for labels, value in before.get(name, {}).get('samples', [])}
+        entries = {}
+        for labelvalues, value in metric['samples']:
+            label = ','.join(labelvalues) or 'total'
+            old = previous.get(tuple(labelvalues))
+
+            if metric['type'] == 'histogram':
+                count = value['count'] - (old['count'] if old else 0)
+                total = value['sum'] - (old['sum'] if old else 0.0)
+                if count:
+                    entries[label] = {'count': count, 'seconds': round(total, 3),
+                                      'avg_ms': round(total * 1000 / count, 2)}
+            elif metric['type'] == 'counter':
+                delta = value - (old or 0)
+                if delta:
+                    entries[label] = round(delta, 3)
+            else:
+                entries[label] = value
+
+        if entries:
+            summary[name] = entries
+    return summary
+
+
+# 全局注册表和爬虫使用的指标
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'crawler_stage_seconds', '爬取各阶段耗时（fetch/parse/analyze/store/delay/throttle）',
+    ['crawler', 'stage'])
+DOWNLOADED_BYTES = metrics.counter(
+    'crawler_downloaded_bytes_total', '下载的响应字节数', ['crawler'])
+HTTP_RESPONSES = metrics.counter(
+    'crawler_http_responses_total', 'HTTP响应数（按状态码，请求异常记为error，类型不符或过大记为rejected）', ['crawler', 'status'])
+RETRIES = metrics.counter(
+    'crawler_retries_total', '请求重试次数', ['crawler'])
+NEWS_SAVED = metrics.counter(
+    'crawler_news_saved_total', '保存的新闻条数', ['crawler'])
+QUEUE_DEPTH = metrics.gauge(
+    'crawler_queue_depth', '待处理队列长度', ['queue'])
+WORKERS_TOTAL = metrics.gauge(
+    'crawler_workers', '爬取工作线程/进程数', ['crawler'])
+WORKERS_BUSY = metrics.gauge(
+    'crawler_workers_busy', '正在工作的线程数', ['crawler'])
+WORKER_BUSY_SECONDS = metrics.counter(
+    'crawler_worker_busy_seconds_total', '工作线程累计忙碌时间，除以（线程数×运行时间）即利用率',
+    ['crawler'])
+
+
+def record_response(crawler, response=None, error=False, rejected=False):
+    """记录一次HTTP响应的状态码和字节数（rejected为因类型或大小被丢弃的响应）"""
+    if rejected:
+        HTTP_RESPONSES.inc(crawler=crawler, status='rejected')
+        return
+    if error or response is None:
+        HTTP_RESPONSES.inc(crawler=crawler, status='error')
+        return
+    HTTP_RESPONSES.inc(crawler=crawler, status=str(response.status_code))
+    DOWNLOADED_BYTES.inc(len(response.content), crawler=crawler)
+
+
+@contextmanager
+def track_busy(crawler):
+    """统计工作线程的忙碌数量和忙碌时间"""
+    WORKERS_BUSY.inc(crawler=crawler)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        WORKER_BUSY_SECONDS.inc(time.perf_counter() - start, crawler=crawler)
+        WORKERS_BUSY.dec(crawler=crawler)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+爬取任务采样分析器
+功能：
+1. 后台线程定期采集调用栈（墙钟采样，等待网络的时间同样可见）；
+   只采样启动分析的线程和之后新建的线程，Web服务等已有线程不计入
+2. 按线程类型聚合，输出折叠栈文件（可直接用于 flamegraph.pl / speedscope）
+3. 输出热点函数汇总（自身样本数和包含子调用的样本数）
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.path.join('news_data', 'profiles')
+
+# 线程池线程名带有序号（ThreadPoolExecutor-0_3），聚合时去掉
+_THREAD_SUFFIX = re.compile(r'_\d+$')
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """
+    低开销采样分析器
+
+    用法：
+        profiler = SamplingProfiler(name='advanced').start()
+        ...
+        result = profiler.stop()   # 写入文件并返回结果摘要
+    """
+
+    def __init__(self, name='crawl', interval=0.01, output_dir=PROFILE_DIR, max_depth=64):
+        self.name = name
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self._excluded = set()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.started_at = time.time()
+        self._excluded = {thread.ident for thread in threading.enumerate()} - {threading.get_ident()}
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or ident in self._excluded:
+                    continue
+
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                thread_name = _THREAD_SUFFIX.sub('', names.get(ident, f'thread-{ident}'))
+                labels.append(thread_name)
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit=20):
+        """热点函数：self为栈顶样本数，total为出现在栈中的样本数"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+
+        return [
+            {'function': function, 'self': count, 'total': total_counts[function]}
+            for function, count in self_counts.most_common(limit)
+        ]
+
+    def stop(self):
+        """停止采样并写入结果文件，返回结果摘要"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base_name = f'{self.name}_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}'
+        collapsed_file = f'{base_name}.collapsed.txt'
+        summary_file = f'{base_name}.json'
+
+        with open(os.path.join(self.output_dir, collapsed_file), 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        result = {
+            'name': self.name,
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'interval_seconds': self.interval,
+            'samples': self.samples,
+            'collapsed_file': collapsed_file,
+            'summary_file': summary_file,
+            'top_functions': self.top_functions()
+        }
+        with open(os.path.join(self.output_dir, summary_file), 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+        logging.info(f'性能分析结果已保存: {os.path.join(self.output_dir, collapsed_file)}')
+        return result
+
+
+def list_profiles(output_dir=PROFILE_DIR):
+    """已保存的分析结果摘要，按时间倒序"""
+    if not os.path.isdir(output_dir):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(output_dir), reverse=True):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            summary['top_functions'] = summary.get('top_functions', [])[:5]
+            profiles.append(summary)
+        except Exception as e:
+            logging.error(f'读取性能分析结果失败 {filename}: {e}')
+    return profiles
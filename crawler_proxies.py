@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+代理池
+功能：
+1. 读取 proxy_settings 中的代理列表和认证信息
+2. 每个代理记录平滑后的成功率和延迟，按 成功率/延迟 加权随机选择
+3. 连续失败的代理隔离一段时间，期满后试用；试用失败则隔离时间加倍，成功则恢复
+4. 每个代理一个连接池复用的Session，同一代理的请求复用连接
+"""
+
+import logging
+import random
+import threading
+import time
+from urllib.parse import quote, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawler_metrics import metrics
+
+PROXY_REQUESTS = metrics.counter(
+    'crawler_proxy_requests_total', '经代理发出的请求数（按结果）', ['proxy', 'result'])
+PROXY_QUARANTINED = metrics.gauge(
+    'crawler_proxy_quarantined', '代理是否处于隔离状态（1为隔离）', ['proxy'])
+
+
+def proxy_with_auth(proxy_url, username=None, password=None):
+    """把认证信息写入代理地址（地址中已带认证时保持不变）"""
+    if not username:
+        return proxy_url
+    parsed = urlparse(proxy_url)
+    if parsed.username:
+        return proxy_url
+    credentials = quote(username, safe='')
+    if password:
+        credentials += ':' + quote(password, safe='')
+    return urlunparse(parsed._replace(netloc=f'{credentials}@{parsed.netloc}'))
+
+
+def mask_proxy(proxy_url):
+    """日志和指标中使用的代理名称（去掉认证信息）"""
+    parsed = urlparse(proxy_url)
+    return f'{parsed.scheme}://{parsed.hostname}:{parsed.port}' if parsed.port else f'{parsed.scheme}://{parsed.hostname}'
+
+
+def make_session(proxy_url=None, pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if proxy_url:
+        session.proxies = {'http': proxy_url, 'https': proxy_url}
+    return session
+
+
+class ProxyState:
+    """单个代理的健康状态"""
+
+    def __init__(self, url, pool_size):
+        self.url = url
+        self.name = mask_proxy(url)
+        self.session = make_session(url, pool_size)
+        self.success_rate = 1.0
+        self.latency = None
+        self.failures = 0
+        self.quarantined_until = 0.0
+        self.quarantine_seconds = 0.0
+        self.requests = 0
+
+    @property
+    def score(self):
+        # 未测过延迟的代理按1秒估计，保证新代理也能被选中
+        return max(self.success_rate, 0.01) / max(self.latency or 1.0, 0.05)
+
+    def snapshot(self, now):
+        return {
+            'proxy': self.name,
+            'requests': self.requests,
+            'success_rate': round(self.success_rate, 3),
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'score': round(self.score, 2),
+            'consecutive_failures': self.failures,
+            'quarantined_seconds': round(max(0.0, self.quarantined_until - now), 1)
+        }
+
+
+class ProxyPool:
+    """
+    带健康评分的代理池
+
+    用法：
+        pool = ProxyPool(['http://127.0.0.1:8080'])
+        proxy = pool.acquire()
+        start = time.perf_counter()
+        try:
+            response = proxy.session.get(url, timeout=10)
+        except requests.exceptions.ProxyError:
+            pool.report(proxy, False)
+        else:
+            pool.report(proxy, True, time.perf_counter() - start)
+    """
+
+    def __init__(self, proxy_list, username=None, password=None, pool_size=10,
+                 failure_threshold=3, quarantine_seconds=60, max_quarantine_seconds=900):
+        urls = [proxy_with_auth(url, username, password) for url in dict.fromkeys(proxy_list or [])]
+        self.proxies = [ProxyState(url, pool_size) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.base_quarantine = quarantine_seconds
+        self.max_quarantine = max_quarantine_seconds
+        self._lock = threading.Lock()
+        for proxy in self.proxies:
+            PROXY_QUARANTINED.set(0, proxy=proxy.name)
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def acquire(self):
+        """
+        按健康评分加权随机选择一个代理，没有配置代理时返回None
+
+        全部代理都在隔离中时，返回最早期满的一个作为试用
+        """
+        if not self.proxies:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            available = [proxy for proxy in self.proxies if proxy.quarantined_until <= now]
+            if not available:
+                return min(self.proxies, key=lambda proxy: proxy.quarantined_until)
+            return random.choices(available, weights=[proxy.score for proxy in available])[0]
+
+    def report(self, proxy, ok, latency=None):
+        """记录一次请求结果，ok=False 表示代理本身出错（无法连接代理、连接代理超时、407）"""
+        if proxy is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            proxy.requests += 1
+            proxy.success_rate = 0.8 * proxy.success_rate + 0.2 * (1.0 if ok else 0.0)
+
+            if ok:
+                if latency is not None:
+                    proxy.latency = latency if proxy.latency is None else 0.8 * proxy.latency + 0.2 * latency
+                if proxy.quarantine_seconds:
+                    logging.info(f'代理恢复: {proxy.name}')
+                    PROXY_QUARANTINED.set(0, proxy=proxy.name)
+                proxy.failures = 0
+                proxy.quarantine_seconds = 0.0
+            else:
+                proxy.failures += 1
+                # 隔离期满后的试用请求失败时立即再次隔离
+                if proxy.failures >= self.failure_threshold or proxy.quarantine_seconds:
+                    self._quarantine(proxy, now)
+
+        PROXY_REQUESTS.inc(proxy=proxy.name, result='ok' if ok else 'error')
+
+    def _quarantine(self, proxy, now):
+        if proxy.quarantined_until > now:
+            return
+        proxy.quarantine_seconds = min(self.max_quarantine, proxy.quarantine_seconds * 2 or self.base_quarantine)
+        proxy.quarantined_until = now + proxy.quarantine_seconds
+        PROXY_QUARANTINED.set(1, proxy=proxy.name)
+        logging.warning(f'代理 {proxy.name} 连续失败 {proxy.failures} 次，隔离 {proxy.quarantine_seconds:.0f} 秒')
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [proxy.snapshot(now) for proxy in self.proxies]
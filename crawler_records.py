@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+新闻记录 - 基础爬虫、高级爬虫和管理器共用
+功能：
+1. NewsRecord：使用__slots__的数据类，比同样字段的dict小得多；
+   支持 record['title'] / record.get('link') / 'link' in record 的读取方式，兼容原来按dict使用的代码
+2. NewsWindow：运行期间只保留最近若干条不含正文的记录和累计计数，
+   正文已写入数据库，不再随运行时间增长占用内存
+"""
+
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Optional
+
+# 基础爬虫的列表数据用link表示新闻地址
+FIELD_ALIASES = {'link': 'url'}
+
+
+@dataclass(slots=True)
+class NewsRecord:
+    title: str = ''
+    url: str = ''
+    content: str = ''
+    summary: str = ''
+    pub_time: str = ''
+    crawl_time: str = ''
+    source: str = ''
+    category: str = ''
+    keywords: str = ''
+    sentiment_score: Optional[float] = None
+    word_count: int = 0
+
+    def __getitem__(self, key):
+        name = FIELD_ALIASES.get(key, key)
+        if name not in FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __contains__(self, key):
+        return FIELD_ALIASES.get(key, key) in FIELD_NAMES
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self, include_content=True):
+        data = asdict(self)
+        if not include_content:
+            data.pop('content')
+        return data
+
+    def brief(self):
+        """不含正文的副本"""
+        return replace(self, content='')
+
+    @classmethod
+    def from_dict(cls, data):
+        """从dict创建（忽略未知字段，link视为url）"""
+        values = {}
+        for key, value in data.items():
+            name = FIELD_ALIASES.get(key, key)
+            if name in FIELD_NAMES and value is not None:
+                values.setdefault(name, value)
+        return cls(**values)
+
+
+FIELD_NAMES = frozenset(field.name for field in fields(NewsRecord))
+
+
+def as_record(news):
+    """dict或NewsRecord统一转换为NewsRecord"""
+    return news if isinstance(news, NewsRecord) else NewsRecord.from_dict(news)
+
+
+class NewsWindow:
+    """
+    最近爬取的新闻（不含正文）和累计条数
+
+    len() 返回累计条数；遍历只包含最近 maxlen 条
+    """
+
+    def __init__(self, maxlen=100):
+        self.recent = deque(maxlen=maxlen)
+        self.total = 0
+        self.total_words = 0
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            self.total += 1
+            self.total_words += record.word_count or 0
+            self.recent.append(record.brief())
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.recent))
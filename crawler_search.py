@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻全文检索 - SQLite FTS5 + jieba分词
+功能：
+1. 对 news_summary 的标题、摘要、正文、关键词建立FTS5索引
+2. 写入前用jieba搜索引擎模式分词（长词同时切出短词，提高召回），
+   词与词之间用不可见分隔符连接，FTS5按词建立倒排索引
+3. 新闻入库时增量维护索引
+4. BM25排序、关键词高亮（标题和摘要片段经HTML转义）和基于游标的分页
+"""
+
+import argparse
+import html
+import logging
+import re
+import sqlite3
+
+from crawler_storage import load_contents, url_hash
+
+# 分词分隔符：FTS5把它当作词边界，展示结果前再去掉
+TOKEN_SEPARATOR = '\u2063'
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+SNIPPET_LENGTH = 80
+
+# BM25列权重：标题 > 关键词 > 摘要 > 正文
+COLUMN_WEIGHTS = (10.0, 3.0, 1.0, 5.0)
+
+_QUERY_NOISE = re.compile(r'^[\s\W_]+$', re.UNICODE)
+
+
+def segment(text):
+    """jieba搜索引擎模式分词后用分隔符连接"""
+    if not text:
+        return ''
+    import jieba
+    return TOKEN_SEPARATOR.join(jieba.cut_for_search(text))
+
+
+def query_terms(query):
+    """查询分词，去掉标点和重复词"""
+    import jieba
+    terms = []
+    for term in jieba.cut(query):
+        term = term.strip()
+        if not term or _QUERY_NOISE.match(term) or term in terms:
+            continue
+        terms.append(term)
+    return terms
+
+
+def build_match_query(terms):
+    """FTS5 MATCH表达式：每个词作为短语，词之间为AND关系"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def highlight(text, pattern):
+    """命中词加上高亮标签；文字来自爬取的网页，先做HTML转义，只有高亮标签作为HTML输出"""
+    text = text or ''
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f'{HIGHLIGHT_START}{html.escape(match.group(0))}{HIGHLIGHT_END}')
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return ''.join(parts)
+
+
+def make_snippet(text, pattern, length=SNIPPET_LENGTH):
+    """截取第一个命中词附近的一段文字并高亮"""
+    text = text or ''
+    match = pattern.search(text)
+    start = max(0, match.start() - length // 4) if match else 0
+    snippet = text[start:start + length]
+    prefix = '...' if start > 0 else ''
+    suffix = '...' if start + length < len(text) else ''
+    return prefix + highlight(snippet, pattern) + suffix
+
+
+def encode_cursor(score, rowid):
+    return f'{score!r}:{rowid}'
+
+
+def decode_cursor(cursor):
+    score, rowid = cursor.rsplit(':', 1)
+    return float(score), int(rowid)
+
+
+class NewsSearchIndex:
+    """news_summary 的全文索引"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def init_index(self, conn):
+        """
+        创建索引表，返回是否为新建（新建时需要回填已有数据）
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'"
+        ).fetchone()
+        if exists:
+            return False
+
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE news_fts USING fts5(
+                title, summary, content, keywords,
+                tokenize = "unicode61 separators '{TOKEN_SEPARATOR}'"
+            )
+        ''')
+        return True
+
+    def index_row(self, cursor, row_id, title, summary, content, keywords):
+        """写入或更新一条新闻的索引（row_id 即 news_summary.id）"""
+        cursor.execute('DELETE FROM news_fts WHERE rowid = ?', (row_id,))
+        cursor.execute(
+            'INSERT INTO news_fts (rowid, title, summary, content, keywords) VALUES (?, ?, ?, ?, ?)',
+            (row_id, segment(title), segment(summary), segment(content),
+             segment((keywords or '').replace(',', ' ')))
+        )
+
+    def remove_row(self, cursor, row_id):
+        cursor.execute('DELETE FROM news_fts WHERE rowid = ?', (row_id,))
+
+    def rebuild(self, batch_size=500):
+        """重建全部索引"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.init_index(conn)
+            conn.execute('DELETE FROM news_fts')
+            read_cursor = conn.execute(
+                'SELECT id, title, summary, content, keywords, url FROM news_summary ORDER BY id'
+            )
+            write_cursor = conn.cursor()
+            total = 0
+            while True:
+                rows = read_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                # 压缩存储的正文（content为NULL）按批解压
+                contents = load_contents(conn, [url_hash(row[5]) for row in rows if row[3] is None])
+                for row_id, title, summary, content, keywords, url in rows:
+                    if content is None:
+                        content = contents.get(url_hash(url), '')
+                    self.index_row(write_cursor, row_id, title, summary, content, keywords)
+                total += len(rows)
+                conn.commit()
+            conn.execute("INSERT INTO news_fts (news_fts) VALUES ('optimize')")
+            conn.commit()
+            logging.info(f'全文索引重建完成，共 {total} 条')
+            return total
+        finally:
+            conn.close()
+
+    def search(self, conn, query, limit=20, cursor=None, source=None):
+        """
+        全文检索
+
+        返回 {'results': [...], 'next_cursor': ...}；
+        next_cursor 为 "得分:ID"，传回即可获取下一页
+        """
+        terms = query_terms(query)
+        if not terms:
+            return {'results': [], 'next_cursor': None}
+
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        sql = f'''
+            SELECT * FROM (
+                SELECT s.id, s.url, s.source, s.pub_time, s.crawl_time, s.crawler_type,
+                       s.sentiment_score, s.keywords, s.title,
+                       bm25(news_fts, {weights}) AS score
+                FROM news_fts
+                JOIN news_summary s ON s.id = news_fts.rowid
+                WHERE news_fts MATCH ?
+        '''
+        params = [build_match_query(terms)]
+        if source:
+            sql += ' AND s.source = ?'
+            params.append(source)
+        sql += ') WHERE 1=1'
+
+        if cursor:
+            last_score, last_id = decode_cursor(cursor)
+            sql += ' AND (score > ? OR (score = ? AND id > ?))'
+            params.extend([last_score, last_score, last_id])
+
+        sql += ' ORDER BY score, id LIMIT ?'
+        params.append(limit + 1)
+
+        rows = conn.execute(sql, params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return {'results': [], 'next_cursor': None}
+
+        # 只为当前页读取摘要和正文，用于生成高亮片段
+        ids = [row[0] for row in rows]
+        text_rows = conn.execute(
+            f'SELECT id, summary, content, url FROM news_summary WHERE id IN ({", ".join("?" for _ in ids)})',
+            ids
+        ).fetchall()
+        contents = load_contents(conn, [url_hash(row[3]) for row in text_rows if row[2] is None])
+        texts = {
+            row[0]: (row[1], row[2] if row[2] is not None else contents.get(url_hash(row[3]), ''))
+            for row in text_rows
+        }
+
+        pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+                             re.IGNORECASE)
+        results = []
+        for row in rows:
+            summary, content = texts.get(row[0], ('', ''))
+            body = content if content and pattern.search(content) else (summary or content)
+            results.append({
+                'id': row[0],
+                'url': row[1],
+                'source': row[2],
+                'pub_time': row[3],
+                'crawl_time': row[4],
+                'crawler_type': row[5],
+                'sentiment_score': row[6],
+                'keywords': row[7],
+                'title': highlight(row[8], pattern),
+                'snippet': make_snippet(body, pattern),
+                'score': row[9]
+            })
+
+        next_cursor = encode_cursor(rows[-1][9], rows[-1][0]) if has_more else None
+        return {'results': results, 'next_cursor': next_cursor}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻全文索引工具')
+    parser.add_argument('command', choices=['rebuild', 'search'])
+    parser.add_argument('query', nargs='?', default='')
+    parser.add_argument('--db', default='news_data/crawler_manager.db')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = NewsSearchIndex(args.db)
+
+    if args.command == 'rebuild':
+        index.rebuild()
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            for item in index.search(conn, args.query, args.limit)['results']:
+                print(f'{item["score"]:.3f}  {item["title"]}  {item["url"]}')
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文压缩存储
+功能：
+1. 开启后正文不再写入 news / news_summary 表的content列（该列为NULL），
+   而是压缩后写入同一数据库的 news_content 表（以url_hash为键）；
+   元数据行保持很小，统计和列表查询不再把正文读入页缓存
+2. 压缩算法为zlib（标准库）或zstd（需安装zstandard）；zstd可按来源训练字典，
+   同一网站的页面模板文字相同，短文章也能压缩得较好
+3. 只在需要正文时解压（列表当前页、检索片段、导出、同步、索引重建）
+4. 已有数据库用命令行迁移：
+   python crawler_storage.py migrate    压缩已有正文
+   python crawler_storage.py restore    解压回content列
+   python crawler_storage.py stats      查看压缩前后大小
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime
+
+CODECS = ('zlib', 'zstd')
+
+# 迁移时处理的数据库和表：(数据库, 表)
+DEFAULT_TARGETS = [
+    ('news_data/news.db', 'news'),
+    ('news_data/crawler_manager.db', 'news_summary')
+]
+
+# SQLite单条语句的参数数量有上限，批量读取时分块
+_QUERY_CHUNK = 500
+
+# 解压用的字典：(数据库文件, 字典ID) -> _Dictionary，字典写入后不再修改
+_dictionary_cache = {}
+_dictionary_lock = threading.Lock()
+
+
+def url_hash(url):
+    """正文存储的键（与高级爬虫news表的url_hash相同）"""
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def load_zstd():
+    """zstandard为可选依赖，未安装时返回None"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def init_content_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS news_content (
+            url_hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            dict_id INTEGER,
+            raw_size INTEGER,
+            body BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS content_dicts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            data BLOB NOT NULL,
+            created_at TEXT
+        )
+    ''')
+
+
+class _Dictionary:
+    """解压字典，每个线程一个解压器（解压器不能跨线程使用）"""
+
+    def __init__(self, data):
+        self.data = load_zstd().ZstdCompressionDict(data)
+        self._local = threading.local()
+
+    def decompressor(self):
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = load_zstd().ZstdDecompressor(dict_data=self.data)
+        return decompressor
+
+
+def _load_dictionary(conn, dict_id):
+    key = (conn.execute('PRAGMA database_list').fetchone()[2], dict_id)
+    with _dictionary_lock:
+        dictionary = _dictionary_cache.get(key)
+    if dictionary is None:
+        row = conn.execute('SELECT data FROM content_dicts WHERE id = ?', (dict_id,)).fetchone()
+        if row is None:
+            raise ValueError(f'压缩字典不存在: {dict_id}')
+        dictionary = _Dictionary(row[0])
+        with _dictionary_lock:
+            _dictionary_cache[key] = dictionary
+    return dictionary
+
+
+def decompress(conn, codec, dict_id, body):
+    if codec == 'zlib':
+        return zlib.decompress(body).decode('utf-8')
+    if codec == 'zstd':
+        zstd = load_zstd()
+        if zstd is None:
+            raise RuntimeError('读取zstd压缩的正文需要安装zstandard')
+        if not dict_id:
+            return zstd.ZstdDecompressor().decompress(body).decode('utf-8')
+        return _load_dictionary(conn, dict_id).decompressor().decompress(body).decode('utf-8')
+    raise ValueError(f'未知的压缩算法: {codec}')
+
+
+def load_contents(conn, hashes):
+    """批量读取并解压正文，返回 {url_hash: 正文}（没有压缩存储表时返回空dict）"""
+    hashes = list(dict.fromkeys(hashes))
+    contents = {}
+    try:
+        for start in range(0, len(hashes), _QUERY_CHUNK):
+            chunk = hashes[start:start + _QUERY_CHUNK]
+            rows = conn.execute(
+                f'SELECT url_hash, codec, dict_id, body FROM news_content '
+                f'WHERE url_hash IN ({", ".join("?" for _ in chunk)})',
+                chunk
+            ).fetchall()
+            for key, codec, dict_id, body in rows:
+                contents[key] = decompress(conn, codec, dict_id, body)
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+    return contents
+
+
+def fill_content(conn, rows, hash_key=None):
+    """
+    为content为None的行（dict）补上解压后的正文
+
+    hash_key 为行中url_hash的字段名；为空时由url计算
+    """
+    missing = [row for row in rows if row.get('content') is None]
+    if not missing:
+        return rows
+    keys = [row[hash_key] if hash_key else url_hash(row['url']) for row in missing]
+    contents = load_contents(conn, keys)
+    for row, key in zip(missing, keys):
+        row['content'] = contents.get(key, '')
+    return rows
+
+
+class ContentStore:
+    """
+    正文压缩写入（一个实例对应一个数据库，线程安全）
+
+    用法：
+        store = ContentStore('zstd', dictionary=True)
+        store.put(cursor, url_hash(url), content, source)
+        # news表的content列写入NULL
+    """
+
+    def __init__(self, codec='zlib', level=6, dictionary=False, dictionary_size_kb=64,
+                 dictionary_samples=200):
+        if codec not in CODECS:
+            raise ValueError(f'未知的压缩算法: {codec}')
+        if codec == 'zstd' and load_zstd() is None:
+            logging.warning('未安装zstandard，正文改用zlib压缩')
+            codec = 'zlib'
+        self.codec = codec
+        self.level = level
+        self.use_dictionary = dictionary and codec == 'zstd'
+        self.dictionary_size = int(dictionary_size_kb * 1024)
+        self.dictionary_samples = dictionary_samples
+        # 来源 -> (字典ID, ZstdCompressionDict)，None为尚未训练
+        self._dictionaries = {}
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+        # 压缩器不能跨线程使用，每个线程按字典ID缓存（加载字典比压缩一篇正文还慢）
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, settings):
+        """按 content_storage 配置创建，未开启压缩时返回None"""
+        settings = settings or {}
+        if not settings.get('compress'):
+            return None
+        return cls(
+            codec=settings.get('codec', 'zlib'),
+            level=settings.get('level', 6),
+            dictionary=settings.get('dictionary', False),
+            dictionary_size_kb=settings.get('dictionary_size_kb', 64),
+            dictionary_samples=settings.get('dictionary_samples', 200)
+        )
+
+    def put(self, cursor, key, content, source=None):
+        """压缩写入一条正文"""
+        raw = (content or '').encode('utf-8')
+        if self.codec == 'zlib':
+            dict_id, body = None, zlib.compress(raw, self.level)
+        else:
+            dict_id, body = self._compress_zstd(cursor, raw, source)
+        cursor.execute(
+            'INSERT OR REPLACE INTO news_content (url_hash, codec, dict_id, raw_size, body) VALUES (?, ?, ?, ?, ?)',
+            (key, self.codec, dict_id, len(raw), body)
+        )
+
+    def _compress_zstd(self, cursor, raw, source):
+        dictionary = self._dictionary_for(cursor, source, raw) if self.use_dictionary else None
+        dict_id, dict_data = dictionary or (None, None)
+
+        compressors = getattr(self._local, 'compressors', None)
+        if compressors is None:
+            compressors = self._local.compressors = {}
+        compressor = compressors.get(dict_id)
+        if compressor is None:
+            compressor = compressors[dict_id] = load_zstd().ZstdCompressor(level=self.level, dict_data=dict_data)
+        return dict_id, compressor.compress(raw)
+
+    def _dictionary_for(self, cursor, source, raw):
+        """来源的字典；还没有字典时收集样本，样本足够后训练"""
+        source = source or ''
+        with self._lock:
+            if source not in self._dictionaries:
+                row = cursor.execute(
+                    'SELECT id, data FROM content_dicts WHERE source = ? ORDER BY id DESC LIMIT 1', (source,)
+                ).fetchone()
+                self._dictionaries[source] = (row[0], load_zstd().ZstdCompressionDict(row[1])) if row else None
+
+            dictionary = self._dictionaries[source]
+            if dictionary is None and raw:
+                samples = self._samples[source]
+                samples.append(raw)
+                if len(samples) >= self.dictionary_samples:
+                    dictionary = self._dictionaries[source] = self.train(cursor, source, samples)
+                    del self._samples[source]
+            return dictionary
+
+    def train(self, cursor, source, samples):
+        """
+        用正文样本（bytes）训练字典并写入content_dicts，返回 (字典ID, 字典)
+
+        样本太少或太相似时训练失败，返回None（继续不用字典压缩）
+        """
+        zstd = load_zstd()
+        try:
+            dictionary = zstd.train_dictionary(self.dictionary_size, samples)
+        except zstd.ZstdError as e:
+            logging.warning(f'来源 {source} 的压缩字典训练失败: {e}')
+            return None
+        cursor.execute(
+            'INSERT INTO content_dicts (source, data, created_at) VALUES (?, ?, ?)',
+            (source, dictionary.as_bytes(), datetime.now().isoformat())
+        )
+        logging.info(f'来源 {source} 的压缩字典训练完成（{len(samples)} 个样本）')
+        return cursor.lastrowid, dictionary
+
+
+def table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def migrate(db_path, table, store, batch_size=500, vacuum=True):
+    """
+    把表中已有的正文压缩写入news_content，content列置为NULL，返回迁移条数
+
+    使用字典时先按来源取样训练字典；store只能用于这一个数据库（字典ID属于该数据库）。
+    每批写入后读回解压校验，不一致的行保留原文
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        init_content_tables(conn)
+        hash_column = 'url_hash' if 'url_hash' in table_columns(conn, table) else None
+
+        if store.use_dictionary:
+            cursor = conn.cursor()
+            sources = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT source FROM {table} WHERE content IS NOT NULL')]
+            for source in sources:
+                if cursor.execute('SELECT 1 FROM content_dicts WHERE source = ?', (source or '',)).fetchone():
+                    continue
+                samples = [row[0].encode('utf-8') for row in conn.execute(
+                    f'SELECT content FROM {table} WHERE source IS ? AND content != \'\' '
+                    f'ORDER BY RANDOM() LIMIT ?', (source, store.dictionary_samples))]
+                if samples:
+                    store.train(cursor, source or '', samples)
+            conn.commit()
+
+        total = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f'SELECT id, url, {hash_column or "NULL"}, source, content FROM {table} '
+                f'WHERE content IS NOT NULL AND id > ? ORDER BY id LIMIT ?', (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            cursor = conn.cursor()
+            keys = [key or url_hash(url) for _, url, key, _, _ in rows]
+            for (_, _, _, source, content), key in zip(rows, keys):
+                store.put(cursor, key, content, source)
+            # 读回校验：解压结果与原文一致的行才把content置为NULL
+            try:
+                stored = load_contents(conn, keys)
+            except Exception as e:
+                conn.rollback()
+                raise RuntimeError(f'{db_path} 压缩后读回失败，已停止迁移: {e}') from e
+            verified = [row[0] for row, key in zip(rows, keys) if stored.get(key) == row[4]]
+            if len(verified) < len(rows):
+                logging.error(f'{db_path} 有 {len(rows) - len(verified)} 条正文压缩后读回不一致，保留原文')
+            cursor.executemany(f'UPDATE {table} SET content = NULL WHERE id = ?', [(row_id,) for row_id in verified])
+            conn.commit()
+            total += len(verified)
+            last_id = rows[-1][0]
+
+        if vacuum and total:
+            conn.execute('VACUUM')
+        return total
+    finally:
+        conn.close()
+
+
+def restore(db_path, table, batch_size=500):
+    """把news_content中的正文解压回content列，返回恢复条数"""
+    conn = sqlite3.connect(db_path)
+    try:
+        hash_column = 'url_hash' if 'url_hash' in table_columns(conn, table) else None
+        total = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f'SELECT id, url, {hash_column or "NULL"} FROM {table} '
+                f'WHERE content IS NULL AND id > ? ORDER BY id LIMIT ?', (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            keys = [key or url_hash(url) for _, url, key in rows]
+            contents = load_contents(conn, keys)
+            for (row_id, _, _), key in zip(rows, keys):
+                if key in contents:
+                    conn.execute(f'UPDATE {table} SET content = ? WHERE id = ?', (contents[key], row_id))
+                    conn.execute('DELETE FROM news_content WHERE url_hash = ?', (key,))
+                    total += 1
+            conn.commit()
+            last_id = rows[-1][0]
+        return total
+    finally:
+        conn.close()
+
+
+def storage_stats(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        stats = {
+            'rows': conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0],
+            'inline_rows': conn.execute(f'SELECT COUNT(*) FROM {table} WHERE content IS NOT NULL').fetchone()[0],
+            'file_mb': round(os.path.getsize(db_path) / 1024 / 1024, 2)
+        }
+        try:
+            compressed, raw_size, stored = conn.execute(
+                'SELECT COUNT(*), SUM(raw_size), SUM(LENGTH(body)) FROM news_content').fetchone()
+            stats.update({
+                'compressed_rows': compressed,
+                'raw_mb': round((raw_size or 0) / 1024 / 1024, 2),
+                'stored_mb': round((stored or 0) / 1024 / 1024, 2),
+                'ratio': round(raw_size / stored, 2) if stored else None,
+                'dictionaries': conn.execute('SELECT COUNT(*) FROM content_dicts').fetchone()[0]
+            })
+        except sqlite3.OperationalError:
+            stats['compressed_rows'] = 0
+        return stats
+    finally:
+        conn.close()
+
+
+def main():
+    import json
+
+    parser = argparse.ArgumentParser(description='正文压缩存储迁移')
+    parser.add_argument('command', choices=['migrate', 'restore', 'stats'])
+    parser.add_argument('--config', default='crawler_config.json', help='读取content_storage中的压缩设置')
+    parser.add_argument('--db', help='只处理一个数据库（需同时指定--table）')
+    parser.add_argument('--table', help='正文所在的表（news或news_summary）')
+    parser.add_argument('--codec', choices=CODECS)
+    parser.add_argument('--level', type=int)
+    parser.add_argument('--dictionary', action='store_true', help='按来源训练zstd字典')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--no-vacuum', action='store_true', help='迁移后不执行VACUUM（文件大小不会立即减小）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    settings = {}
+    if os.path.exists(args.config):
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('content_storage', {})
+
+    targets = [(args.db, args.table or 'news')] if args.db else DEFAULT_TARGETS
+    targets = [(db_path, table) for db_path, table in targets if os.path.exists(db_path)]
+    if not targets:
+        print('没有找到数据库')
+        return
+
+    for db_path, table in targets:
+        if args.command == 'migrate':
+            # ContentStore缓存了字典（字典ID属于各自的数据库），每个数据库使用新的实例
+            store = ContentStore(
+                codec=args.codec or settings.get('codec', 'zlib'),
+                level=args.level if args.level is not None else settings.get('level', 6),
+                dictionary=args.dictionary or settings.get('dictionary', False),
+                dictionary_size_kb=settings.get('dictionary_size_kb', 64),
+                dictionary_samples=settings.get('dictionary_samples', 200)
+            )
+            before = os.path.getsize(db_path)
+            total = migrate(db_path, table, store, args.batch_size, vacuum=not args.no_vacuum)
+            after = os.path.getsize(db_path)
+            print(f'{db_path} [{table}]: 压缩 {total} 条正文，文件 {before / 1024 / 1024:.2f}MB -> {after / 1024 / 1024:.2f}MB')
+        elif args.command == 'restore':
+            total = restore(db_path, table, args.batch_size)
+            print(f'{db_path} [{table}]: 恢复 {total} 条正文')
+        else:
+            print(f'{db_path} [{table}]: {json.dumps(storage_stats(db_path, table), ensure_ascii=False)}')
+
+    if args.command == 'migrate':
+        print('迁移后请在配置文件的 content_storage 中设置 "compress": true，新爬取的正文才会压缩保存')
+
+
+if __name__ == '__main__':
+    main()
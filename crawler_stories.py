@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+新闻事件聚类 - 把不同来源报道同一事件的新闻归为一个事件（story）
+功能：
+1. 新闻写入汇总表时在线聚类：标题（权重加倍）、摘要和正文开头按语料TF-IDF构成稀疏向量
+   （分词和IDF使用crawler_keywords.KeywordEngine）
+2. 近似最近邻索引：每个事件中心向量权重最高的若干词建倒排表，每个词只保留最近活跃的
+   若干事件；新文章只与共享高权重词的候选事件比较余弦相似度，不遍历全部事件
+3. 相似度达到阈值时加入最相似的事件，否则新建事件；超过时间范围未更新的事件移出索引，
+   不重新聚类历史数据
+4. 事件信息（标题、篇数、来源、首次/最近出现时间、中心向量）保存在story_clusters表，
+   汇总表的cluster_id列记录所属事件；重启后从表中加载近期事件
+5. 命令行给未聚类的已有新闻分配事件：
+   python crawler_stories.py assign --db news_data/crawler_manager.db
+"""
+
+import argparse
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from crawler_keywords import KeywordEngine
+from crawler_metrics import metrics
+
+STORY_RESULTS = metrics.counter(
+    'crawler_stories_total', '新闻事件聚类结果（joined为加入已有事件，created为新建事件）', ['result'])
+
+
+class _Story:
+    """内存中的事件：中心向量（成员向量之和，只保留权重最高的词）和统计信息"""
+
+    __slots__ = ('id', 'title', 'centroid', 'norm', 'size', 'sources', 'first_seen', 'last_seen', 'active')
+
+    def __init__(self, story_id, title, centroid, size, sources, first_seen, last_seen, active):
+        self.id = story_id
+        self.title = title
+        self.centroid = centroid
+        self.norm = math.sqrt(sum(weight * weight for weight in centroid.values())) or 1.0
+        self.size = size
+        self.sources = sources
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        # 最近活跃的时间戳，用于移出索引
+        self.active = active
+
+
+class StoryClusterer:
+    """
+    在线新闻事件聚类（线程安全）
+
+    用法：
+        clusterer = StoryClusterer()
+        clusterer.init_tables(conn)
+        clusterer.warm(conn)
+        story_id = clusterer.assign(cursor, row_id, record)   # record为汇总表的一行
+    """
+
+    def __init__(self, engine=None, threshold=0.3, vector_terms=30, index_terms=8, centroid_terms=60,
+                 max_postings=64, horizon_hours=72, content_chars=300, save_interval=60):
+        self.engine = engine or KeywordEngine()
+        # 与事件中心向量的余弦相似度达到阈值才归入该事件
+        self.threshold = threshold
+        self.vector_terms = vector_terms
+        self.index_terms = index_terms
+        self.centroid_terms = centroid_terms
+        self.max_postings = max_postings
+        self.horizon_seconds = horizon_hours * 3600
+        self.content_chars = content_chars
+        self.save_interval = save_interval
+
+        self.stories = {}
+        # 词 -> 最近活跃的事件ID（有序，最多max_postings个）
+        self.postings = {}
+        self.assigned = 0
+        self.created = 0
+        self._last_save = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, analysis_settings):
+        """按 analysis_settings.story_clustering 创建，未开启时返回None"""
+        analysis_settings = analysis_settings or {}
+        settings = analysis_settings.get('story_clustering', {})
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            engine=KeywordEngine.from_config(analysis_settings),
+            threshold=settings.get('threshold', 0.3),
+            vector_terms=settings.get('vector_terms', 30),
+            index_terms=settings.get('index_terms', 8),
+            centroid_terms=settings.get('centroid_terms', 60),
+            max_postings=settings.get('max_postings', 64),
+            horizon_hours=settings.get('horizon_hours', 72),
+            content_chars=settings.get('content_chars', 300)
+        )
+
+    def init_tables(self, conn, table='news_summary'):
+        """创建事件表，给新闻表补充cluster_id列"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS story_clusters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT,
+                size INTEGER NOT NULL DEFAULT 0,
+                sources TEXT,
+                first_seen TEXT,
+                last_seen TEXT,
+                centroid TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_story_clusters_last_seen ON story_clusters (last_seen)')
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if 'cluster_id' not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN cluster_id INTEGER')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_cluster_id ON {table} (cluster_id)')
+        self.engine.init_table(conn)
+
+    def vectorize(self, record):
+        """新闻的TF-IDF向量 {词: 权重}（单位长度，只保留权重最高的vector_terms个词）"""
+        text = ' '.join([record.get('title') or ''] * 2 + [record.get('summary') or '',
+                                                           (record.get('content') or '')[:self.content_chars]])
+        counts = self.engine.count_matrix(self.engine.tokenize_batch([text]))
+        if counts.nnz == 0:
+            return {}
+        # 不用平滑后的+1：几乎每篇都有的常用词权重接近0，不会让无关新闻显得相似
+        weights = counts.data * (self.engine.idf(counts.shape[1])[counts.indices] - 1)
+        terms = self.engine.terms
+        top = [(terms[counts.indices[i]], weights[i]) for i in weights.argsort()[::-1][:self.vector_terms]
+               if weights[i] > 0]
+        norm = math.sqrt(sum(weight * weight for _, weight in top))
+        return {term: float(weight / norm) for term, weight in top} if norm else {}
+
+    @staticmethod
+    def _timestamp(value):
+        try:
+            return datetime.fromisoformat(str(value).strip()).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
+    def nearest(self, vector):
+        """返回 (最相似的事件, 余弦相似度)；只比较与该向量共享高权重词的候选事件"""
+        candidates = set()
+        for term in sorted(vector, key=vector.get, reverse=True)[:self.index_terms]:
+            candidates.update(self.postings.get(term, ()))
+
+        best, best_similarity = None, 0.0
+        for story_id in candidates:
+            story = self.stories.get(story_id)
+            if story is None:
+                continue
+            centroid = story.centroid
+            similarity = sum(weight * centroid.get(term, 0.0) for term, weight in vector.items()) / story.norm
+            if similarity > best_similarity:
+                best, best_similarity = story, similarity
+        return best, best_similarity
+
+    def assign(self, cursor, row_id, record, table='news_summary'):
+        """给一条新闻分配事件并写入数据库，返回事件ID（没有可用文字时返回None）"""
+        vector = self.vectorize(record)
+        if not vector:
+            return None
+
+        crawl_time = record.get('crawl_time') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        source = record.get('source') or ''
+        with self._lock:
+            story, similarity = self.nearest(vector)
+            if story is None or similarity < self.threshold:
+                inserted = cursor.execute(
+                    'INSERT INTO story_clusters (title, size, sources, first_seen, last_seen) VALUES (?, 0, ?, ?, ?)',
+                    (record.get('title'), '[]', crawl_time, crawl_time)
+                )
+                story = _Story(inserted.lastrowid, record.get('title'), {}, 0, [], crawl_time, crawl_time, 0)
+                self.stories[story.id] = story
+                self.created += 1
+                STORY_RESULTS.inc(result='created')
+            else:
+                STORY_RESULTS.inc(result='joined')
+
+            self._add_member(story, vector, source, crawl_time)
+            self.assigned += 1
+            if self.assigned % 1000 == 0:
+                self._expire(story.active)
+
+            cursor.execute('''
+                UPDATE story_clusters SET size = ?, sources = ?, first_seen = ?, last_seen = ?, centroid = ?
+                WHERE id = ?
+            ''', (story.size, json.dumps(story.sources, ensure_ascii=False), story.first_seen, story.last_seen,
+                  json.dumps({term: round(weight, 4) for term, weight in story.centroid.items()}, ensure_ascii=False),
+                  story.id))
+        cursor.execute(f'UPDATE {table} SET cluster_id = ? WHERE id = ?', (story.id, row_id))
+        return story.id
+
+    def _add_member(self, story, vector, source, crawl_time):
+        centroid = story.centroid
+        for term, weight in vector.items():
+            centroid[term] = centroid.get(term, 0.0) + weight
+        if len(centroid) > self.centroid_terms * 2:
+            story.centroid = centroid = dict(sorted(centroid.items(), key=lambda item: item[1],
+                                                    reverse=True)[:self.centroid_terms])
+        story.norm = math.sqrt(sum(weight * weight for weight in centroid.values())) or 1.0
+
+        story.size += 1
+        if source and source not in story.sources:
+            story.sources.append(source)
+        story.first_seen = min(story.first_seen, crawl_time)
+        story.last_seen = max(story.last_seen, crawl_time)
+        story.active = max(story.active, self._timestamp(crawl_time))
+        self._index(story)
+
+    def _index(self, story):
+        """事件中心向量权重最高的词加入倒排表，每个词只保留最近活跃的事件"""
+        centroid = story.centroid
+        for term in sorted(centroid, key=centroid.get, reverse=True)[:self.index_terms]:
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = OrderedDict()
+            posting[story.id] = None
+            posting.move_to_end(story.id)
+            while len(posting) > self.max_postings:
+                posting.popitem(last=False)
+
+    def _expire(self, now):
+        """超过时间范围未更新的事件移出内存索引（数据库中的记录保留）"""
+        cutoff = now - self.horizon_seconds
+        expired = [story_id for story_id, story in self.stories.items() if story.active < cutoff]
+        for story_id in expired:
+            del self.stories[story_id]
+        if expired:
+            for term in list(self.postings):
+                posting = self.postings[term]
+                for story_id in [story_id for story_id in posting if story_id not in self.stories]:
+                    del posting[story_id]
+                if not posting:
+                    del self.postings[term]
+
+    def warm(self, conn, now=None):
+        """加载时间范围内的事件和语料文档频率（启动时调用），返回加载的事件数"""
+        self.engine.load(conn)
+        now = now or time.time()
+        since = datetime.fromtimestamp(now - self.horizon_seconds).strftime('%Y-%m-%d %H:%M:%S')
+        rows = conn.execute('''
+            SELECT id, title, size, sources, first_seen, last_seen, centroid FROM story_clusters
+            WHERE last_seen >= ? AND centroid IS NOT NULL ORDER BY last_seen
+        ''', (since,)).fetchall()
+        with self._lock:
+            for story_id, title, size, sources, first_seen, last_seen, centroid in rows:
+                story = _Story(story_id, title, json.loads(centroid), size, json.loads(sources or '[]'),
+                               first_seen, last_seen, self._timestamp(last_seen))
+                self.stories[story_id] = story
+                self._index(story)
+        logging.info(f'新闻事件聚类已加载 {len(rows)} 个近期事件')
+        return len(rows)
+
+    def maybe_save(self, conn, force=False):
+        """定期保存语料文档频率（距上次保存超过save_interval秒）"""
+        if not force and time.time() - self._last_save < self.save_interval:
+            return
+        self.engine.save(conn)
+        self._last_save = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {'active_stories': len(self.stories), 'indexed_terms': len(self.postings),
+                    'assigned': self.assigned, 'created': self.created}
+
+
+def assign_unclustered(db_path, clusterer, table='news_summary', batch_size=500):
+    """按爬取时间顺序给未聚类的新闻分配事件，返回处理条数"""
+    from crawler_storage import fill_content
+
+    conn = sqlite3.connect(db_path)
+    try:
+        clusterer.init_tables(conn, table)
+        clusterer.warm(conn)
+        total = 0
+        last_id = 0
+        while True:
+            cursor = conn.execute(f'''
+                SELECT id, url, title, summary, content, source, crawl_time FROM {table}
+                WHERE cluster_id IS NULL AND id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            columns = [column[0] for column in cursor.description]
+            rows = fill_content(conn, [dict(zip(columns, row)) for row in cursor.fetchall()])
+            if not rows:
+                break
+            rows.sort(key=lambda row: row['crawl_time'] or '')
+            for row in rows:
+                clusterer.assign(conn, row['id'], row, table)
+            last_id = max(row['id'] for row in rows)
+            total += len(rows)
+            clusterer.maybe_save(conn)
+            conn.commit()
+            logging.info(f'已聚类 {total} 条新闻')
+        clusterer.maybe_save(conn, force=True)
+        conn.commit()
+        return total
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻事件聚类工具')
+    parser.add_argument('command', choices=['assign', 'stats'])
+    parser.add_argument('--config', default='crawler_config.json', help='读取analysis_settings中的聚类设置')
+    parser.add_argument('--db', default='news_data/crawler_manager.db')
+    parser.add_argument('--table', default='news_summary')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    settings = {}
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('analysis_settings', {})
+    except FileNotFoundError:
+        pass
+    clusterer = StoryClusterer.from_config(settings) or StoryClusterer()
+
+    if args.command == 'assign':
+        total = assign_unclustered(args.db, clusterer, args.table)
+        print(f'{args.db} [{args.table}]: 聚类 {total} 条新闻，新建 {clusterer.created} 个事件')
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            count, multi, largest = conn.execute(
+                'SELECT COUNT(*), SUM(size > 1), MAX(size) FROM story_clusters').fetchone()
+            print(f'事件 {count} 个，其中多篇报道的 {multi or 0} 个，最大事件 {largest or 0} 篇')
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的自适应限流
+功能：
+1. 每个主机独立的并发上限，按AIMD调整：请求正常时缓慢增加，
+   出现429/503、超时或延迟明显升高时成倍减少
+2. 遵守Retry-After：该主机的所有线程暂停到指定时间
+3. 重试采用带随机抖动的指数退避；404等永久错误不重试
+4. 熔断：主机连续失败达到阈值后熔断一段时间，期间请求直接失败，不占用工作线程；
+   冷却后放行一个探测请求，成功则恢复，失败则加倍冷却时间
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from crawler_metrics import metrics
+
+HOST_CONCURRENCY = metrics.gauge(
+    'crawler_host_concurrency', '各主机当前的自适应并发上限', ['host'])
+CIRCUIT_OPEN = metrics.gauge(
+    'crawler_circuit_open', '主机是否处于熔断状态（1为熔断）', ['host'])
+THROTTLE_EVENTS = metrics.counter(
+    'crawler_throttle_events_total', '限流事件（backoff/retry_after/circuit_open/circuit_rejected）',
+    ['host', 'event'])
+
+# 可以重试的状态码，403在更换请求头后重试
+RETRYABLE_STATUS = {403, 408, 425, 429, 500, 502, 503, 504}
+# 说明主机过载、需要降低并发的状态码
+OVERLOAD_STATUS = {429, 503}
+
+DEFAULT_OPTIONS = {
+    'min_concurrency': 1,
+    'max_concurrency': 5,
+    'latency_tolerance': 2.0,
+    'latency_slack': 0.05,
+    'decrease_factor': 0.5,
+    'circuit_failure_threshold': 5,
+    'circuit_reset_seconds': 30,
+    'circuit_max_reset_seconds': 600
+}
+
+
+def is_retryable_status(status):
+    return status in RETRYABLE_STATUS
+
+
+def parse_retry_after(value, max_seconds=None):
+    """解析Retry-After头（秒数或HTTP日期），返回等待秒数，无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    seconds = max(0.0, seconds)
+    if max_seconds is not None:
+        seconds = min(seconds, max_seconds)
+    return seconds
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """第attempt次重试前的等待时间：指数退避加完全随机抖动"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class HostThrottle:
+    """单个主机的并发控制和熔断状态"""
+
+    def __init__(self, host, options):
+        self.host = host
+        self.options = options
+        self.min_limit = max(1, options['min_concurrency'])
+        self.max_limit = max(self.min_limit, options['max_concurrency'])
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.paused_until = 0.0
+
+        # 延迟基线取观察到的最低平滑延迟
+        self.latency_ewma = None
+        self.latency_floor = None
+        self.last_decrease = 0.0
+
+        self.failures = 0
+        self.circuit_until = 0.0
+        self.reset_seconds = options['circuit_reset_seconds']
+        self.probing = False
+
+        self._cond = threading.Condition()
+        HOST_CONCURRENCY.set(self.max_limit, host=host)
+        CIRCUIT_OPEN.set(0, host=host)
+
+    @property
+    def circuit_open(self):
+        return self.circuit_until > time.monotonic()
+
+    def acquire(self, timeout=None):
+        """
+        等待可用的并发名额，返回是否获得
+
+        熔断期间立即返回False；冷却结束后只放行一个探测请求，
+        其他请求等待探测结果（成功则继续，失败则随重新熔断返回False）或等到超时
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.circuit_until > now:
+                    THROTTLE_EVENTS.inc(host=self.host, event='circuit_rejected')
+                    return False
+
+                wait = self.paused_until - now
+                if not self.probing and wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    # 熔断冷却后的第一个请求作为探测
+                    if self.failures >= self.options['circuit_failure_threshold']:
+                        self.probing = True
+                    return True
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining) if wait > 0 else remaining
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, latency=None, status=None, error=False, retry_after=None, ignore=False):
+        """
+        归还名额并根据结果调整
+
+        latency为请求耗时；status为HTTP状态码；error表示连接失败或超时；
+        ignore=True 时只归还名额（例如代理故障，与主机无关）
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if ignore:
+                self.probing = False
+                self._cond.notify_all()
+                return
+            now = time.monotonic()
+
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+                THROTTLE_EVENTS.inc(host=self.host, event='retry_after')
+
+            # 429说明主机正常但要求降速，只减并发不计入熔断
+            overloaded = error or status in OVERLOAD_STATUS
+            failed = error or (status is not None and status >= 500)
+
+            if latency is not None and not error:
+                self._observe_latency(latency)
+
+            if overloaded or self._latency_high(latency):
+                self._decrease(now)
+            elif not failed:
+                # 加性增：大约每一轮（limit个请求）增加1
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            if failed:
+                self.failures += 1
+                if self.failures >= self.options['circuit_failure_threshold']:
+                    self._open_circuit(now)
+            else:
+                if self.failures >= self.options['circuit_failure_threshold']:
+                    CIRCUIT_OPEN.set(0, host=self.host)
+                self.failures = 0
+                self.reset_seconds = self.options['circuit_reset_seconds']
+            self.probing = False
+
+            HOST_CONCURRENCY.set(round(self.limit, 2), host=self.host)
+            self._cond.notify_all()
+
+    def _observe_latency(self, latency):
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+        if self.latency_floor is None or self.latency_ewma < self.latency_floor:
+            self.latency_floor = self.latency_ewma
+
+    def _latency_high(self, latency):
+        if latency is None or self.latency_floor is None:
+            return False
+        # 低延迟时忽略几十毫秒的抖动
+        threshold = max(self.latency_floor * self.options['latency_tolerance'],
+                        self.latency_floor + self.options['latency_slack'])
+        return self.latency_ewma > threshold and latency > threshold
+
+    def _decrease(self, now):
+        # 同一轮请求内只减一次，避免并发的失败把上限一下降到底
+        if now - self.last_decrease < (self.latency_ewma or 0.0):
+            return
+        self.limit = max(self.min_limit, self.limit * self.options['decrease_factor'])
+        self.last_decrease = now
+        THROTTLE_EVENTS.inc(host=self.host, event='backoff')
+
+    def _open_circuit(self, now):
+        # 探测失败时冷却时间加倍
+        if self.probing:
+            self.reset_seconds = min(self.reset_seconds * 2, self.options['circuit_max_reset_seconds'])
+        self.circuit_until = now + self.reset_seconds
+        CIRCUIT_OPEN.set(1, host=self.host)
+        THROTTLE_EVENTS.inc(host=self.host, event='circuit_open')
+
+    def snapshot(self):
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'host': self.host,
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                'consecutive_failures': self.failures,
+                'circuit_open': self.circuit_until > now,
+                'paused_seconds': round(max(0.0, self.paused_until - now), 1)
+            }
+
+
+class AdaptiveThrottle:
+    """
+    各主机限流状态的集合
+
+    用法：
+        throttle = AdaptiveThrottle(max_concurrency=5)
+        host = throttle.host('news.163.com')
+        if host.acquire():
+            ...请求...
+            host.release(latency, status=response.status_code)
+    """
+
+    def __init__(self, **options):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({key: value for key, value in options.items() if value is not None})
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, host):
+        throttle = self._hosts.get(host)
+        if throttle is None:
+            with self._lock:
+                throttle = self._hosts.get(host)
+                if throttle is None:
+                    throttle = self._hosts[host] = HostThrottle(host, self.options)
+        return throttle
+
+    def stats(self):
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return [throttle.snapshot() for throttle in hosts]
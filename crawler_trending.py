@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+热点关键词检测 - 滑动时间窗口
+功能：
+1. 新闻入库时按时间桶（默认5分钟/1小时/1天三档）增量累计关键词的文档数
+2. 每个时间桶一个Count-Min Sketch（固定大小的计数表）和一个有界的高频候选词表，
+   内存占用与历史数据量无关
+3. 热度得分：最近一个窗口（滑动）中关键词出现的篇数，与更早各桶中该词占文章数的比例（基线）比较，
+   按泊松近似的z分数排序，持续高频的常见词得分低，突然增多的词得分高
+4. 查询只遍历固定数量的候选词和时间桶，耗时与历史数据量无关
+"""
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime
+
+# 窗口名称: (每个桶的秒数, 保留的桶数)
+DEFAULT_WINDOWS = {
+    '5m': (300, 12),
+    '1h': (3600, 24),
+    '1d': (86400, 7)
+}
+
+
+class CountMinSketch:
+    """Count-Min Sketch：估计值只会偏大，偏差上限约为 总数 × e / width"""
+
+    __slots__ = ('width', 'depth', 'rows')
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('l', bytes(8 * width)) for _ in range(depth)]
+
+    def indexes(self, term):
+        # 双重哈希生成depth个位置（进程内使用，不需要跨进程稳定的哈希）
+        first = hash(term)
+        second = hash((term, 'cms')) | 1
+        return [(first + i * second) % self.width for i in range(self.depth)]
+
+    def add(self, term, count=1, indexes=None):
+        """累加并返回新的估计值"""
+        estimate = None
+        for row, index in zip(self.rows, indexes or self.indexes(term)):
+            value = row[index] = row[index] + count
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def estimate(self, term, indexes=None):
+        """估计值；查询多个宽度相同的计数表时可传入预先计算的位置"""
+        return min(row[index] for row, index in zip(self.rows, indexes or self.indexes(term)))
+
+    def clear(self):
+        for i in range(self.depth):
+            self.rows[i] = array('l', bytes(8 * self.width))
+
+
+class _Bucket:
+    """
+    一个时间桶：计数表、高频候选词和文章数（计数表在第一次使用时分配）
+
+    heap 是候选词的最小堆，其中的估计值可能已过时（只会偏小），淘汰时再修正
+    """
+
+    __slots__ = ('number', 'sketch', 'top', 'heap', 'docs', 'width', 'depth')
+
+    def __init__(self, width, depth):
+        self.number = None
+        self.sketch = None
+        self.top = {}
+        self.heap = []
+        self.docs = 0
+        self.width = width
+        self.depth = depth
+
+    def reset(self, number):
+        self.number = number
+        if self.sketch is None:
+            self.sketch = CountMinSketch(self.width, self.depth)
+        else:
+            self.sketch.clear()
+        self.top = {}
+        self.heap = []
+        self.docs = 0
+
+
+class _Window:
+    """固定桶数的环形时间窗口"""
+
+    def __init__(self, name, seconds, size, width, depth):
+        self.name = name
+        self.seconds = seconds
+        self.size = size
+        self.buckets = [_Bucket(width, depth) for _ in range(size)]
+        # 最早记录的桶号，之前的桶没有数据，不计入基线
+        self.first_number = None
+
+    def bucket(self, number, create=False):
+        bucket = self.buckets[number % self.size]
+        if bucket.number == number:
+            return bucket
+        if create and (bucket.number is None or bucket.number < number):
+            bucket.reset(number)
+            return bucket
+        return None
+
+
+class TrendingTracker:
+    """
+    热点关键词统计（线程安全）
+
+    用法：
+        tracker = TrendingTracker()
+        tracker.add('芯片, 半导体, 出口')          # 一篇文章的关键词
+        tracker.trending('1h', limit=20)           # 最近一小时的热点词
+    """
+
+    def __init__(self, windows=None, sketch_width=2048, sketch_depth=4, top_k=200, min_count=3):
+        self.top_k = top_k
+        self.min_count = min_count
+        self.windows = {
+            name: _Window(name, seconds, size, sketch_width, sketch_depth)
+            for name, (seconds, size) in (windows or DEFAULT_WINDOWS).items()
+        }
+        # 每次累计后递增，用于API缓存失效
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings):
+        settings = settings or {}
+        windows = settings.get('windows')
+        return cls(
+            windows={name: tuple(value) for name, value in windows.items()} if windows else None,
+            sketch_width=settings.get('sketch_width', 2048),
+            sketch_depth=settings.get('sketch_depth', 4),
+            top_k=settings.get('top_k', 200),
+            min_count=settings.get('min_count', 3)
+        )
+
+    @property
+    def span_seconds(self):
+        """最长窗口覆盖的秒数"""
+        return max(window.seconds * window.size for window in self.windows.values())
+
+    @staticmethod
+    def parse_keywords(keywords):
+        """关键词字符串（逗号分隔）或列表，去重"""
+        if not keywords:
+            return []
+        if isinstance(keywords, str):
+            keywords = keywords.replace('，', ',').split(',')
+        return list(dict.fromkeys(term.strip() for term in keywords if term and term.strip()))
+
+    @staticmethod
+    def parse_time(value):
+        """时间字符串转时间戳，无法解析时返回None"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).strip()).timestamp()
+        except ValueError:
+            return None
+
+    def add(self, keywords, timestamp=None):
+        """累计一篇文章的关键词（同一篇中重复的词只计一次）"""
+        terms = self.parse_keywords(keywords)
+        timestamp = timestamp or time.time()
+        # 所有窗口的计数表大小相同，哈希位置每个词只算一次
+        positions = {}
+        with self._lock:
+            for window in self.windows.values():
+                number = int(timestamp // window.seconds)
+                bucket = window.bucket(number, create=True)
+                if bucket is None:
+                    # 早于窗口保留范围
+                    continue
+                if window.first_number is None or number < window.first_number:
+                    window.first_number = number
+                bucket.docs += 1
+                sketch = bucket.sketch
+                for term in terms:
+                    indexes = positions.get(term)
+                    if indexes is None:
+                        indexes = positions[term] = sketch.indexes(term)
+                    self._offer(bucket, term, sketch.add(term, 1, indexes))
+            self.version += 1
+
+    def _offer(self, bucket, term, estimate):
+        """更新候选词表，满了之后替换估计值最小的词"""
+        top = bucket.top
+        if term in top:
+            top[term] = estimate
+            return
+        heap = bucket.heap
+        if len(top) < self.top_k:
+            top[term] = estimate
+            heapq.heappush(heap, (estimate, term))
+            return
+        # 堆顶的估计值过时则修正后重新比较
+        while heap[0][0] != top[heap[0][1]]:
+            heapq.heapreplace(heap, (top[heap[0][1]], heap[0][1]))
+        floor, floor_term = heap[0]
+        if estimate > floor:
+            del top[floor_term]
+            top[term] = estimate
+            heapq.heapreplace(heap, (estimate, term))
+
+    def on_event(self, event_type, data):
+        """事件总线监听器：累计新新闻的关键词"""
+        if event_type == 'news' and data:
+            self.add(data.get('keywords'), self.parse_time(data.get('crawl_time')))
+
+    def warm(self, conn, table='news_summary', now=None):
+        """从数据库加载最长窗口内的新闻（启动时调用），返回加载条数"""
+        now = now or time.time()
+        since = datetime.fromtimestamp(now - self.span_seconds).strftime('%Y-%m-%d %H:%M:%S')
+        loaded = 0
+        cursor = conn.execute(f'SELECT keywords, crawl_time FROM {table} WHERE crawl_time >= ?', (since,))
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for keywords, crawl_time in rows:
+                timestamp = self.parse_time(crawl_time)
+                if timestamp and timestamp <= now:
+                    self.add(keywords, timestamp)
+                    loaded += 1
+        logging.info(f'热点关键词统计已加载 {loaded} 条近期新闻')
+        return loaded
+
+    def bucket_number(self, window_name, now=None):
+        """当前时间所在的桶号（窗口滚动后API缓存随之失效）"""
+        window = self.windows[window_name]
+        return int((now or time.time()) // window.seconds)
+
+    def trending(self, window_name='1h', limit=20, now=None):
+        """
+        最近一个窗口（例如最近一小时）中热度最高的关键词
+
+        当前桶刚开始时数据很少，因此按滑动窗口计算：当前桶加上前一个桶中仍在窗口内的部分
+        （按时间比例折算）；基线为更早的、有数据的各桶。
+
+        返回 {'window', 'bucket_seconds', 'docs', 'baseline_docs', 'terms': [...]}，
+        每个词包含 count（窗口内篇数）、expected（按基线比例估计的篇数）、
+        ratio（count / expected，平滑）和 score（z分数）
+        """
+        window = self.windows[window_name]
+        now = now or time.time()
+        number = self.bucket_number(window_name, now)
+        # 前一个桶仍在滑动窗口内的比例
+        overlap = 1 - (now % window.seconds) / window.seconds
+        with self._lock:
+            recent = [(bucket, weight) for bucket, weight in
+                      ((window.bucket(number), 1.0), (window.bucket(number - 1), overlap))
+                      if bucket and weight > 0]
+            baseline = []
+            if window.first_number is not None:
+                for previous in range(max(number - window.size + 1, window.first_number), number - 1):
+                    bucket = window.bucket(previous)
+                    if bucket and bucket.docs:
+                        baseline.append(bucket)
+
+            docs = sum(bucket.docs * weight for bucket, weight in recent)
+            baseline_docs = sum(bucket.docs for bucket in baseline)
+            result = {
+                'window': window_name,
+                'bucket_seconds': window.seconds,
+                'docs': round(docs, 1),
+                'baseline_docs': baseline_docs,
+                'terms': []
+            }
+
+            terms = []
+            for term in set().union(*(bucket.top for bucket, _ in recent)):
+                # 同一窗口的计数表宽度相同，哈希位置只算一次
+                indexes = recent[0][0].sketch.indexes(term)
+                count = sum(bucket.sketch.estimate(term, indexes) * weight for bucket, weight in recent)
+                if count < self.min_count:
+                    continue
+                if baseline_docs:
+                    share = sum(bucket.sketch.estimate(term, indexes) for bucket in baseline) / baseline_docs
+                else:
+                    share = 0.0
+                expected = share * docs
+                terms.append({
+                    'term': term,
+                    'count': round(count, 1),
+                    'expected': round(expected, 2),
+                    'ratio': round((count + 1) / (expected + 1), 2),
+                    'score': round((count - expected) / (expected + 1) ** 0.5, 3)
+                })
+
+        terms.sort(key=lambda item: (-item['score'], -item['count']))
+        result['terms'] = terms[:limit]
+        return result
+
+    def frequencies(self, window_name='1d', now=None):
+        """窗口内各候选词的篇数（例如用于生成词云）"""
+        window = self.windows[window_name]
+        number = self.bucket_number(window_name, now)
+        with self._lock:
+            buckets = [bucket for bucket in map(window.bucket, range(number - window.size + 1, number + 1))
+                       if bucket]
+            counts = {}
+            for term in set().union(*(bucket.top for bucket in buckets)):
+                indexes = buckets[0].sketch.indexes(term)
+                counts[term] = sum(bucket.sketch.estimate(term, indexes) for bucket in buckets)
+            return counts
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'bucket_seconds': window.seconds,
+                    'buckets': window.size,
+                    'active_buckets': sum(1 for bucket in window.buckets if bucket.docs),
+                    'docs': sum(bucket.docs for bucket in window.buckets)
+                }
+                for name, window in self.windows.items()
+            }
@@ -30,43 +30,87 @@ import hashlib
 import re
 from urllib.parse import urljoin, urlparse
 import logging
-from fake_useragent import UserAgent
-import jieba
-import jieba.analyse
 from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
-import pandas as pd
-import numpy as np
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('news_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from crawler_discovery import FeedDiscovery
+from crawler_extract import ContentExtractor
+from crawler_fetch import DEFAULT_CONTENT_TYPES, ResponseRejected, is_binary_url, load_response
+from crawler_headers import HeaderProfiles
+from crawler_images import ImagePipeline, extract_image_urls
+from crawler_keywords import KeywordEngine
+from crawler_logging import setup_logging
+from crawler_proxies import ProxyPool, make_session
+from crawler_records import NewsRecord, NewsWindow
+from crawler_storage import ContentStore, init_content_tables, load_contents
+from crawler_trending import TrendingTracker
+from crawler_throttle import AdaptiveThrottle, backoff_delay, is_retryable_status, parse_retry_after
+from crawler_profiler import SamplingProfiler
+from crawler_metrics import (NEWS_SAVED, QUEUE_DEPTH, RETRIES, STAGE_SECONDS, WORKERS_TOTAL,
+                             record_response, track_busy)
 
 class AdvancedNewsCrawler:
-    def __init__(self, config=None):
-        self.config = config or self.default_config()
-        self.ua = UserAgent()
-        self.session = requests.Session()
+    def __init__(self, config=None, on_news=None):
+        # 配置日志（已由管理器配置时不重复配置）
+        setup_logging()
+        
+        self.config = self.normalize_config(config or {})
+        # 每条新闻保存后的回调（例如推送实时事件）
+        self.on_news = on_news
+        self.session = make_session(pool_size=self.config['max_workers'])
         self.crawled_urls = set()
-        self.news_data = []
+        # 最近爬取的新闻（不含正文）和累计条数，正文只保存在数据库中
+        self.news_data = NewsWindow(self.config['recent_news_window'])
+        self.content_store = ContentStore.from_config(self.config['content_storage'])
+        self.keyword_engine = KeywordEngine.from_config(self.config['analysis_settings'])
+        # 本次运行的关键词按时间窗口计数，词云只取最近一天而不是全部历史
+        self.trending = TrendingTracker.from_config(self.config['analysis_settings'].get('trending'))
+        self.extractor = ContentExtractor(
+            min_chars=self.config['extract_min_chars'],
+            max_link_density=self.config['extract_max_link_density']
+        )
         self.lock = threading.Lock()
+        # 已保存、等待按批提取关键词的新闻
+        self.pending_news = []
+        self.profile_result = None
         
-        # 初始化数据库
-        self.init_database()
-        
-        # 创建数据目录
+        # 创建数据目录（数据库文件在news_data下，需先创建）
         for directory in ['news_data', 'charts', 'wordclouds']:
             if not os.path.exists(directory):
                 os.makedirs(directory)
         
+        # 初始化数据库
+        self.init_database()
+        
+        # 请求头只在启动时生成一次
+        self.header_profiles = HeaderProfiles(self.config.get('user_agents'),
+                                              self.config.get('user_agents_file'))
+        
+        # 文章图片在后台线程下载，不占用正文爬取的线程和带宽
+        self.images = ImagePipeline.from_config(self.config['image_settings'],
+                                                self.header_profiles.for_session())
+        
+        # 代理池：每个代理一个复用连接的Session，按健康评分选择
+        self.proxy_pool = ProxyPool(
+            self.config['proxy_list'] if self.config['use_proxy'] else [],
+            username=self.config['proxy_auth'].get('username'),
+            password=self.config['proxy_auth'].get('password'),
+            pool_size=self.config['max_workers'],
+            failure_threshold=self.config['proxy_failure_threshold'],
+            quarantine_seconds=self.config['proxy_quarantine_seconds']
+        )
+        
+        # 按主机自适应调整并发，线程池大小为并发上限
+        self.throttle = AdaptiveThrottle(
+            max_concurrency=self.config['max_workers'],
+            min_concurrency=self.config['min_concurrency'],
+            circuit_failure_threshold=self.config['circuit_failure_threshold'],
+            circuit_reset_seconds=self.config['circuit_reset_seconds']
+        )
+        
+        # RSS/Atom和站点地图文章发现，找不到时再解析首页
+        self.discovery = FeedDiscovery.from_config(self.config['discovery'], self.make_request,
+                                                   scope='advanced')
+        
         # 加载已爬取的URL（断点续爬）
         self.load_crawled_urls()
         
@@ -78,8 +122,35 @@ class AdvancedNewsCrawler:
             'request_delay': (1, 3),
             'timeout': 10,
             'max_retries': 3,
+            'retry_backoff_base': 1.0,
+            'retry_backoff_max': 30,
+            'max_retry_after': 120,
+            'min_concurrency': 1,
+            'circuit_failure_threshold': 5,
+            'circuit_reset_seconds': 30,
+            'max_response_mb': 5,
+            'max_read_seconds': 60,
+            'allowed_content_types': list(DEFAULT_CONTENT_TYPES),
+            'recent_news_window': 100,
+            # 每个网站的文章攒够这么多篇后一起提取关键词并保存（网站爬完时保存剩余的）
+            'keyword_batch_size': 32,
+            'extract_min_chars': 50,
+            'extract_max_link_density': 0.5,
+            # 正文压缩存储（见crawler_storage），默认不开启
+            'content_storage': {},
+            # 关键词提取、热点窗口等分析设置（与配置文件中的analysis_settings相同）
+            'analysis_settings': {},
+            # 订阅源/站点地图文章发现（见crawler_discovery），默认不开启
+            'discovery': {},
+            # 文章图片下载和缩略图（见crawler_images，与配置文件中的image_settings相同），默认不开启
+            'image_settings': {},
             'use_proxy': False,
             'proxy_list': [],
+            'proxy_auth': {},
+            'proxy_failure_threshold': 3,
+            'proxy_quarantine_seconds': 60,
+            'user_agents': [],
+            'user_agents_file': None,
             'target_sites': [
                 {
                     'name': '网易新闻',
@@ -98,6 +169,36 @@ class AdvancedNewsCrawler:
             ]
         }
     
+    def normalize_config(self, config):
+        """
+        合并默认配置，兼容crawler_config.json中的嵌套格式
+        （settings、proxy_settings、selectors）
+        """
+        normalized = self.default_config()
+        normalized.update(config.get('settings', {}))
+        normalized.update({key: value for key, value in config.items() if key != 'settings'})
+        
+        proxy_settings = config.get('proxy_settings')
+        if proxy_settings:
+            normalized['use_proxy'] = normalized.get('use_proxy') or proxy_settings.get('enabled', False)
+            normalized['proxy_list'] = proxy_settings.get('proxy_list', [])
+            normalized['proxy_auth'] = proxy_settings.get('auth') or {}
+            for key in ('failure_threshold', 'quarantine_seconds'):
+                if key in proxy_settings:
+                    normalized[f'proxy_{key}'] = proxy_settings[key]
+        
+        target_sites = []
+        for site_config in normalized['target_sites']:
+            site_config = dict(site_config)
+            if 'content_selector' not in site_config:
+                site_config['content_selector'] = site_config.get('selectors', {}).get('content', '')
+            if 'image_selector' not in site_config:
+                site_config['image_selector'] = site_config.get('selectors', {}).get('images')
+            target_sites.append(site_config)
+        normalized['target_sites'] = target_sites
+        
+        return normalized
+    
     def init_database(self):
         """
         初始化SQLite数据库
@@ -134,6 +235,16 @@ class AdvancedNewsCrawler:
             )
         ''')
         
+        # 管理器按爬取时间增量同步到汇总数据库
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_crawl_time ON news (crawl_time)')
+        
+        if self.content_store:
+            init_content_tables(conn)
+        
+        # 关键词的语料文档频率，跨运行累积
+        self.keyword_engine.init_table(conn)
+        self.keyword_engine.load(conn)
+        
         conn.commit()
         conn.close()
     
@@ -151,65 +262,132 @@ class AdvancedNewsCrawler:
         except Exception as e:
             logging.error(f'加载已爬取URL失败: {e}')
     
-    def get_headers(self):
+    def get_headers(self, url=None):
         """
-        获取随机请求头
+        获取请求头（同一主机固定使用同一套）
         """
-        return {
-            'User-Agent': self.ua.random,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
+        if url is None:
+            return self.header_profiles.for_session()
+        return self.header_profiles.for_url(url)
     
     def get_proxy(self):
         """
-        获取代理
+        从代理池中选择代理（未启用代理时返回None，使用直连Session）
         """
-        if self.config['use_proxy'] and self.config['proxy_list']:
-            return random.choice(self.config['proxy_list'])
-        return None
+        return self.proxy_pool.acquire()
     
     def make_request(self, url, **kwargs):
         """
-        发送HTTP请求（带重试机制）
+        发送HTTP请求（按主机自适应限流，失败时指数退避重试）
         """
+        host = urlparse(url).netloc
+        throttle = self.throttle.host(host)
+        
         for attempt in range(self.config['max_retries']):
+            if attempt > 0:
+                RETRIES.inc(crawler='advanced')
+            
+            with STAGE_SECONDS.time(crawler='advanced', stage='throttle'):
+                acquired = throttle.acquire()
+            if not acquired:
+                logging.warning(f'主机 {host} 处于熔断状态，跳过: {url}')
+                return None
+            
+            retry_after = None
+            response = None
+            proxy = self.get_proxy()
+            session = proxy.session if proxy else self.session
+            start = time.perf_counter()
             try:
-                headers = self.get_headers()
-                proxy = self.get_proxy()
-                proxies = {'http': proxy, 'https': proxy} if proxy else None
+                with STAGE_SECONDS.time(crawler='advanced', stage='fetch'):
+                    response = session.get(
+                        url,
+                        headers=self.get_headers(url),
+                        timeout=self.config['timeout'],
+                        stream=True,
+                        **kwargs
+                    )
+                    # 只检查成功响应的类型，错误页面照常按状态码处理
+                    load_response(
+                        response,
+                        max_bytes=int(self.config['max_response_mb'] * 1024 * 1024),
+                        allowed_types=self.config['allowed_content_types'] if response.status_code == 200 else None,
+                        max_seconds=self.config['max_read_seconds']
+                    )
+            except ResponseRejected as e:
+                # 主机和代理都正常，只是内容不需要，不重试
+                self.proxy_pool.report(proxy, True, time.perf_counter() - start)
+                throttle.release(time.perf_counter() - start, status=response.status_code)
+                record_response('advanced', rejected=True)
+                logging.warning(f'跳过响应 {url}: {e}')
+                return None
+            except Exception as e:
+                # 只有代理本身的故障（ProxyError；经代理时建立连接的对象是代理，连接超时也算）记为代理故障：
+                # 不计入目标主机的熔断，换一个代理立即重试。目标网站无响应、读取超时等按正常的限流和退避处理，
+                # 也不计入代理的健康评分
+                proxy_fault = proxy is not None and isinstance(
+                    e, (requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout))
+                if proxy_fault:
+                    self.proxy_pool.report(proxy, False)
+                throttle.release(time.perf_counter() - start, error=True, ignore=proxy_fault)
+                record_response('advanced', error=True)
+                logging.error(f'请求出错 (尝试 {attempt + 1}/{self.config["max_retries"]}): {e}')
+                if proxy_fault:
+                    continue
+            else:
+                latency = time.perf_counter() - start
+                status = response.status_code
+                if status == 407:
+                    logging.error(f'代理认证失败: {proxy.name if proxy else "直连"}')
+                    self.proxy_pool.report(proxy, False)
+                    throttle.release(latency, ignore=True)
+                    record_response('advanced', response)
+                    continue
                 
-                response = requests.get(
-                    url,
-                    headers=headers,
-                    proxies=proxies,
-                    timeout=self.config['timeout'],
-                    **kwargs
-                )
+                self.proxy_pool.report(proxy, True, latency)
+                if status != 200:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'),
+                                                    self.config['max_retry_after'])
+                throttle.release(latency, status=status, retry_after=retry_after)
+                record_response('advanced', response)
                 
-                if response.status_code == 200:
+                if status == 200:
                     return response
-                else:
-                    logging.warning(f'请求失败，状态码: {response.status_code}, URL: {url}')
-                    
-            except Exception as e:
-                logging.error(f'请求出错 (尝试 {attempt + 1}/{self.config["max_retries"]}): {e}')
-                if attempt < self.config['max_retries'] - 1:
-                    time.sleep(random.uniform(1, 3))
+                
+                logging.warning(f'请求失败，状态码: {status}, URL: {url}')
+                if not is_retryable_status(status):
+                    return None
+                if status in (403, 429):
+                    # 可能是请求头被识别，该主机换一套请求头
+                    self.header_profiles.rotate(host)
+            
+            # 有Retry-After时由限流器让该主机的所有请求等待，否则本线程退避
+            if attempt < self.config['max_retries'] - 1 and retry_after is None:
+                with STAGE_SECONDS.time(crawler='advanced', stage='delay'):
+                    time.sleep(backoff_delay(attempt, self.config['retry_backoff_base'],
+                                             self.config['retry_backoff_max']))
         
         return None
     
     def extract_news_links(self, site_config, max_links=50):
         """
-        提取新闻链接
+        提取新闻链接：优先从订阅源和站点地图发现新文章（没有新文章时直接返回空列表），
+        网站没有可用的订阅源/站点地图时解析首页
         """
+        if self.discovery:
+            try:
+                links = self.discovery.discover(site_config, max_links, exclude=self.crawled_urls)
+                if links is not None:
+                    logging.info(f'{site_config["name"]} 从订阅源/站点地图发现 {len(links)} 篇新文章')
+                    return links
+            except Exception as e:
+                logging.error(f'订阅源/站点地图发现失败: {e}')
+        
         response = self.make_request(site_config['base_url'])
         if not response:
             return []
         
+        parse_start = time.perf_counter()
         soup = BeautifulSoup(response.text, 'html.parser')
         links = []
         
@@ -221,10 +399,11 @@ class AdvancedNewsCrawler:
             if href.startswith('/'):
                 href = urljoin(site_config['base_url'], href)
             
-            # 过滤有效的新闻链接
+            # 过滤有效的新闻链接（图片、附件等二进制链接不请求）
             if (href.startswith('http') and 
                 any(keyword in href for keyword in ['news', 'article', 'story']) and
-                href not in self.crawled_urls):
+                href not in self.crawled_urls and
+                not is_binary_url(href)):
                 
                 title = link.get_text(strip=True)
                 if title and len(title) > 5:
@@ -237,6 +416,7 @@ class AdvancedNewsCrawler:
                     if len(links) >= max_links:
                         break
         
+        STAGE_SECONDS.observe(time.perf_counter() - parse_start, crawler='advanced', stage='parse')
         return links
     
     def extract_news_content(self, url, site_config):
@@ -247,6 +427,7 @@ class AdvancedNewsCrawler:
         if not response:
             return None
         
+        parse_start = time.perf_counter()
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # 提取标题
@@ -259,19 +440,18 @@ class AdvancedNewsCrawler:
                 break
         
         # 提取内容
-        content = ''
         content_selectors = site_config['content_selector'].split(', ') if site_config['content_selector'] else [
             '.content', '.article-content', '.post-content', 'article', '.news-content'
         ]
         
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # 移除脚本和样式标签
-                for script in content_elem(["script", "style"]):
-                    script.decompose()
-                content = content_elem.get_text(strip=True)
-                break
+        # 选择器都不可用时按文字密度提取
+        content, _ = self.extractor.extract(soup, url, content_selectors)
+        
+        # 提交正文区块中的图片（找不到正文区块时取整个页面）
+        if self.images and content:
+            scope = next((element for element in map(soup.select_one, content_selectors) if element), soup)
+            self.images.submit(url, extract_image_urls(scope, url, site_config.get('image_selector'),
+                                                       self.images.max_per_article))
         
         # 提取发布时间
         pub_time = ''
@@ -285,16 +465,17 @@ class AdvancedNewsCrawler:
         # 提取摘要
         summary = content[:200] + '...' if len(content) > 200 else content
         
-        return {
-            'title': title,
-            'url': url,
-            'content': content,
-            'summary': summary,
-            'pub_time': pub_time,
-            'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'source': site_config['name'],
-            'word_count': len(content)
-        }
+        STAGE_SECONDS.observe(time.perf_counter() - parse_start, crawler='advanced', stage='parse')
+        return NewsRecord(
+            title=title,
+            url=url,
+            content=content,
+            summary=summary,
+            pub_time=pub_time,
+            crawl_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            source=site_config['name'],
+            word_count=len(content)
+        )
     
     def analyze_sentiment(self, text):
         """
@@ -311,77 +492,165 @@ class AdvancedNewsCrawler:
         
         return (positive_count - negative_count) / (positive_count + negative_count)
     
-    def extract_keywords(self, text, top_k=10):
+    def extract_keywords(self, text, top_k=None):
         """
-        提取关键词
+        提取关键词（按本地语料的TF-IDF，文章同时计入语料）
         """
         try:
-            keywords = jieba.analyse.extract_tags(text, topK=top_k, withWeight=False)
-            return ', '.join(keywords)
-        except:
+            return ', '.join(self.keyword_engine.extract(text, top_k))
+        except Exception as e:
+            logging.error(f'提取关键词失败: {e}')
             return ''
     
-    def save_to_database(self, news_item):
+    def extract_keywords_batch(self, texts, top_k=None):
+        """
+        一批文章的关键词（一次分词和向量化，比逐篇提取快），失败时每篇为空字符串
+        """
+        try:
+            return [', '.join(terms) for terms in self.keyword_engine.extract_batch(texts, top_k)]
+        except Exception as e:
+            logging.error(f'批量提取关键词失败: {e}')
+            return [''] * len(texts)
+    
+    def save_keyword_stats(self):
+        """保存关键词语料的文档频率"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            self.keyword_engine.save(conn)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.error(f'保存关键词语料统计失败: {e}')
+    
+    def update_keywords(self, news_items):
+        """
+        按批提取一批已保存新闻的关键词（一次向量化），补写到数据库
+        """
+        with STAGE_SECONDS.time(crawler='advanced', stage='analyze'):
+            keywords = self.extract_keywords_batch([news_item.content for news_item in news_items])
+        rows = []
+        for news_item, item_keywords in zip(news_items, keywords):
+            news_item.keywords = item_keywords
+            self.trending.add(item_keywords)
+            rows.append((item_keywords, hashlib.md5(news_item.url.encode()).hexdigest()))
+        
+        try:
+            with STAGE_SECONDS.time(crawler='advanced', stage='store'):
+                conn = sqlite3.connect(self.db_path)
+                conn.executemany('UPDATE news SET keywords = ? WHERE url_hash = ?', rows)
+                conn.commit()
+                conn.close()
+        except Exception as e:
+            logging.error(f'保存关键词失败: {e}')
+    
+    def queue_keywords(self, news_item):
+        """加入待提取关键词的新闻，攒够 keyword_batch_size 篇时提取这一批"""
+        with self.lock:
+            self.pending_news.append(news_item)
+            if len(self.pending_news) < self.config['keyword_batch_size']:
+                return
+            batch, self.pending_news = self.pending_news, []
+        self.update_keywords(batch)
+    
+    def flush_pending(self):
+        """提取剩余新闻的关键词"""
+        with self.lock:
+            batch, self.pending_news = self.pending_news, []
+        if batch:
+            self.update_keywords(batch)
+    
+    def save_to_database(self, news_item, defer_keywords=False):
         """
-        保存到数据库
+        保存到数据库，返回是否成功（defer_keywords为True时关键词稍后按批补写）
         """
         try:
             # 计算URL哈希
-            url_hash = hashlib.md5(news_item['url'].encode()).hexdigest()
+            url_hash = hashlib.md5(news_item.url.encode()).hexdigest()
             
             # 分析情感和关键词
-            sentiment_score = self.analyze_sentiment(news_item['content'])
-            keywords = self.extract_keywords(news_item['content'])
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO news 
-                (title, url, content, summary, pub_time, crawl_time, source, 
-                 keywords, sentiment_score, word_count, url_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                news_item['title'],
-                news_item['url'],
-                news_item['content'],
-                news_item['summary'],
-                news_item['pub_time'],
-                news_item['crawl_time'],
-                news_item['source'],
-                keywords,
-                sentiment_score,
-                news_item['word_count'],
-                url_hash
-            ))
+            with STAGE_SECONDS.time(crawler='advanced', stage='analyze'):
+                news_item.sentiment_score = self.analyze_sentiment(news_item.content)
+                if not defer_keywords:
+                    news_item.keywords = self.extract_keywords(news_item.content)
             
-            conn.commit()
-            conn.close()
+            with STAGE_SECONDS.time(crawler='advanced', stage='store'):
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                
+                # 开启压缩存储时正文写入news_content，news表的content列为NULL
+                content = news_item.content
+                if self.content_store:
+                    self.content_store.put(cursor, url_hash, content, news_item.source)
+                    content = None
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO news 
+                    (title, url, content, summary, pub_time, crawl_time, source, 
+                     keywords, sentiment_score, word_count, url_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    news_item.title,
+                    news_item.url,
+                    content,
+                    news_item.summary,
+                    news_item.pub_time,
+                    news_item.crawl_time,
+                    news_item.source,
+                    news_item.keywords,
+                    news_item.sentiment_score,
+                    news_item.word_count,
+                    url_hash
+                ))
+                
+                conn.commit()
+                conn.close()
+            NEWS_SAVED.inc(crawler='advanced')
+            if not defer_keywords:
+                self.trending.add(news_item.keywords)
             
-            logging.info(f'保存新闻: {news_item["title"][:50]}...')
+            logging.info(f'保存新闻: {news_item.title[:50]}...')
+            return True
             
         except Exception as e:
             logging.error(f'保存到数据库失败: {e}')
+            return False
     
     def crawl_single_news(self, news_link, site_config):
         """
         爬取单条新闻
         """
         try:
-            # 添加延时
-            time.sleep(random.uniform(*self.config['request_delay']))
+            # 熔断中的主机直接跳过，不占用线程等待
+            if self.throttle.host(urlparse(news_link['url']).netloc).circuit_open:
+                return None
             
-            news_content = self.extract_news_content(news_link['url'], site_config)
+            # 添加延时
+            with STAGE_SECONDS.time(crawler='advanced', stage='delay'):
+                time.sleep(random.uniform(*self.config['request_delay']))
             
-            if news_content and news_content['content']:
-                with self.lock:
-                    self.crawled_urls.add(news_link['url'])
-                    self.news_data.append(news_content)
+            with track_busy('advanced'):
+                news_content = self.extract_news_content(news_link['url'], site_config)
                 
-                # 保存到数据库
-                self.save_to_database(news_content)
-                
-                return news_content
+                if news_content and news_content.content:
+                    # 页面上找不到发布时间时使用订阅源/站点地图中的
+                    if not news_content.pub_time and news_link.get('pub_time'):
+                        news_content.pub_time = news_link['pub_time']
+                    # 先保存到数据库并通知，关键词攒成一批后补写；内存中只保留不含正文的最近记录
+                    if not self.save_to_database(news_content, defer_keywords=True):
+                        return None
+                    
+                    with self.lock:
+                        self.crawled_urls.add(news_link['url'])
+                    self.news_data.append(news_content)
+                    
+                    if self.on_news:
+                        try:
+                            self.on_news(news_content)
+                        except Exception as e:
+                            logging.error(f'通知新新闻失败 {news_link["url"]}: {e}')
+                    
+                    self.queue_keywords(news_content)
+                    return news_content
             
         except Exception as e:
             logging.error(f'爬取新闻失败 {news_link["url"]}: {e}')
@@ -399,27 +668,39 @@ class AdvancedNewsCrawler:
         logging.info(f'找到 {len(news_links)} 个新闻链接')
         
         # 多线程爬取
+        WORKERS_TOTAL.set(self.config['max_workers'], crawler='advanced')
         with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
             futures = [
                 executor.submit(self.crawl_single_news, link, site_config)
                 for link in news_links
             ]
             
+            remaining = len(futures)
+            QUEUE_DEPTH.set(remaining, queue='advanced_links')
             for future in as_completed(futures):
+                remaining -= 1
+                QUEUE_DEPTH.set(remaining, queue='advanced_links')
                 try:
                     result = future.result()
                     if result:
-                        logging.info(f'成功爬取: {result["title"][:50]}...')
+                        logging.info(f'成功爬取: {result.title[:50]}...')
                 except Exception as e:
                     logging.error(f'线程执行失败: {e}')
+        
+        self.flush_pending()
     
     def generate_statistics(self):
         """
         生成统计报告
         """
+        import pandas as pd
+
         try:
+            # 统计不需要正文，只读取用到的列
             conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query('SELECT * FROM news', conn)
+            df = pd.read_sql_query(
+                'SELECT source, crawl_time, sentiment_score, word_count FROM news', conn
+            )
             conn.close()
             
             if df.empty:
@@ -454,6 +735,9 @@ class AdvancedNewsCrawler:
         """
         生成数据可视化图表
         """
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
         plt.rcParams['font.sans-serif'] = ['SimHei']
         plt.rcParams['axes.unicode_minus'] = False
         
@@ -474,14 +758,14 @@ class AdvancedNewsCrawler:
         plt.savefig('charts/sentiment_distribution.png', dpi=300, bbox_inches='tight')
         plt.close()
         
-        # 3. 词云图
-        all_keywords = ' '.join(df['keywords'].dropna())
-        if all_keywords:
+        # 3. 词云图（最近一天的关键词篇数，不再拼接全部历史关键词）
+        frequencies = self.trending.frequencies('1d') if '1d' in self.trending.windows else {}
+        if frequencies:
             wordcloud = WordCloud(
                 font_path='simhei.ttf',  # 需要中文字体
                 width=800, height=400,
                 background_color='white'
-            ).generate(all_keywords)
+            ).generate_from_frequencies(frequencies)
             
             plt.figure(figsize=(12, 6))
             plt.imshow(wordcloud, interpolation='bilinear')
@@ -496,9 +780,17 @@ class AdvancedNewsCrawler:
         """
         导出数据到多种格式
         """
+        import pandas as pd
+
         try:
             conn = sqlite3.connect(self.db_path)
             df = pd.read_sql_query('SELECT * FROM news', conn)
+            
+            # 压缩存储的正文（content为NULL）解压后填回
+            compressed = df['content'].isna()
+            if compressed.any():
+                contents = load_contents(conn, df.loc[compressed, 'url_hash'])
+                df.loc[compressed, 'content'] = df.loc[compressed, 'url_hash'].map(contents).fillna('')
             conn.close()
             
             if df.empty:
@@ -519,12 +811,14 @@ class AdvancedNewsCrawler:
         except Exception as e:
             logging.error(f'数据导出失败: {e}')
     
-    def run(self, max_news_per_site=50):
+    def run(self, max_news_per_site=50, profile=False):
         """
         运行爬虫
+        profile=True 时对本次运行进行采样分析，结果写入 news_data/profiles/
         """
         logging.info('=== 高级新闻爬虫开始运行 ===')
         
+        profiler = SamplingProfiler(name='advanced').start() if profile else None
         start_time = time.time()
         
         # 爬取各个网站
@@ -539,9 +833,17 @@ class AdvancedNewsCrawler:
         logging.info(f'爬取完成，耗时: {end_time - start_time:.2f}秒')
         logging.info(f'总共爬取 {len(self.news_data)} 条新闻')
         
+        if self.images:
+            self.images.close()
+            logging.info(f'图片下载完成: {self.images.stats()}')
+        
         # 生成统计和导出数据
         self.generate_statistics()
         self.export_data()
+        self.save_keyword_stats()
+        
+        if profiler:
+            self.profile_result = profiler.stop()
         
         logging.info('=== 爬虫运行结束 ===')
 
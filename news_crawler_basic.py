@@ -13,35 +13,112 @@ import random
 import csv
 import json
 from datetime import datetime
+from urllib.parse import urljoin
 import os
 
+from crawler_discovery import FeedDiscovery
+from crawler_extract import ContentExtractor
+from crawler_fetch import DEFAULT_MAX_BYTES, ResponseRejected, is_binary_url, load_response
+from crawler_headers import HeaderProfiles
+from crawler_images import ImagePipeline, extract_image_urls
+from crawler_metrics import NEWS_SAVED, STAGE_SECONDS, record_response
+from crawler_records import NewsRecord
+
 class BasicNewsCrawler:
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
+    def __init__(self, base_url='https://news.163.com/', request_delay=(1, 3), timeout=10, page_url=None,
+                 user_agents=None, user_agents_file=None, max_response_bytes=DEFAULT_MAX_BYTES,
+                 discovery_settings=None, image_settings=None):
+        """
+        base_url: 新闻列表页地址
+        request_delay: 每页之间的随机延时范围（秒）
+        page_url: 分页地址模板，例如 'https://example.com/list_{page}.html'；
+                  为空时每页都请求base_url
+        user_agents / user_agents_file: User-Agent列表或文件，整个会话使用其中一个
+        max_response_bytes: 单个响应的大小上限，超过时放弃该页面
+        discovery_settings: 订阅源/站点地图文章发现设置（见crawler_discovery），
+                            发现到新文章时不再逐页解析列表页
+        image_settings: 文章图片下载设置（见crawler_images），开启后get_news_detail提交正文图片
+        """
+        self.base_url = base_url
+        self.request_delay = tuple(request_delay)
+        self.timeout = timeout
+        self.page_url = page_url
+        self.max_response_bytes = max_response_bytes
+        self.extractor = ContentExtractor(crawler='basic')
+        self.headers = dict(HeaderProfiles(user_agents, user_agents_file).for_session())
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
         # 创建数据存储目录
         if not os.path.exists('news_data'):
             os.makedirs('news_data')
+        
+        self.discovery = FeedDiscovery.from_config(discovery_settings, self.fetch_or_none, scope='basic')
+        self.images = ImagePipeline.from_config(image_settings, self.headers)
+    
+    def fetch(self, url):
+        """
+        请求页面并记录抓取指标
+        """
+        try:
+            with STAGE_SECONDS.time(crawler='basic', stage='fetch'):
+                response = self.session.get(url, timeout=self.timeout, stream=True)
+                load_response(response, max_bytes=self.max_response_bytes)
+        except ResponseRejected:
+            record_response('basic', rejected=True)
+            raise
+        except Exception:
+            record_response('basic', error=True)
+            raise
+        record_response('basic', response)
+        return response
+    
+    def fetch_or_none(self, url):
+        """
+        请求页面，失败时返回None（文章发现使用）
+        """
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            print(f'请求失败 {url}: {e}')
+            return None
+    
+    def discover_news(self, category='news', max_links=20):
+        """
+        从订阅源和站点地图获取新文章（带真实的发布时间），没有新文章时返回空列表；
+        未开启、网站没有可用的订阅源/站点地图或发现失败时返回None（需要解析列表页）
+        """
+        if not self.discovery:
+            return None
+        try:
+            links = self.discovery.discover({'name': '', 'base_url': self.base_url}, max_links * 2)
+        except Exception as e:
+            print(f'订阅源/站点地图发现失败: {e}')
+            return None
+        if links is None:
+            return None
+        
+        crawl_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # 站点地图中没有标题的文章需要请求详情页，这里只保留有标题的
+        news_list = [NewsRecord(
+            title=link['title'],
+            url=link['url'],
+            pub_time=link['pub_time'] or crawl_time,
+            category=category,
+            crawl_time=crawl_time
+        ) for link in links if len(link['title']) >= 5]
+        return news_list[:max_links]
     
     def get_news_list(self, category='news', page=1):
         """
         获取新闻列表
         """
-        # 使用网易新闻作为示例（更容易解析）
-        url = f'https://news.163.com/'
+        # 默认使用网易新闻作为示例（更容易解析）
+        url = self.page_url.format(category=category, page=page) if self.page_url else self.base_url
         
         try:
-            response = self.session.get(url, timeout=10)
-            response.encoding = 'utf-8'
+            response = self.fetch(url)
+            parse_start = time.perf_counter()
             soup = BeautifulSoup(response.text, 'html.parser')
             
             news_list = []
@@ -71,11 +148,13 @@ class BasicNewsCrawler:
                     if href.startswith('//'):
                         link = 'https:' + href
                     elif href.startswith('/'):
-                        link = 'https://news.163.com' + href
+                        link = urljoin(self.base_url, href)
                     elif href.startswith('http'):
                         link = href
                     else:
                         continue
+                    if is_binary_url(link):
+                        continue
                     
                     # 提取标题
                     title = link_elem.get_text(strip=True)
@@ -105,14 +184,14 @@ class BasicNewsCrawler:
                         if summary_elem:
                             summary = summary_elem.get_text(strip=True)[:200]
                     
-                    news_list.append({
-                        'title': title,
-                        'link': link,
-                        'summary': summary,
-                        'pub_time': pub_time,
-                        'category': category,
-                        'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
+                    news_list.append(NewsRecord(
+                        title=title,
+                        url=link,
+                        summary=summary,
+                        pub_time=pub_time,
+                        category=category,
+                        crawl_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    ))
                     
                     news_count += 1
                     print(f'找到新闻: {title[:30]}...')
@@ -121,6 +200,7 @@ class BasicNewsCrawler:
                     print(f'解析新闻项时出错: {e}')
                     continue
             
+            STAGE_SECONDS.observe(time.perf_counter() - parse_start, crawler='basic', stage='parse')
             return news_list
             
         except Exception as e:
@@ -132,8 +212,8 @@ class BasicNewsCrawler:
         获取新闻详情
         """
         try:
-            response = self.session.get(news_url, timeout=10)
-            response.encoding = 'utf-8'
+            response = self.fetch(news_url)
+            parse_start = time.perf_counter()
             soup = BeautifulSoup(response.text, 'html.parser')
             
             # 提取正文内容
@@ -145,21 +225,15 @@ class BasicNewsCrawler:
                 '.article-content'
             ]
             
-            content = ''
-            for selector in content_selectors:
-                content_elem = soup.select_one(selector)
-                if content_elem:
-                    content = content_elem.get_text(strip=True)
-                    break
+            # 选择器都不可用时按文字密度提取
+            content, _ = self.extractor.extract(soup, news_url, content_selectors)
             
-            # 提取图片
-            images = []
-            img_tags = soup.find_all('img')
-            for img in img_tags[:5]:  # 限制图片数量
-                src = img.get('src') or img.get('data-src')
-                if src and 'http' in src:
-                    images.append(src)
+            # 提取图片（限制数量），开启图片下载时在后台下载
+            images = extract_image_urls(soup, news_url, limit=5)
+            if self.images and content:
+                self.images.submit(news_url, images)
             
+            STAGE_SECONDS.observe(time.perf_counter() - parse_start, crawler='basic', stage='parse')
             return {
                 'content': content,
                 'images': images
@@ -181,7 +255,7 @@ class BasicNewsCrawler:
             
             writer.writeheader()
             for news in news_list:
-                writer.writerow(news)
+                writer.writerow({field: news.get(field) for field in fieldnames})
         
         print(f'数据已保存到 {filepath}')
     
@@ -191,16 +265,33 @@ class BasicNewsCrawler:
         """
         filepath = os.path.join('news_data', filename)
         
+        fieldnames = ['title', 'link', 'summary', 'pub_time', 'category', 'crawl_time']
         with open(filepath, 'w', encoding='utf-8') as jsonfile:
-            json.dump(news_list, jsonfile, ensure_ascii=False, indent=2)
+            json.dump([{field: news.get(field) for field in fieldnames} for news in news_list],
+                      jsonfile, ensure_ascii=False, indent=2)
         
         print(f'数据已保存到 {filepath}')
     
-    def crawl(self, categories=['news'], max_pages=3):
+    def crawl(self, categories=['news'], max_pages=3, progress_callback=None):
         """
         主爬取函数
+        progress_callback(已完成页数, 总页数, 本页新闻列表) 每页完成后调用
         """
         all_news = []
+        total_pages = len(categories) * max_pages
+        done_pages = 0
+        
+        # 订阅源/站点地图覆盖整个网站（共用一个发布时间水位），每次爬取只发现一次；
+        # 无法区分分类，只爬取一个分类时才标记该分类
+        discovered = self.discover_news(categories[0] if len(categories) == 1 else '',
+                                        max_links=20 * len(categories))
+        if discovered is not None:
+            # 订阅源/站点地图可用时不再请求列表页（没有新文章时也不请求）
+            if progress_callback:
+                progress_callback(total_pages, total_pages, discovered)
+            all_news.extend(discovered)
+            print(f'从订阅源/站点地图获取到 {len(discovered)} 条新闻')
+            categories = []
         
         for category in categories:
             print(f'\n开始爬取分类: {category}')
@@ -210,6 +301,10 @@ class BasicNewsCrawler:
                 
                 news_list = self.get_news_list(category, page)
                 
+                done_pages += 1
+                if progress_callback:
+                    progress_callback(done_pages, total_pages, news_list)
+                
                 if news_list:
                     all_news.extend(news_list)
                     print(f'获取到 {len(news_list)} 条新闻')
@@ -218,14 +313,20 @@ class BasicNewsCrawler:
                     break
                 
                 # 添加延时，避免请求过快
-                time.sleep(random.uniform(1, 3))
+                with STAGE_SECONDS.time(crawler='basic', stage='delay'):
+                    time.sleep(random.uniform(*self.request_delay))
         
         print(f'\n总共爬取到 {len(all_news)} 条新闻')
         
+        if self.images:
+            self.images.close()
+        
         # 保存数据
         if all_news:
-            self.save_to_csv(all_news)
-            self.save_to_json(all_news)
+            with STAGE_SECONDS.time(crawler='basic', stage='store'):
+                self.save_to_csv(all_news)
+                self.save_to_json(all_news)
+            NEWS_SAVED.inc(len(all_news), crawler='basic')
         
         return all_news
 
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""只读连接池"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from crawler_db import ReadConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db_path = tmp_path / 'news.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE news (id INTEGER PRIMARY KEY)')
+    conn.commit()
+    conn.close()
+    pool = ReadConnectionPool(str(db_path))
+    yield pool
+    pool.close_all()
+
+
+def test_thread_reuses_connection(pool):
+    assert pool.get() is pool.get()
+
+
+def test_short_lived_threads_do_not_accumulate(pool):
+    def query():
+        with pool.connection() as conn:
+            conn.execute('SELECT COUNT(*) FROM news').fetchone()
+
+    for _ in range(50):
+        thread = threading.Thread(target=query)
+        thread.start()
+        thread.join()
+    assert len(pool._connections) <= 1
+
+
+def test_error_discards_connection(pool):
+    with pytest.raises(sqlite3.Error):
+        with pool.connection() as conn:
+            conn.execute('SELECT * FROM missing_table')
+    assert conn not in pool._connections
+    assert pool.get() is not conn
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""NewsRecord 按dict方式使用的兼容性"""
+
+from crawler_manager import CrawlerManager
+from crawler_records import NewsRecord
+
+
+def test_contains_uses_field_names():
+    record = NewsRecord(title='标题', url='https://example.com/1.html')
+    assert 'title' in record
+    assert 'link' in record
+    assert 'pub_ts' not in record
+
+
+def test_news_event_from_record():
+    record = NewsRecord(title='标题', url='https://example.com/1.html', pub_time='2025-03-01 08:00',
+                        crawl_time='2025-03-01 09:00:00', source='来源')
+    manager = CrawlerManager.__new__(CrawlerManager)
+    event = manager.news_event(record, 'advanced')
+    assert event['url'] == 'https://example.com/1.html'
+    assert event['crawler_type'] == 'advanced'
+    assert event['pub_ts'] is not None
+    assert 'content' not in event
+
+
+def test_news_event_keeps_stored_pub_ts():
+    manager = CrawlerManager.__new__(CrawlerManager)
+    event = manager.news_event({'url': 'https://example.com/1.html', 'pub_time': '', 'pub_ts': 1700000000}, 'basic')
+    assert event['pub_ts'] == 1700000000
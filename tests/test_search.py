@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""全文检索的高亮结果"""
+
+import re
+import sqlite3
+
+from crawler_search import NewsSearchIndex, highlight, make_snippet
+
+SCRIPT_TITLE = '<script>alert(1)</script>新能源汽车销量增长'
+
+
+def test_highlight_escapes_text():
+    pattern = re.compile('新能源')
+    assert highlight(SCRIPT_TITLE, pattern) == (
+        '&lt;script&gt;alert(1)&lt;/script&gt;<mark>新能源</mark>汽车销量增长'
+    )
+
+
+def test_highlight_escapes_matched_term():
+    pattern = re.compile(re.escape('<b>'))
+    assert highlight('a<b>c', pattern) == 'a<mark>&lt;b&gt;</mark>c'
+
+
+def test_snippet_escapes_text():
+    snippet = make_snippet('<img src=x onerror=alert(1)> 新能源汽车', re.compile('新能源'))
+    assert '<img' not in snippet
+    assert '<mark>新能源</mark>' in snippet
+
+
+def test_search_results_escape_crawled_html(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'news.db')
+    conn.execute('''
+        CREATE TABLE news_summary (
+            id INTEGER PRIMARY KEY, title TEXT, url TEXT, content TEXT, summary TEXT, pub_time TEXT,
+            crawl_time TEXT, source TEXT, keywords TEXT, sentiment_score REAL, crawler_type TEXT
+        )
+    ''')
+    conn.execute(
+        'INSERT INTO news_summary VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (SCRIPT_TITLE, 'https://example.com/1.html', '<script>alert(2)</script>新能源汽车市场',
+         '摘要', '2025-03-01', '2025-03-01 09:00:00', '来源', '新能源', 0.0, 'basic')
+    )
+    index = NewsSearchIndex(str(tmp_path / 'news.db'))
+    index.init_index(conn)
+    index.index_row(conn.cursor(), 1, SCRIPT_TITLE, '摘要', '<script>alert(2)</script>新能源汽车市场', '新能源')
+
+    result = index.search(conn, '新能源')['results'][0]
+    assert '<script>' not in result['title']
+    assert '<script>' not in result['snippet']
+    assert '<mark>新能源</mark>' in result['title']
+    conn.close()
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+WSGI入口 - 供外部服务器加载
+
+示例：
+    python crawler_manager.py runner                      # 独立的爬取任务执行进程
+    gunicorn -w 4 -k gthread --threads 8 wsgi:app         # Web接口
+    waitress-serve --threads 32 wsgi:app
+"""
+
+from crawler_manager import create_app
+
+app = create_app(execution_mode='web')